@@ -0,0 +1,546 @@
+import base64
+import json
+import time
+
+from matching import normalize_name
+from prices import normalize_items
+
+ROLLUP_SCHEMA = """
+-- Current menus, one row per item variant; replaced per restaurant whenever its menu changes.
+CREATE TABLE IF NOT EXISTS menu_items (
+    item_id INTEGER NOT NULL REFERENCES items (id),
+    variant INTEGER NOT NULL,
+    restaurant_id INTEGER NOT NULL REFERENCES restaurants (id),
+    platform TEXT NOT NULL,
+    city TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mrp_paise INTEGER,
+    price_paise INTEGER,
+    discount_pct REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (item_id, variant)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_menu_items_restaurant ON menu_items (restaurant_id, item_id, variant);
+CREATE INDEX IF NOT EXISTS idx_menu_items_city ON menu_items (city, item_id, variant);
+CREATE INDEX IF NOT EXISTS idx_menu_items_platform ON menu_items (platform, item_id, variant);
+CREATE INDEX IF NOT EXISTS idx_restaurants_name ON restaurants (name);
+CREATE TABLE IF NOT EXISTS restaurant_stats (
+    restaurant_id INTEGER PRIMARY KEY REFERENCES restaurants (id),
+    platform TEXT NOT NULL,
+    city TEXT NOT NULL,
+    name TEXT NOT NULL,
+    items INTEGER NOT NULL,
+    priced_items INTEGER NOT NULL,
+    sum_price_paise INTEGER NOT NULL,
+    min_price_paise INTEGER,
+    max_price_paise INTEGER,
+    discounted_items INTEGER NOT NULL,
+    sum_discount_pct REAL NOT NULL,
+    avg_discount_pct REAL,
+    max_discount_pct REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_restaurant_stats_avg_discount ON restaurant_stats (avg_discount_pct, restaurant_id);
+CREATE INDEX IF NOT EXISTS idx_restaurant_stats_max_discount ON restaurant_stats (max_discount_pct, restaurant_id);
+CREATE TABLE IF NOT EXISTS restaurant_price_buckets (
+    restaurant_id INTEGER NOT NULL REFERENCES restaurants (id),
+    bucket INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    PRIMARY KEY (restaurant_id, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS city_stats (
+    city TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    restaurants INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    priced_items INTEGER NOT NULL,
+    sum_price_paise INTEGER NOT NULL,
+    discounted_items INTEGER NOT NULL,
+    sum_discount_pct REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (city, platform)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS city_price_buckets (
+    city TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    PRIMARY KEY (city, platform, bucket)
+) WITHOUT ROWID;
+-- Per city and platform again, but only over items whose name contains ``term`` (see ``dish_terms``).
+CREATE TABLE IF NOT EXISTS dish_stats (
+    term TEXT NOT NULL,
+    city TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    restaurants INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    priced_items INTEGER NOT NULL,
+    sum_price_paise INTEGER NOT NULL,
+    discounted_items INTEGER NOT NULL,
+    sum_discount_pct REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (term, city, platform)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dish_price_buckets (
+    term TEXT NOT NULL,
+    city TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    PRIMARY KEY (term, city, platform, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS platform_stats (
+    platform TEXT PRIMARY KEY,
+    restaurants INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    priced_items INTEGER NOT NULL,
+    sum_price_paise INTEGER NOT NULL,
+    discounted_items INTEGER NOT NULL,
+    sum_discount_pct REAL NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS platform_price_buckets (
+    platform TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    PRIMARY KEY (platform, bucket)
+) WITHOUT ROWID;
+"""
+
+ROLLUP_TABLES = (
+    "menu_items", "restaurant_stats", "restaurant_price_buckets",
+    "city_stats", "city_price_buckets", "platform_stats", "platform_price_buckets",
+    "dish_stats", "dish_price_buckets",
+)
+COUNTERS = ("restaurants", "items", "priced_items", "sum_price_paise", "discounted_items", "sum_discount_pct")
+QUANTILES = {"p25": 0.25, "median": 0.5, "p75": 0.75, "p90": 0.9}
+
+
+# -------------------- Price Histogram --------------------
+def price_bucket(paise):
+    """Lower bound of a price's histogram bucket: ₹10 wide under ₹1,000, ₹100 under ₹10,000, then ₹1,000."""
+    if paise < 100000:
+        return paise // 1000 * 1000
+    if paise < 1000000:
+        return paise // 10000 * 10000
+    return paise // 100000 * 100000
+
+
+def bucket_width(bucket):
+    return 1000 if bucket < 100000 else 10000 if bucket < 1000000 else 100000
+
+
+def percentiles(buckets):
+    """{"p25", "median", "p75", "p90"} in paise from ``[(bucket, items)]``, interpolated within buckets."""
+    buckets = sorted((bucket, items) for bucket, items in buckets if items > 0)
+    total = sum(items for _, items in buckets)
+    if not total:
+        return {name: None for name in QUANTILES}
+    result = {}
+    for name, quantile in QUANTILES.items():
+        rank = quantile * total
+        seen = 0
+        for bucket, items in buckets:
+            if seen + items >= rank:
+                result[name] = round(bucket + bucket_width(bucket) * (rank - seen) / items)
+                break
+            seen += items
+    return result
+
+
+def exact_percentiles(prices):
+    prices = sorted(prices)
+    if not prices:
+        return {name: None for name in QUANTILES}
+    result = {}
+    for name, quantile in QUANTILES.items():
+        position = quantile * (len(prices) - 1)
+        low = int(position)
+        high = min(low + 1, len(prices) - 1)
+        result[name] = round(prices[low] + (prices[high] - prices[low]) * (position - low))
+    return result
+
+
+# -------------------- Maintenance --------------------
+def menu_rollup(rows):
+    """Counters and price buckets of one menu: ``rows`` are (item_id, variant, name, mrp, price, discount)."""
+    stats = dict.fromkeys(COUNTERS, 0)
+    stats["restaurants"] = 1 if rows else 0
+    stats["items"] = len(rows)
+    buckets = {}
+    prices, discounts = [], []
+    for _, _, _, _, price, discount in rows:
+        if price is None:
+            continue
+        prices.append(price)
+        buckets[price_bucket(price)] = buckets.get(price_bucket(price), 0) + 1
+        if discount is not None:
+            discounts.append(discount)
+    stats["priced_items"] = len(prices)
+    stats["sum_price_paise"] = sum(prices)
+    stats["discounted_items"] = sum(1 for discount in discounts if discount > 0)
+    stats["sum_discount_pct"] = round(sum(discounts), 4)
+    stats["min_price_paise"] = min(prices, default=None)
+    stats["max_price_paise"] = max(prices, default=None)
+    stats["avg_discount_pct"] = round(sum(discounts) / len(discounts), 2) if discounts else None
+    stats["max_discount_pct"] = max(discounts, default=None)
+    return stats, buckets
+
+
+def dish_terms(name):
+    """Words of an item name that dish rollups are kept for ("Veg Thali (Large)" -> {"veg", "thali", "large"})."""
+    return {term for term in normalize_name(name).split() if len(term) > 2 and not term.isdigit()}
+
+
+def rollup_deltas(old, new):
+    """Counter and bucket differences between two (stats, buckets) rollups; None if nothing moved."""
+    (old_stats, old_buckets), (stats, buckets) = old, new
+    delta = {name: stats[name] - old_stats[name] for name in COUNTERS}
+    bucket_delta = {
+        bucket: buckets.get(bucket, 0) - old_buckets.get(bucket, 0) for bucket in set(buckets) | set(old_buckets)
+    }
+    if not any(delta.values()) and not any(bucket_delta.values()):
+        return None
+    return delta, bucket_delta
+
+
+def _apply_deltas(conn, table, bucket_table, key_columns, deltas, now):
+    """Add counter deltas to rollup rows and bucket deltas to their histograms.
+
+    ``deltas`` are ``(key values, counter delta, bucket delta)``; rows are
+    created on first use and emptied buckets removed.
+    """
+    keys = ", ".join(key_columns)
+    columns = list(key_columns) + list(COUNTERS)
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}, updated_at) VALUES ({', '.join('?' * (len(columns) + 1))}) "
+        f"ON CONFLICT({keys}) DO UPDATE SET "
+        + ", ".join(f"{name} = {name} + excluded.{name}" for name in COUNTERS)
+        + ", updated_at = excluded.updated_at",
+        [(*key, *(delta[name] for name in COUNTERS), now) for key, delta, _ in deltas],
+    )
+    changes = [(*key, bucket, items) for key, _, buckets in deltas for bucket, items in buckets.items() if items]
+    conn.executemany(
+        f"INSERT INTO {bucket_table} ({keys}, bucket, items) VALUES ({', '.join('?' * (len(key_columns) + 2))}) "
+        f"ON CONFLICT({keys}, bucket) DO UPDATE SET items = items + excluded.items",
+        changes,
+    )
+    conn.executemany(
+        f"DELETE FROM {bucket_table} WHERE {' AND '.join(f'{key} = ?' for key in key_columns)} "
+        "AND bucket = ? AND items <= 0",
+        [change[:-1] for change in changes if change[-1] < 0],
+    )
+
+
+def update_rollups(conn, restaurant_id, platform, city, name, rows, now=None):
+    """Replace one restaurant's current menu and move every rollup by the difference.
+
+    Runs inside the scrape's write transaction, so reads never see the
+    menu and the aggregates out of step. Cost is proportional to the menu,
+    not to the stored history.
+    """
+    now = now or time.time()
+    old_rows = conn.execute(
+        "SELECT item_id, variant, name, mrp_paise, price_paise, discount_pct FROM menu_items WHERE restaurant_id = ?",
+        (restaurant_id,),
+    ).fetchall()
+    old, new = menu_rollup(old_rows), menu_rollup(rows)
+    stats, buckets = new
+
+    conn.execute("DELETE FROM menu_items WHERE restaurant_id = ?", (restaurant_id,))
+    conn.executemany(
+        "INSERT INTO menu_items (item_id, variant, restaurant_id, platform, city, name, mrp_paise, price_paise, "
+        "discount_pct, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(item_id, variant, restaurant_id, platform, city, item_name, mrp, price, discount, now)
+         for item_id, variant, item_name, mrp, price, discount in rows],
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO restaurant_stats (restaurant_id, platform, city, name, items, priced_items, "
+        "sum_price_paise, min_price_paise, max_price_paise, discounted_items, sum_discount_pct, avg_discount_pct, "
+        "max_discount_pct, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (restaurant_id, platform, city, name, stats["items"], stats["priced_items"], stats["sum_price_paise"],
+         stats["min_price_paise"], stats["max_price_paise"], stats["discounted_items"], stats["sum_discount_pct"],
+         stats["avg_discount_pct"], stats["max_discount_pct"], now),
+    )
+    conn.execute("DELETE FROM restaurant_price_buckets WHERE restaurant_id = ?", (restaurant_id,))
+    conn.executemany(
+        "INSERT INTO restaurant_price_buckets (restaurant_id, bucket, items) VALUES (?, ?, ?)",
+        [(restaurant_id, bucket, items) for bucket, items in buckets.items()],
+    )
+
+    moved = rollup_deltas(old, new)
+    if moved:
+        _apply_deltas(conn, "city_stats", "city_price_buckets", ("city", "platform"), [((city, platform), *moved)], now)
+        _apply_deltas(conn, "platform_stats", "platform_price_buckets", ("platform",), [((platform,), *moved)], now)
+
+    old_terms, new_terms = {}, {}
+    for menu, terms in ((old_rows, old_terms), (rows, new_terms)):
+        for row in menu:
+            for term in dish_terms(row[2]):
+                terms.setdefault(term, []).append(row)
+    empty = menu_rollup([])
+    dish_deltas = []
+    for term in set(old_terms) | set(new_terms):
+        moved = rollup_deltas(
+            menu_rollup(old_terms[term]) if term in old_terms else empty,
+            menu_rollup(new_terms[term]) if term in new_terms else empty,
+        )
+        if moved:
+            dish_deltas.append(((term, city, platform), *moved))
+    _apply_deltas(conn, "dish_stats", "dish_price_buckets", ("term", "city", "platform"), dish_deltas, now)
+
+
+def menu_rows(item_ids, variants):
+    """Rollup rows from ``_save``'s variants ({name: [(mrp, discounted, extra, typed)]})."""
+    return [
+        (item_ids[name], variant, name, *typed)
+        for name, rows in variants.items()
+        for variant, (_, _, _, typed) in enumerate(rows)
+    ]
+
+
+def rebuild_rollups(conn):
+    """Recompute every rollup from the stored history; returns the number of restaurants."""
+    for table in ROLLUP_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    restaurants = {
+        row["id"]: row for row in conn.execute("SELECT id, platform, city, name FROM restaurants")
+    }
+    menus = {}
+    for row in conn.execute(
+        """SELECT s.restaurant_id, s.item_id, i.name, p.mrp, p.discounted_price, p.extra,
+                  p.mrp_paise, p.price_paise, p.discount_pct
+           FROM item_state s
+           JOIN items i ON i.id = s.item_id
+           JOIN price_snapshots p ON p.item_id = s.item_id
+           WHERE s.present = 1 AND p.change_type != 'removed'
+             AND p.scrape_id = (SELECT MAX(latest.scrape_id) FROM price_snapshots latest
+                                WHERE latest.item_id = s.item_id)
+           ORDER BY s.restaurant_id, p.rowid"""
+    ):
+        menus.setdefault(row["restaurant_id"], []).append(row)
+
+    for restaurant_id, snapshots in menus.items():
+        # History written before typed prices existed only has the raw strings.
+        raw = [
+            {**(json.loads(row["extra"]) if row["extra"] else {}), "MRP": row["mrp"], "Discounted Price": row["discounted_price"]}
+            for row in snapshots
+        ]
+        normalize_items(raw)
+        rows, variants = [], {}
+        for row, item in zip(snapshots, raw):
+            variant = variants[row["item_id"]] = variants.get(row["item_id"], -1) + 1
+            typed = (row["mrp_paise"], row["price_paise"], row["discount_pct"])
+            if row["price_paise"] is None and row["mrp_paise"] is None:
+                typed = (item["mrp_paise"], item["price_paise"], item["discount_pct"])
+            rows.append((row["item_id"], variant, row["name"], *typed))
+        restaurant = restaurants[restaurant_id]
+        update_rollups(conn, restaurant_id, restaurant["platform"], restaurant["city"], restaurant["name"], rows)
+    return len(menus)
+
+
+# -------------------- Cursors --------------------
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Values of an ``encode_cursor`` token, or None for the first page; ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Malformed cursor")
+    return values
+
+
+def page(rows, limit, cursor_of):
+    return {
+        "results": rows,
+        "next_cursor": encode_cursor(*cursor_of(rows[-1])) if len(rows) == limit else None,
+    }
+
+
+# -------------------- Queries --------------------
+def summarize(row):
+    """Averages from a rollup row's counters."""
+    priced = row["priced_items"]
+    return {
+        "restaurants": row["restaurants"],
+        "items": row["items"],
+        "priced_items": priced,
+        "avg_price_paise": round(row["sum_price_paise"] / priced) if priced else None,
+        "avg_discount_pct": round(row["sum_discount_pct"] / priced, 2) if priced else None,
+        "discounted_share": round(row["discounted_items"] / priced, 4) if priced else None,
+    }
+
+
+class Analytics:
+    """Read side of the rollups; every query is an index range scan or a small rollup read."""
+
+    def __init__(self, connect):
+        self._connect = connect
+
+    def items(self, city=None, platform=None, restaurant=None, q=None, cursor=None, limit=100):
+        """Items currently on menus with their typed prices, ordered by item id."""
+        after = decode_cursor(cursor, 2) or [0, -1]
+        filters, params = ["(m.item_id, m.variant) > (?, ?)"], after
+        for column, value in (("m.city", city), ("m.platform", platform)):
+            if value:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        if restaurant:
+            # Resolved first so the scan runs on the restaurant's own index range.
+            filters.append("m.restaurant_id IN (SELECT id FROM restaurants WHERE name = ?)")
+            params.append(restaurant)
+        if q:
+            filters.append("m.name LIKE ?")
+            params.append(f"%{q}%")
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""SELECT m.item_id, m.variant, m.name, r.name AS restaurant, m.platform, m.city,
+                           m.mrp_paise, m.price_paise, m.discount_pct, m.updated_at
+                    FROM menu_items m JOIN restaurants r ON r.id = m.restaurant_id
+                    WHERE {" AND ".join(filters)}
+                    ORDER BY m.item_id, m.variant
+                    LIMIT ?""",
+                params + [limit],
+            ).fetchall()
+        return page([dict(row) for row in rows], limit, lambda row: (row["item_id"], row["variant"]))
+
+    def item_history(self, item_id, cursor=None, limit=100):
+        """Every recorded price point of one item, oldest first; None if the item is unknown."""
+        after = decode_cursor(cursor, 2) or [float("-inf"), 0]
+        with self._connect() as conn:
+            item = conn.execute(
+                """SELECT i.id AS item_id, i.name, r.name AS restaurant, r.platform, r.city
+                   FROM items i JOIN restaurants r ON r.id = i.restaurant_id WHERE i.id = ?""",
+                (item_id,),
+            ).fetchone()
+            if item is None:
+                return None
+            rows = conn.execute(
+                """SELECT rowid AS point_id, scrape_id, scraped_at, change_type, mrp, discounted_price,
+                          mrp_paise, price_paise, discount_pct
+                   FROM price_snapshots
+                   WHERE item_id = ? AND (scraped_at, rowid) > (?, ?)
+                   ORDER BY scraped_at, rowid
+                   LIMIT ?""",
+                (item_id, *after, limit),
+            ).fetchall()
+        return {**dict(item), **page([dict(row) for row in rows], limit, lambda row: (row["scraped_at"], row["point_id"]))}
+
+    def cities(self, platform=None, q=None, cursor=None, limit=100):
+        """Per city and platform: counts, average and percentile prices, discount depth.
+
+        With ``q`` only matching dishes count. A single word ("thali") is
+        read from the dish rollups and matches whole words of item names;
+        a longer phrase is matched as a substring of the current menus at
+        query time, with exact rather than bucketed percentiles.
+        """
+        after = decode_cursor(cursor, 2) or ["", ""]
+        scope = {}
+        if q:
+            terms = normalize_name(q).split()
+            if len(terms) != 1 or not dish_terms(terms[0]):
+                return self._matching_cities(q, platform, after, limit)
+            scope["term"] = terms[0]
+        table, bucket_table = ("dish_stats", "dish_price_buckets") if scope else ("city_stats", "city_price_buckets")
+        filters, params = [f"{key} = ?" for key in scope] + ["(city, platform) > (?, ?)"], [*scope.values(), *after]
+        if platform:
+            filters.append("platform = ?")
+            params.append(platform)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""SELECT * FROM {table} WHERE {" AND ".join(filters)} AND restaurants > 0
+                    ORDER BY city, platform LIMIT ?""",
+                params + [limit],
+            ).fetchall()
+            results = []
+            for row in rows:
+                buckets = conn.execute(
+                    f"SELECT bucket, items FROM {bucket_table} WHERE "
+                    + " AND ".join(f"{key} = ?" for key in (*scope, "city", "platform")),
+                    (*scope.values(), row["city"], row["platform"]),
+                ).fetchall()
+                results.append({
+                    "city": row["city"], "platform": row["platform"], **summarize(row),
+                    **{f"{name}_price_paise": value for name, value in percentiles(buckets).items()},
+                })
+        return page(results, limit, lambda row: (row["city"], row["platform"]))
+
+    def _matching_cities(self, q, platform, after, limit):
+        query, params = "SELECT city, platform, restaurant_id, price_paise, discount_pct FROM menu_items WHERE name LIKE ?", [f"%{q}%"]
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
+        groups = {}
+        with self._connect() as conn:
+            for row in conn.execute(query, params):
+                key = (row["city"], row["platform"])
+                if list(key) > after:
+                    groups.setdefault(key, []).append(row)
+        results = []
+        for key in sorted(groups)[:limit]:
+            rows = groups[key]
+            prices = [row["price_paise"] for row in rows if row["price_paise"] is not None]
+            discounts = [row["discount_pct"] for row in rows if row["discount_pct"] is not None]
+            results.append({
+                "city": key[0], "platform": key[1], **summarize({
+                    "restaurants": len({row["restaurant_id"] for row in rows}),
+                    "items": len(rows),
+                    "priced_items": len(prices),
+                    "sum_price_paise": sum(prices),
+                    "discounted_items": sum(1 for discount in discounts if discount > 0),
+                    "sum_discount_pct": sum(discounts),
+                }),
+                **{f"{name}_price_paise": value for name, value in exact_percentiles(prices).items()},
+            })
+        return page(results, limit, lambda row: (row["city"], row["platform"]))
+
+    def platforms(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM platform_stats WHERE restaurants > 0 ORDER BY platform").fetchall()
+            results = []
+            for row in rows:
+                buckets = conn.execute(
+                    "SELECT bucket, items FROM platform_price_buckets WHERE platform = ?", (row["platform"],)
+                ).fetchall()
+                results.append({
+                    "platform": row["platform"], **summarize(row),
+                    **{f"{name}_price_paise": value for name, value in percentiles(buckets).items()},
+                })
+        return {"results": results}
+
+    def discount_ranking(self, by="avg", city=None, platform=None, min_items=5, cursor=None, limit=50):
+        """Restaurants by average (or maximum) item discount, deepest first."""
+        column = {"avg": "avg_discount_pct", "max": "max_discount_pct"}[by]
+        before = decode_cursor(cursor, 2)
+        filters, params = [f"{column} IS NOT NULL", "priced_items >= ?"], [min_items]
+        if before:
+            filters.append(f"({column}, restaurant_id) < (?, ?)")
+            params += before
+        for name, value in (("city", city), ("platform", platform)):
+            if value:
+                filters.append(f"{name} = ?")
+                params.append(value)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""SELECT restaurant_id, name AS restaurant, platform, city, items, priced_items,
+                           discounted_items, avg_discount_pct, max_discount_pct,
+                           min_price_paise, max_price_paise, sum_price_paise, updated_at
+                    FROM restaurant_stats WHERE {" AND ".join(filters)}
+                    ORDER BY {column} DESC, restaurant_id DESC LIMIT ?""",
+                params + [limit],
+            ).fetchall()
+        results = []
+        for row in rows:
+            result = dict(row)
+            total = result.pop("sum_price_paise")
+            result["avg_price_paise"] = round(total / row["priced_items"]) if row["priced_items"] else None
+            result["discounted_share"] = round(row["discounted_items"] / row["priced_items"], 4) if row["priced_items"] else None
+            results.append(result)
+        return page(results, limit, lambda row: (row[column], row["restaurant_id"]))
@@ -0,0 +1,371 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import zstandard
+
+from cache import slug
+
+_local = threading.local()
+
+# Snapshot kinds: a browser's page_source, a raw HTTP page or menu-API body from
+# the fast path, and the outerHTML of one opened Swiggy offer modal.
+KINDS = ("page", "http", "api", "offer_modal")
+MANIFEST = "scrapes.ndjson"
+
+
+# -------------------- Capture --------------------
+class Snapshots:
+    """HTML seen during one scrape, in capture order; safe to add to from several threads."""
+
+    def __init__(self):
+        self.pages = []  # (kind, url, text)
+        self._lock = threading.Lock()
+
+    def add(self, kind, text, url=None):
+        with self._lock:
+            self.pages.append((kind, url, text))
+
+    def clear(self):
+        with self._lock:
+            self.pages = []
+
+
+def current():
+    return getattr(_local, "snapshots", None)
+
+
+@contextmanager
+def capturing():
+    """Collect this thread's ``capture`` calls into a new Snapshots while the block runs."""
+    previous, _local.snapshots = current(), Snapshots()
+    try:
+        yield _local.snapshots
+    finally:
+        _local.snapshots = previous
+
+
+def capture(kind, text, url=None, snapshots=None):
+    """Add a snapshot to ``snapshots`` (default: this thread's); a no-op when nothing is capturing."""
+    snapshots = snapshots or current()
+    if snapshots is not None and text:
+        snapshots.add(kind, text, url)
+
+
+def discard():
+    """Drop what this scrape captured so far (it is being retried from scratch)."""
+    snapshots = current()
+    if snapshots is not None:
+        snapshots.clear()
+
+
+# -------------------- Archive --------------------
+def day(timestamp):
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+class HtmlArchive:
+    """Content-addressed, zstd-compressed page snapshots, partitioned by city, platform and date.
+
+        <root>/<city>/<platform>/<YYYY-MM-DD>/<sha256>.html.zst   one per distinct snapshot
+        <root>/<city>/<platform>/<YYYY-MM-DD>/scrapes.ndjson      one line per scrape
+
+    A snapshot already in its partition (an unchanged menu scraped again
+    that day) is stored once. Dates are UTC. Several processes may write
+    to one archive: objects are renamed into place and manifest lines
+    are single appends.
+    """
+
+    def __init__(self, root, level=9):
+        self.root = root
+        self.level = level
+        self._local = threading.local()  # ZstdCompressor objects are not thread-safe
+        self._lock = threading.Lock()
+        self._counters = {"scrapes": 0, "snapshots": 0, "stored": 0, "deduplicated": 0, "raw_bytes": 0, "stored_bytes": 0}
+
+    def _compressor(self):
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return self._local.compressor
+
+    def partition(self, city, platform, scraped_at):
+        return os.path.join(slug(city), platform, day(scraped_at))
+
+    def _put(self, folder, data):
+        """Store ``data`` under its hash in ``folder``; returns (sha256, compressed bytes written or 0)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(folder, f"{digest}.html.zst")
+        if os.path.exists(path):
+            return digest, 0
+        compressed = self._compressor().compress(data)
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp, path)
+        return digest, len(compressed)
+
+    def save(self, snapshots, platform, city, restaurant, url, source, scraped_at=None, scrape_id=None):
+        """Archive one scrape's snapshots; returns ``{"partition", "snapshots", "stored", "bytes"}``."""
+        scraped_at = scraped_at or time.time()
+        partition = self.partition(city, platform, scraped_at)
+        folder = os.path.join(self.root, partition)
+        os.makedirs(folder, exist_ok=True)
+
+        pages, stored, written, raw = [], 0, 0, 0
+        for kind, page_url, text in snapshots.pages:
+            data = text.encode("utf-8")
+            digest, size = self._put(folder, data)
+            pages.append({"kind": kind, "url": page_url, "sha256": digest, "bytes": len(data)})
+            stored += bool(size)
+            written += size
+            raw += len(data)
+
+        entry = {
+            "scraped_at": scraped_at, "platform": platform, "city": city, "restaurant": restaurant,
+            "url": url, "source": source, "scrape_id": scrape_id, "pages": pages,
+        }
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        fd = os.open(os.path.join(folder, MANIFEST), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+        with self._lock:
+            self._counters["scrapes"] += 1
+            self._counters["snapshots"] += len(pages)
+            self._counters["stored"] += stored
+            self._counters["deduplicated"] += len(pages) - stored
+            self._counters["raw_bytes"] += raw
+            self._counters["stored_bytes"] += written
+        return {"partition": partition, "snapshots": len(pages), "stored": stored, "bytes": written}
+
+    def stats(self):
+        with self._lock:
+            return {"root": self.root, "level": self.level, **self._counters}
+
+    # ---------------- Reading ----------------
+    def partitions(self, since=None, until=None, platform=None, city=None):
+        """Partition folders (relative to the root) in date order; ``since``/``until`` are inclusive YYYY-MM-DD."""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for city_dir in sorted(os.listdir(self.root)):
+            if city and city_dir != slug(city):
+                continue
+            for platform_dir in sorted(os.listdir(os.path.join(self.root, city_dir))):
+                if platform and platform_dir != platform:
+                    continue
+                for date in sorted(os.listdir(os.path.join(self.root, city_dir, platform_dir))):
+                    if (since and date < since) or (until and date > until):
+                        continue
+                    found.append((date, os.path.join(city_dir, platform_dir, date)))
+        return [partition for _, partition in sorted(found)]
+
+    def entries(self, partition):
+        path = os.path.join(self.root, partition, MANIFEST)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def read(self, partition, digest):
+        with open(os.path.join(self.root, partition, f"{digest}.html.zst"), "rb") as f:
+            return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+
+    def prune(self, before):
+        """Delete every partition dated before ``before`` (YYYY-MM-DD); returns how many."""
+        removed = 0
+        for partition in self.partitions(until=before):
+            if os.path.basename(partition) < before:
+                shutil.rmtree(os.path.join(self.root, partition))
+                removed += 1
+        return removed
+
+
+# -------------------- Re-extraction --------------------
+def reextract(entry, pages):
+    """Run a scrape's snapshots (``[(kind, text)]``) through the current extractors.
+
+    Returns ``(items, restaurant, city, discounts, coupons)`` like the live
+    scrapers: fast-path bodies go through their platform's fast-path reader,
+    browser snapshots through EXTRACTORS, MyStore pages are merged by
+    product id in capture order, and Swiggy offer modals give the offers.
+    """
+    from extractors import EXTRACTORS, text_of
+    from fast_path import FAST_PATHS, FastPathMiss
+
+    platform = entry["platform"]
+    extractor = EXTRACTORS[platform]
+    menus = [(kind, text) for kind, text in pages if kind != "offer_modal"]
+    discounts, coupons = [], []
+
+    if platform == "mystore":
+        seen, items, restaurant, city = set(), [], None, None
+        for _, text in menus:
+            root = extractor.parse(text)
+            if restaurant is None:
+                restaurant, city = extractor.header(root)
+            for key, item in extractor.iter_keyed_items(root):
+                if key not in seen:
+                    seen.add(key)
+                    items.append(item)
+    elif not menus:
+        items, restaurant, city = [], None, None
+    elif menus[0][0] in ("http", "api"):
+        try:
+            items, restaurant, city, discounts, coupons = FAST_PATHS[platform].read(menus[0][1], api=menus[0][0] == "api")
+        except FastPathMiss:
+            items, restaurant, city = [], None, None
+    else:
+        items, restaurant, city = extractor.extract(menus[0][1])
+
+    selectors = extractor.selectors()
+    for kind, text in pages:
+        if kind != "offer_modal":
+            continue
+        root = extractor.parse(text)
+        for texts, chain in ((discounts, selectors.offer_discounts), (coupons, selectors.offer_coupons)):
+            for node in chain(root):
+                value = text_of(node)
+                if value and value not in texts:
+                    texts.append(value)
+    return items, restaurant or entry["restaurant"], city or entry["city"], discounts, coupons
+
+
+def replay(task):
+    """Process-pool job: re-extract one archived scrape; returns a result record."""
+    from prices import normalize_items, parse_offers
+
+    root, partition, entry = task
+    archive = HtmlArchive(root)
+    record = {key: entry[key] for key in ("scraped_at", "platform", "url", "source", "scrape_id")}
+    record["partition"] = partition
+    try:
+        pages = [(page["kind"], archive.read(partition, page["sha256"])) for page in entry["pages"]]
+        items, restaurant, city, discounts, coupons = reextract(entry, pages)
+    except Exception as e:
+        return {**record, "restaurant": entry["restaurant"], "city": entry["city"], "error": repr(e)}
+    return {
+        **record, "restaurant": restaurant, "city": city, "item_count": len(items),
+        "data": normalize_items(items), "discounts": discounts, "coupons": coupons,
+        "offer_rules": {"discounts": parse_offers(discounts), "coupons": parse_offers(coupons)},
+    }
+
+
+def replay_archive(archive, tasks, workers=None, chunksize=8):
+    """Yield ``replay`` results for ``tasks`` in order, spread over ``workers`` processes."""
+    if workers == 1:
+        yield from map(replay, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(replay, tasks, chunksize=chunksize)
+
+
+# -------------------- CLI --------------------
+def has_scrapes(path):
+    """Whether the SQLite history at ``path`` already holds scrapes (opened read-only)."""
+    if not os.path.exists(path):
+        return False
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT 1 FROM scrapes LIMIT 1").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False  # no scrapes table yet
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw HTML archive tools")
+    parser.add_argument("--root", default=os.getenv("ARCHIVE_DIR") or os.path.join("data", "archive"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--since", help="first day, YYYY-MM-DD (UTC)")
+    filters.add_argument("--until", help="last day, YYYY-MM-DD (UTC)")
+    filters.add_argument("--platform", choices=("swiggy", "zomato", "mystore"))
+    filters.add_argument("--city")
+    reextract_cmd = commands.add_parser(
+        "reextract", parents=[filters], help="replay archived scrapes through the current extractors",
+    )
+    reextract_cmd.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default: every core)")
+    reextract_cmd.add_argument("--out", help="write one NDJSON result per scrape here ('-' for stdout)")
+    reextract_cmd.add_argument("--db", help="save the re-extracted scrapes into this new (or empty) SQLite history database")
+    commands.add_parser("stats", parents=[filters], help="partitions, scrapes and bytes on disk")
+    prune_cmd = commands.add_parser("prune", help="delete partitions dated before a day")
+    prune_cmd.add_argument("before", help="YYYY-MM-DD (UTC)")
+    args = parser.parse_args()
+
+    archive = HtmlArchive(args.root)
+    if args.command == "prune":
+        print(f"Removed {archive.prune(args.before)} partitions from {args.root}")
+        return
+
+    partitions = archive.partitions(args.since, args.until, args.platform, args.city)
+    if args.command == "stats":
+        scrapes = snapshots = raw = stored = 0
+        for partition in partitions:
+            entries = archive.entries(partition)
+            scrapes += len(entries)
+            snapshots += sum(len(entry["pages"]) for entry in entries)
+            raw += sum(page["bytes"] for entry in entries for page in entry["pages"])
+            folder = os.path.join(args.root, partition)
+            stored += sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+        ratio = f"{raw / stored:.1f}x" if stored else "-"
+        print(f"{len(partitions)} partitions, {scrapes} scrapes, {snapshots} snapshots; "
+              f"{raw / 2 ** 20:.1f} MB of HTML in {stored / 2 ** 20:.1f} MB on disk ({ratio})")
+        return
+
+    tasks = sorted(
+        ((args.root, partition, entry) for partition in partitions for entry in archive.entries(partition)),
+        key=lambda task: task[2]["scraped_at"],
+    )
+    storage = None
+    if args.db:
+        # History is diffed against each restaurant's newest scrape, so replaying older
+        # scrapes into a live database would roll its current menus and rollups back.
+        if has_scrapes(args.db):
+            sys.exit(f"{args.db} already holds scrapes; re-extract into a new database instead.")
+        from storage import SQLiteStorage
+        storage = SQLiteStorage(args.db)
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8") if args.out else None
+
+    started, cpu = time.perf_counter(), os.times()
+    done = failed = items = 0
+    try:
+        for result in replay_archive(archive, tasks, args.workers):
+            done += 1
+            if "error" in result:
+                failed += 1
+                print(f"{result['partition']} {result['url']}: {result['error']}", file=sys.stderr)
+            else:
+                items += result["item_count"]
+                if storage:
+                    storage.save_scrape(
+                        result["platform"], result["restaurant"], result["city"], result["data"],
+                        result["discounts"], result["coupons"], scraped_at=result["scraped_at"],
+                    )
+            if out:
+                out.write(json.dumps(result) + "\n")
+    finally:
+        if out and out is not sys.stdout:
+            out.close()
+    finished = os.times()
+    cpu_seconds = sum(finished[:4]) - sum(cpu[:4])  # this process plus the finished pool workers
+    print(f"Re-extracted {done - failed}/{done} scrapes ({items} items) from {len(partitions)} partitions "
+          f"in {time.perf_counter() - started:.1f}s, {cpu_seconds:.1f} CPU-s on {args.workers} workers", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
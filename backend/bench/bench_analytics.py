@@ -0,0 +1,159 @@
+"""Analytics query latency on a history of millions of price points.
+
+    python -m bench.bench_analytics --restaurants 2000 --items 100 --scrapes 12
+
+Run from the backend directory. Fills a fresh SQLite database through
+``SQLiteStorage.save_scrape`` (so the rollups are maintained the way the
+scrapers maintain them), checks the incremental rollups against a full
+rebuild, then times random queries against every analytics read and
+exits non-zero if any p99 exceeds ``--budget-ms``.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from analytics import rebuild_rollups
+from storage import SQLiteStorage
+
+CITIES = [
+    "Bangalore", "Mumbai", "Delhi", "Hyderabad", "Chennai", "Pune", "Kolkata", "Ahmedabad", "Jaipur", "Lucknow",
+    "Kochi", "Indore", "Chandigarh", "Nagpur", "Surat", "Bhopal", "Mysore", "Goa", "Noida", "Gurgaon",
+]
+PLATFORMS = ["swiggy", "zomato", "mystore"]
+DISHES = [
+    "Veg Thali", "Chicken Biryani", "Paneer Butter Masala", "Masala Dosa", "Dal Makhani", "Butter Naan",
+    "Mini Thali", "Hakka Noodles", "Gulab Jamun", "Cold Coffee", "Chole Bhature", "Fish Curry",
+]
+
+
+def menu(rng, items, base):
+    rows = []
+    for i in range(items):
+        mrp = base[i]
+        cut = mrp - rng.randrange(1, mrp // 3) if rng.random() < 0.3 else None
+        rows.append({
+            "name": f"{DISHES[i % len(DISHES)]} {i // len(DISHES)}",
+            "MRP": f"₹{mrp}",
+            "Discounted Price": f"₹{cut}" if cut else "N/A",
+        })
+    return rows
+
+
+def fill(storage, restaurants, items, scrapes, churn, seed=0):
+    """Save ``scrapes`` rounds of every restaurant; returns (price points, seconds spent saving)."""
+    rng = random.Random(seed)
+    outlets = [
+        (PLATFORMS[r % len(PLATFORMS)], f"Outlet {r}", CITIES[r % len(CITIES)],
+         [rng.randrange(49, 1500) for _ in range(items)])
+        for r in range(restaurants)
+    ]
+    seconds = 0.0
+    for round_ in range(scrapes):
+        for platform, name, city, base in outlets:
+            for i in range(items):
+                if round_ and rng.random() < churn:
+                    base[i] = max(20, base[i] + rng.randrange(-40, 60))
+            rows = menu(rng, items, base)
+            started = time.perf_counter()
+            storage.save_scrape(platform, name, city, rows, [], [], scraped_at=1.7e9 + round_ * 86400)
+            seconds += time.perf_counter() - started
+        print(f"round {round_ + 1}/{scrapes} saved", file=sys.stderr)
+    with storage._connect() as conn:
+        points = conn.execute("SELECT COUNT(*) FROM price_snapshots").fetchone()[0]
+    return points, seconds
+
+
+def check_rollups(storage):
+    """Incremental rollups must match a full rebuild."""
+    def snapshot(conn):
+        return {
+            table: sorted(tuple(round(v, 4) if isinstance(v, float) else v for v in row[:-1])
+                          for row in conn.execute(f"SELECT * FROM {table}"))
+            for table in ("city_stats", "platform_stats", "dish_stats")
+        } | {
+            table: sorted(map(tuple, conn.execute(f"SELECT * FROM {table}")))
+            for table in ("city_price_buckets", "platform_price_buckets", "dish_price_buckets")
+        }
+
+    with storage.transaction() as conn:
+        incremental = snapshot(conn)
+        rebuild_rollups(conn)
+        rebuilt = snapshot(conn)
+    assert incremental == rebuilt, "incremental rollups drifted from a full rebuild"
+
+
+def timed(fn, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(0.99 * len(samples)))], samples[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="reuse (or create) this database instead of a temporary one")
+    parser.add_argument("--restaurants", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--scrapes", type=int, default=12)
+    parser.add_argument("--churn", type=float, default=0.8, help="share of items repriced per scrape")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench_analytics_"), "scrapes.db")
+    fresh = not os.path.exists(path)
+    storage = SQLiteStorage(path)
+    if fresh:
+        points, seconds = fill(storage, args.restaurants, args.items, args.scrapes, args.churn)
+        saves = args.restaurants * args.scrapes
+        print(f"{points:,} price points from {saves:,} scrapes; {saves / seconds:,.0f} saves/s including rollups")
+        check_rollups(storage)
+        print("incremental rollups match a full rebuild")
+
+    analytics = storage.analytics
+    rng = random.Random(1)
+    with storage._connect() as conn:
+        max_item = conn.execute("SELECT MAX(id) FROM items").fetchone()[0]
+        outlets = conn.execute("SELECT name FROM restaurants").fetchall()
+
+    def next_page(query, **kwargs):
+        first = query(**kwargs)
+        if first["next_cursor"]:
+            query(cursor=first["next_cursor"], **kwargs)
+
+    cases = {
+        "item history": lambda: next_page(analytics.item_history, item_id=rng.randint(1, max_item), limit=10),
+        "items by city": lambda: analytics.items(city=rng.choice(CITIES), limit=100),
+        "items by city+platform": lambda: analytics.items(city=rng.choice(CITIES), platform=rng.choice(PLATFORMS)),
+        "items by restaurant": lambda: analytics.items(restaurant=rng.choice(outlets)["name"]),
+        "items matching 'thali'": lambda: analytics.items(city=rng.choice(CITIES), q="thali"),
+        "items page 2": lambda: next_page(analytics.items, platform=rng.choice(PLATFORMS), limit=200),
+        "cities": lambda: analytics.cities(),
+        "cities by platform": lambda: analytics.cities(platform=rng.choice(PLATFORMS)),
+        "cities, 'thali' dishes": lambda: analytics.cities(q="thali"),
+        "cities, dish by platform": lambda: analytics.cities(q=rng.choice(DISHES).split()[-1], platform=rng.choice(PLATFORMS)),
+        "platforms": lambda: analytics.platforms(),
+        "discounts by avg": lambda: analytics.discount_ranking(by="avg", limit=50),
+        "discounts by max in city": lambda: analytics.discount_ranking(by="max", city=rng.choice(CITIES)),
+        "discounts page 2": lambda: next_page(analytics.discount_ranking, platform=rng.choice(PLATFORMS)),
+    }
+    print(f"{'query':<28}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    over = []
+    for name, fn in cases.items():
+        p50, p99, worst = timed(fn, args.queries)
+        print(f"{name:<28}{p50:>9.2f}{p99:>9.2f}{worst:>9.2f}")
+        if p99 > args.budget_ms:
+            over.append(name)
+    if over:
+        print(f"p99 over {args.budget_ms:g} ms: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
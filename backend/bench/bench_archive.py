@@ -0,0 +1,146 @@
+"""HTML archive size and re-extraction throughput on a synthetic month of scrapes.
+
+    python -m bench.bench_archive --outlets 60 --days 30 --scrapes-per-day 4
+
+Run from the backend directory; no browser needed. Archives fixture pages
+the way workers do (a Swiggy page plus its offer modals, a Zomato page, a
+paginated MyStore catalog), with a share of menus repriced each day so
+unchanged re-scrapes deduplicate. Reports bytes on disk against raw HTML,
+then replays the whole archive through the current extractors on one
+process and on ``--workers`` processes. Finally checks that
+``python -m archive reextract --db`` refuses a database that already holds
+scrapes and leaves its contents unchanged, and fills a fresh one.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from archive import HtmlArchive, Snapshots, replay_archive
+from bench.fixtures import mystore_paginated, swiggy_menu, zomato_menu
+from storage import SQLiteStorage
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CITIES = ["Kanpur", "Lucknow", "Allahabad", "Agra", "Varanasi"]
+MODAL = (
+    "<div class='sc-modal igolxO'><div class='sc-title xtIpQ'>{percent}% OFF UPTO ₹{cap}</div>"
+    "<div class='sc-code hHZVJN'>USE CODE{index}</div></div>"
+)
+
+
+def snapshots(platform, outlet, city, seed, items):
+    captured = Snapshots()
+    name = f"Outlet {outlet}"
+    if platform == "swiggy":
+        captured.add("page", swiggy_menu(items, restaurant=name, city=city, seed=seed))
+        for i in range(3):
+            captured.add("offer_modal", MODAL.format(percent=10 + 10 * i, cap=50 + seed % 100, index=i))
+    elif platform == "zomato":
+        captured.add("page", zomato_menu(items, restaurant=name, city=city, seed=seed))
+    else:
+        pages = mystore_paginated("/catalog", items, seller=name, seed=seed)
+        for path, html in sorted(pages.items(), key=lambda page: len(page[0])):
+            captured.add("page", html, path)
+    return captured
+
+
+def fill(archive, outlets, days, per_day, items, churn, seed=0):
+    rng = random.Random(seed)
+    seeds = list(range(outlets))
+    start = time.time() - days * 86400
+    raw = written = scrapes = 0
+    for day in range(days):
+        for outlet in range(outlets):
+            if day and rng.random() < churn:
+                seeds[outlet] += outlets  # repriced: a different menu from today on
+        for round_ in range(per_day):
+            for outlet in range(outlets):
+                platform = ("swiggy", "zomato", "mystore")[outlet % 3]
+                city = CITIES[outlet % len(CITIES)]
+                captured = snapshots(platform, outlet, city, seeds[outlet], items)
+                raw += sum(len(text.encode("utf-8")) for _, _, text in captured.pages)
+                saved = archive.save(
+                    captured, platform, city, f"Outlet {outlet}", f"https://{platform}.example/{outlet}", "browser",
+                    scraped_at=start + day * 86400 + round_ * 3600,
+                )
+                written += saved["bytes"]
+                scrapes += 1
+    return scrapes, raw, written
+
+
+def dump(path):
+    conn = sqlite3.connect(path)
+    try:
+        return list(conn.iterdump())
+    finally:
+        conn.close()
+
+
+def check_replay_db(archive, city):
+    """Replaying into a live history must be refused without touching it; a fresh one is filled."""
+    scratch = tempfile.mkdtemp(prefix="bench_archive_db_")
+    live = os.path.join(scratch, "live.db")
+    SQLiteStorage(live).save_scrape("zomato", "Live Kitchen", city, [{"name": "Dal", "MRP": "₹120"}], [], [])
+    before = dump(live)
+
+    def reextract(db):
+        command = [sys.executable, "-m", "archive", "--root", archive.root, "reextract", "--city", city, "--db", db]
+        return subprocess.run(command, cwd=BACKEND, capture_output=True, text=True)
+
+    refused = reextract(live)
+    if refused.returncode == 0 or dump(live) != before:
+        raise SystemExit(f"re-extracting into a live database changed it:\n{refused.stderr}")
+    fresh = os.path.join(scratch, "fresh.db")
+    filled = reextract(fresh)
+    if filled.returncode != 0:
+        raise SystemExit(f"re-extracting into a fresh database failed:\n{filled.stderr}")
+    conn = sqlite3.connect(fresh)
+    scrapes = conn.execute("SELECT COUNT(*) FROM scrapes").fetchone()[0]
+    conn.close()
+    print(f"--db: live database refused and unchanged; {scrapes:,} {city} scrapes replayed into a fresh one")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--outlets", type=int, default=60)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--scrapes-per-day", type=int, default=4)
+    parser.add_argument("--items", type=int, default=120, help="menu items per page")
+    parser.add_argument("--churn", type=float, default=0.3, help="share of outlets repriced each day")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    archive = HtmlArchive(tempfile.mkdtemp(prefix="bench_archive_"))
+    started = time.perf_counter()
+    scrapes, raw, written = fill(archive, args.outlets, args.days, args.scrapes_per_day, args.items, args.churn)
+    print(f"archived {scrapes:,} scrapes in {time.perf_counter() - started:.1f}s: "
+          f"{raw / 2 ** 20:,.1f} MB of HTML in {written / 2 ** 20:,.1f} MB ({raw / max(written, 1):.0f}x)")
+
+    tasks = [
+        (archive.root, partition, entry)
+        for partition in archive.partitions() for entry in archive.entries(partition)
+    ]
+    for workers in sorted({1, args.workers}):
+        before, cpu = time.perf_counter(), os.times()
+        items = failed = 0
+        for result in replay_archive(archive, tasks, workers):
+            if "error" in result:
+                failed += 1
+            else:
+                items += result["item_count"]
+        after = os.times()
+        wall = time.perf_counter() - before
+        print(f"re-extract on {workers:>2} workers: {len(tasks):,} scrapes, {items:,} items in {wall:.1f}s "
+              f"({len(tasks) / wall:,.0f} scrapes/s, {sum(after[:4]) - sum(cpu[:4]):.1f} CPU-s), {failed} failed")
+        if failed:
+            raise SystemExit(f"{failed} archived scrapes failed to re-extract")
+    check_replay_db(archive, CITIES[0])
+
+
+if __name__ == "__main__":
+    main()
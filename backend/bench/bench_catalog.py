@@ -0,0 +1,48 @@
+"""MyStore catalog crawl over HTTP: pages fetched, crawl time and completeness.
+
+    python -m bench.bench_catalog --latency 0.05 --parallel 1 4 8
+
+Run from the backend directory; no browser needed. Paginated catalogs are
+served by a local stub server that adds ``--latency`` per request and whose
+pager, like the live one, links only two pages ahead. Every crawl must
+return each product exactly once.
+"""
+import argparse
+import time
+
+from bench.fixtures import mystore_paginated
+from bench.server import FixtureServer
+from fast_path import FAST_PATHS, FastPathClient
+
+SIZES = {"one page": 20, "medium": 300, "large": 3000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--per-page", type=int, default=24)
+    parser.add_argument("--parallel", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    routes = {}
+    for size, count in SIZES.items():
+        routes.update(mystore_paginated(f"/mystore/{count}", count, args.per_page))
+    crawler = FAST_PATHS["mystore"].crawler
+    client = FastPathClient(max_connections=max(args.parallel))
+    with FixtureServer(routes, delay=args.latency) as server:
+        print(f"{'catalog':<9} {'products':>8} {'parallel':>8} {'pages':>6} {'crawl s':>8} {'duplicates':>10}")
+        for size, count in SIZES.items():
+            for parallel in args.parallel:
+                crawler.parallel = parallel
+                details = {}
+                started = time.perf_counter()
+                items = client.extract("mystore", server.url(f"/mystore/{count}"), details)[0]
+                elapsed = time.perf_counter() - started
+                if len(items) != count or len({item["name"] for item in items}) != count:
+                    raise SystemExit(f"{size}: got {len(items)} products, expected {count} unique")
+                print(f"{size:<9} {count:>8} {parallel:>8} {details['pages']:>6} {elapsed:>8.2f} {details['duplicates']:>10}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
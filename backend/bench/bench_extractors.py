@@ -0,0 +1,129 @@
+"""Per-menu cost of snapshot parsing vs. per-element WebDriver round-trips.
+
+    python -m bench.bench_extractors              # parser timings only
+    python -m bench.bench_extractors --selenium   # also drive headless Chrome
+
+Run from the backend directory. The --selenium mode loads each fixture from a
+file:// URL and times the legacy find_element loop against page_source+extract.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from bench.fixtures import PAGES, SIZES
+from extractors import EXTRACTORS
+
+# WebDriver commands the old per-element loops issued for each card
+# (find_element + .text per field, including the fallback lookups).
+LEGACY_RPCS_PER_CARD = {"swiggy": 6, "zomato": 4}
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+# -------------------- Legacy Selenium loops --------------------
+def legacy_swiggy(driver):
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+
+    items = []
+    for product in driver.find_elements(By.XPATH, "//div[contains(@class, 'QMaYM')]"):
+        try:
+            name = product.find_element(By.XPATH, ".//div[@aria-hidden='true' and contains(@class, 'dwSeRx')]").text.strip()
+        except NoSuchElementException:
+            name = "N/A"
+        mrp = "N/A"
+        discounted_price = "N/A"
+        try:
+            mrp = product.find_element(By.XPATH, ".//div[contains(@class, 'hTspMV')]").text.strip()
+        except NoSuchElementException:
+            try:
+                mrp = product.find_element(By.XPATH, ".//div[contains(@class, 'chixpw')]").text.strip()
+            except NoSuchElementException:
+                pass
+        try:
+            discounted_element = product.find_element(By.XPATH, ".//div[contains(@class, 'chixpw')]")
+            if mrp != discounted_element.text.strip():
+                discounted_price = discounted_element.text.strip()
+        except NoSuchElementException:
+            pass
+        items.append({"name": name, "MRP": mrp, "Discounted Price": discounted_price})
+    return items
+
+
+def legacy_zomato(driver):
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+
+    items = []
+    for el in driver.find_elements(By.XPATH, "//div[@class= 'sc-nUItV gZWJDT']"):
+        try:
+            price = el.find_element(By.XPATH, ".//span[@class= 'sc-17hyc2s-1 cCiQWA']").text.strip()
+            name = el.find_element(By.XPATH, ".//h4[@class = 'sc-cGCqpu chKhYc']").text.strip()
+            items.append({"name": name, "MRP": price})
+        except NoSuchElementException:
+            continue
+    return items
+
+
+LEGACY = {"swiggy": legacy_swiggy, "zomato": legacy_zomato}
+
+
+def headless_chrome():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.binary_location = os.getenv("CHROME_BIN", "/usr/bin/chromium")
+    service = Service(os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
+    return webdriver.Chrome(service=service, options=options)
+
+
+# -------------------- Runner --------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--selenium", action="store_true", help="also time the legacy loop in headless Chrome")
+    args = parser.parse_args()
+
+    driver = headless_chrome() if args.selenium else None
+    tmpdir = tempfile.mkdtemp(prefix="bench_extractors_")
+    try:
+        print(f"{'platform':<9} {'size':<7} {'items':>6} {'parse ms':>9} {'rpc before':>11} {'rpc after':>10}"
+              + (f" {'legacy ms':>10} {'snapshot ms':>12} {'speedup':>8}" if driver else ""))
+        for platform, render in PAGES.items():
+            for size, count in SIZES.items():
+                html = render(count)
+                parse_time, (items, _, _) = timed(lambda: EXTRACTORS[platform].extract(html), args.repeat)
+                rpc_before = 1 + LEGACY_RPCS_PER_CARD.get(platform, 0) * count if platform in LEGACY else 1
+                line = f"{platform:<9} {size:<7} {len(items):>6} {parse_time * 1000:>9.2f} {rpc_before:>11} {1:>10}"
+
+                if driver and platform in LEGACY:
+                    path = os.path.join(tmpdir, f"{platform}_{size}.html")
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(html)
+                    driver.get(f"file://{path}")
+                    legacy_time, legacy_items = timed(lambda: LEGACY[platform](driver), 1)
+                    snapshot_time, _ = timed(lambda: EXTRACTORS[platform].extract(driver.page_source), args.repeat)
+                    assert len(legacy_items) == len(items), "legacy and snapshot extraction disagree"
+                    line += f" {legacy_time * 1000:>10.1f} {snapshot_time * 1000:>12.1f} {legacy_time / snapshot_time:>7.1f}x"
+                print(line)
+    finally:
+        if driver:
+            driver.quit()
+
+
+if __name__ == "__main__":
+    main()
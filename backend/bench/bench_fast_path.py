@@ -0,0 +1,59 @@
+"""Fast-path extraction against a local stub server, no browser or network.
+
+    python -m bench.bench_fast_path
+
+Run from the backend directory. Prints hit/miss per recorded page and the
+resulting hit rate reported by FastPathClient.
+"""
+import argparse
+import statistics
+import time
+
+from bench.fixtures import SIZES, mystore_catalog, page, swiggy_menu, swiggy_state_page, zomato_menu, zomato_state_page
+from bench.server import FixtureServer
+from fast_path import FastPathClient
+
+# path -> (platform, page, expected item count; 0 means the browser is required)
+CASES = {
+    f"/swiggy/state/{size}": ("swiggy", swiggy_state_page(count), count) for size, count in SIZES.items()
+}
+CASES.update({
+    f"/zomato/state/{size}": ("zomato", zomato_state_page(count), count) for size, count in SIZES.items()
+})
+CASES.update({
+    "/zomato/ssr/medium": ("zomato", zomato_menu(SIZES["medium"]), SIZES["medium"]),
+    "/mystore/ssr/medium": ("mystore", mystore_catalog(SIZES["medium"]), SIZES["medium"]),
+    "/swiggy/ssr/medium": ("swiggy", swiggy_menu(SIZES["medium"]), 0),  # offers need the browser
+    "/swiggy/shell": ("swiggy", page("<div id='root'></div>"), 0),
+})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client = FastPathClient()
+    failures = 0
+    with FixtureServer({path: html for path, (_, html, _) in CASES.items()}) as server:
+        print(f"{'page':<22} {'result':<7} {'items':>6} {'expected':>9} {'median ms':>10}")
+        for path, (platform, _, expected) in CASES.items():
+            samples, result = [], None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = client.extract(platform, server.url(path))
+                samples.append(time.perf_counter() - start)
+            items = len(result[0]) if result else 0
+            failures += items != expected
+            print(f"{path:<22} {'hit' if result else 'miss':<7} {items:>6} {expected:>9} {statistics.median(samples) * 1000:>10.2f}")
+    client.close()
+
+    print()
+    for platform, counters in client.stats().items():
+        print(f"{platform:<8} hit rate {counters['hit_rate']:.0%} ({counters['hits']}/{counters['attempts']})")
+    if failures:
+        raise SystemExit(f"{failures} pages extracted the wrong number of items")
+
+
+if __name__ == "__main__":
+    main()
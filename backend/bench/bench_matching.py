@@ -0,0 +1,105 @@
+"""Cross-platform item matching on large synthetic menus.
+
+    python -m bench.bench_matching --items 10000
+
+Run from the backend directory. The "zomato" menu is the "swiggy" menu with
+realistic noise (& vs and, typos, dropped words, case), minus a few items
+and plus a few unrelated ones. Prints matching time, precision/recall, and a
+brute-force O(n*m) estimate extrapolated from a sample.
+"""
+import argparse
+import random
+import time
+
+from matching import match_names, normalize_name, similarity
+
+ADJECTIVES = ["Classic", "Spicy", "Smoked", "Homestyle", "Tandoori", "Punjabi", "Special", "Masala", "Royal", "Desi"]
+DISHES = [
+    "Rajma", "Chole", "Paneer Butter Masala", "Dal Makhani", "Veg Biryani", "Chicken Biryani",
+    "Kadai Paneer", "Aloo Gobi", "Butter Chicken", "Mix Veg", "Shahi Paneer", "Egg Curry",
+]
+SIDES = ["Rumali Roti", "Jeera Rice", "Tawa Paratha", "Steamed Rice", "Butter Naan", "Laccha Paratha"]
+FORMATS = ["Lunchbox", "Thali", "Combo", "Bowl", "Meal"]
+PORTIONS = ["", "(Half)", "(Full)", "(Serves 2)"]
+
+
+def menu(count, seed=0):
+    names = [
+        " ".join(part for part in (adjective, dish, "&", side, fmt, portion) if part)
+        for adjective in ADJECTIVES for dish in DISHES for side in SIDES for fmt in FORMATS for portion in PORTIONS
+    ]
+    if count > len(names):
+        raise ValueError(f"At most {len(names)} distinct synthetic names")
+    random.Random(seed).shuffle(names)
+    return names[:count]
+
+
+def typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def perturb(name, rng):
+    words = name.replace("&", "and" if rng.random() < 0.5 else "&").split()
+    roll = rng.random()
+    if roll < 0.3:
+        i = rng.randrange(len(words))
+        words[i] = typo(words[i], rng)
+    elif roll < 0.5 and len(words) > 4:
+        words.pop(0)  # platforms often drop the adjective
+    if rng.random() < 0.2:
+        words = [word.lower() for word in words]
+    return " ".join(words)
+
+
+def build(count, seed=0, removed=0.05, extra=0.05):
+    rng = random.Random(seed)
+    left = menu(count, seed)
+    right, truth = [], set()
+    for i, name in enumerate(left):
+        if rng.random() < removed:
+            continue
+        truth.add((i, len(right)))
+        right.append(perturb(name, rng))
+    right += [f"Chef's Surprise Platter {k}" for k in range(int(count * extra))]
+    order = list(range(len(right)))
+    rng.shuffle(order)
+    position = {old: new for new, old in enumerate(order)}
+    return left, [right[old] for old in order], {(i, position[j]) for i, j in truth}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--brute-sample", type=int, default=10)
+    args = parser.parse_args()
+
+    left, right, truth = build(args.items)
+    start = time.perf_counter()
+    matches = match_names(left, right, args.threshold)
+    elapsed = time.perf_counter() - start
+
+    found = {(i, j) for i, j, _ in matches}
+    correct = len(found & truth)
+    print(f"menus: {len(left)} x {len(right)} items, {len(truth)} true pairs")
+    print(f"indexed match: {elapsed:.2f}s, {len(matches)} pairs")
+    print(f"precision: {correct / max(len(found), 1):.4f}  recall: {correct / max(len(truth), 1):.4f}")
+
+    sample = left[:args.brute_sample]
+    normalized = [(name, set(name.split())) for name in map(normalize_name, right)]
+    start = time.perf_counter()
+    for name in sample:
+        query = normalize_name(name)
+        query_tokens = set(query.split())
+        for other, other_tokens in normalized:
+            similarity(query, other, query_tokens, other_tokens)
+    per_item = (time.perf_counter() - start) / len(sample)
+    print(f"brute force (est. from {len(sample)} items): {per_item * len(left):.1f}s, "
+          f"{per_item * len(left) / elapsed:.0f}x slower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Price normalization throughput on millions of synthetic rows.
+
+    python -m bench.bench_prices --rows 2000000
+
+Run from the backend directory. Rows mix the shapes the scrapers produce
+(Swiggy "259"/"N/A", Zomato "₹219", MyStore "₹1,299.50" with "% off" text).
+Compares a per-row ``parse_amount`` loop with the column-wise
+``normalize_items`` and checks they agree, then times offer parsing and
+checks that offers worded like the scraped data are structured.
+"""
+import argparse
+import random
+import time
+
+from prices import PERCENT, discount_percent, normalize_items, parse_amount, parse_offers
+
+OFFERS = [
+    "60% Off Upto ₹110", "Flat ₹125 Off", "Flat ₹150 Off On Orders Above ₹499", "Items At ₹99",
+    "20% OFF UPTO ₹100 | USE AXIS20", "Free Delivery", "Buy 1 Get 1 Free", "USE TRYNEW | ABOVE ₹249",
+    "Flat 10% discount up to ₹150 using select HSBC Credit Cards on orders above ₹499",
+    "Get 10% discount using select HSBC Credit Cards",
+    "Pay using YES Bank Credit Cards & get an additional ₹75 discount on transactions above ₹499",
+    "5% cashback on Amazon Pay",
+]
+# Wordings from the scraped data in data/ (plus cashback) -> (type, percent, amount_paise, max_discount_paise, min_order_paise)
+EXPECTED_OFFERS = {
+    "Flat 10% discount up to ₹150 using select HSBC Credit Cards on orders above ₹499": ("percent", 10.0, None, 15000, 49900),
+    "Get 10% discount using select HSBC Credit Cards": ("percent", 10.0, None, None, None),
+    "Pay using YES Bank Credit Cards & get an additional ₹75 discount on transactions above ₹499": ("flat", None, 7500, None, 49900),
+    "5% cashback on Amazon Pay": ("percent", 5.0, None, None, None),
+}
+
+
+def rows(count, seed=0):
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        mrp = rng.randrange(49, 2500)
+        shape = i % 3
+        if shape == 0:  # Swiggy
+            final = mrp - rng.randrange(0, 60) if rng.random() < 0.3 else mrp
+            items.append({"name": f"Dish {i}", "MRP": str(mrp), "Discounted Price": str(final) if final != mrp else "N/A"})
+        elif shape == 1:  # Zomato
+            items.append({"name": f"Dish {i}", "MRP": f"₹{mrp}"})
+        else:  # MyStore
+            new = mrp * rng.randrange(60, 100) / 100
+            items.append({
+                "name": f"Product {i}",
+                "MRP": f"₹{mrp:,}",
+                "Discounted Price": f"₹{new:,.2f}",
+                "discount": f"{round(100 - 100 * new / mrp)}% off",
+                "seller": "Fresh Mart",
+            })
+    return items
+
+
+def per_row(items):
+    """The pre-normalization approach: every consumer parses each row on its own."""
+    out = []
+    for item in items:
+        mrp = parse_amount(item.get("MRP"))
+        cut = parse_amount(item.get("Discounted Price"))
+        price = cut if cut is not None else mrp
+        match = PERCENT.search(item.get("discount") or "")
+        stated = float(match.group(1)) if match else None
+        out.append((mrp, price, discount_percent(mrp, price, stated)))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--offers", type=int, default=200_000)
+    args = parser.parse_args()
+
+    items = rows(args.rows)
+    started = time.perf_counter()
+    expected = per_row(items)
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    normalize_items(items)
+    column_seconds = time.perf_counter() - started
+
+    actual = [(item["mrp_paise"], item["price_paise"], item["discount_pct"]) for item in items]
+    assert actual == expected, "column-wise and per-row normalization disagree"
+
+    texts = [OFFERS[i % len(OFFERS)] for i in range(args.offers)]
+    started = time.perf_counter()
+    parse_offers(texts)
+    offer_seconds = time.perf_counter() - started
+    for rule in parse_offers(EXPECTED_OFFERS):
+        got = tuple(rule[key] for key in ("type", "percent", "amount_paise", "max_discount_paise", "min_order_paise"))
+        if got != EXPECTED_OFFERS[rule["text"]]:
+            raise SystemExit(f"parse_offer({rule['text']!r}) gave {got}, expected {EXPECTED_OFFERS[rule['text']]}")
+
+    print(f"{'stage':<22}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+    for stage, count, seconds in (
+        ("per-row parse", args.rows, loop_seconds),
+        ("normalize_items", args.rows, column_seconds),
+        ("parse_offers", args.offers, offer_seconds),
+    ):
+        print(f"{stage:<22}{count:>10}{seconds:>10.2f}{count / seconds:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Headless end-to-end scraper benchmark against recorded fixture pages.
+
+    python -m bench.bench_scrapers                    # compare against bench/baseline.json
+    python -m bench.bench_scrapers --update-baseline  # record a new baseline
+    python -m bench.bench_scrapers --only swiggy --threshold 0.5
+
+Run from the backend directory; needs Chrome (CHROME_BIN/CHROMEDRIVER_PATH).
+Every case calls scrape_swiggy/scrape_zomato/scrape_mystore from scrapers.py
+(Swiggy cases include the offer extractor) against a local stub server, with
+storage and metrics redirected to a temp dir. Reports wall time, WebDriver
+RPCs, CPU (this process plus the browser tree) and peak browser RSS, and
+exits non-zero when any of them regresses by more than --threshold, when
+the item or offer counts differ from the baseline, or when the baseline
+has no entry for a case or metric (record it with --update-baseline).
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+SCRATCH = tempfile.mkdtemp(prefix="bench_scrapers_")
+os.environ.update({
+    "STORAGE_DB_PATH": os.path.join(SCRATCH, "scrapes.db"),
+    "JOBS_DB_PATH": os.path.join(SCRATCH, "jobs.db"),
+    "PROMETHEUS_MULTIPROC_DIR": os.path.join(SCRATCH, "metrics"),
+})
+# MyStore cases end with one idle lazy-load scroll round; keep it short.
+os.environ.setdefault("TIMEOUT_MYSTORE_SCROLL_QUIET", "0.2")
+
+from bench.fixtures import PAGES, SIZES, swiggy_menu  # noqa: E402
+from bench.server import FixtureServer  # noqa: E402
+from browser_profile import chromium_rss, process_tree_cpu  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+OFFER_CARDS = 15
+METRICS = ("wall", "rpcs", "cpu", "peak_rss_mb")
+COUNTS = ("items", "offers")
+
+CASES = {
+    f"{platform}/{size}": (platform, render(count), count, 0)
+    for platform, render in PAGES.items()
+    for size, count in SIZES.items()
+}
+CASES["swiggy/offers"] = ("swiggy", swiggy_menu(SIZES["medium"], offers=OFFER_CARDS), SIZES["medium"], OFFER_CARDS)
+
+
+# -------------------- Probes --------------------
+class Probe:
+    """Counts WebDriver commands and samples browser RSS for drivers made by ``wrap``."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.rpcs = 0
+        self.drivers = []
+        self.peak_rss = 0
+        self._sampling = None
+
+    def wrap(self, factory):
+        def create():
+            driver = factory()
+            execute = driver.execute
+
+            def counted(command, params=None):
+                self.rpcs += 1
+                return execute(command, params)
+
+            driver.execute = counted
+            self.drivers.append(driver)
+            return driver
+        return create
+
+    def browser_cpu(self):
+        return sum(process_tree_cpu(driver.service.process.pid) for driver in self.drivers)
+
+    def _sample(self, stop):
+        while not stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, sum(chromium_rss(driver) or 0 for driver in self.drivers))
+
+    def start(self):
+        self.rpcs, self.peak_rss = 0, 0
+        stop = threading.Event()
+        thread = threading.Thread(target=self._sample, args=(stop,), daemon=True)
+        thread.start()
+        self._sampling = (stop, thread)
+
+    def stop(self):
+        stop, thread = self._sampling
+        stop.set()
+        thread.join()
+
+
+# -------------------- Runner --------------------
+def run_case(scrapers, probe, url, platform, expected_items, expected_offers, repeat):
+    scraper = {"swiggy": scrapers.scrape_swiggy, "zomato": scrapers.scrape_zomato, "mystore": scrapers.scrape_mystore}[platform]
+    walls, cpus, rpcs, peaks = [], [], [], []
+    for _ in range(repeat):
+        cpu_before = time.process_time() + probe.browser_cpu()
+        probe.start()
+        start = time.perf_counter()
+        try:
+            items, _, _, discounts, _ = scraper(url)
+        finally:
+            walls.append(time.perf_counter() - start)
+            probe.stop()
+        cpus.append(time.process_time() + probe.browser_cpu() - cpu_before)
+        rpcs.append(probe.rpcs)
+        peaks.append(probe.peak_rss)
+        if len(items) != expected_items or len(discounts) != expected_offers:
+            raise SystemExit(
+                f"{url}: got {len(items)} items / {len(discounts)} offers, expected {expected_items} / {expected_offers}"
+            )
+    return {
+        "items": expected_items,
+        "offers": expected_offers,
+        "wall": round(statistics.median(walls), 4),
+        "rpcs": max(rpcs),
+        "cpu": round(statistics.median(cpus), 4),
+        "peak_rss_mb": round(max(peaks) / 2 ** 20, 1),
+    }
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for case, metrics in results.items():
+        recorded = baseline.get(case)
+        if recorded is None:
+            found.append(f"{case}: not in the baseline")
+            continue
+        for count in COUNTS:
+            if recorded.get(count) != metrics[count]:
+                found.append(f"{case} {count}: {recorded.get(count)} -> {metrics[count]}")
+        for metric in METRICS:
+            before = recorded.get(metric)
+            if before is None:
+                found.append(f"{case} {metric}: not in the baseline")
+            elif before and metrics[metric] > before * (1 + threshold):
+                found.append(f"{case} {metric}: {before} -> {metrics[metric]} (+{metrics[metric] / before - 1:.0%})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown per metric")
+    parser.add_argument("--only", help="run cases whose name starts with this prefix")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        raise SystemExit(f"No baseline at {args.baseline}; record one with --update-baseline.")
+
+    import scrapers as app  # after the environment above is in place
+
+    probe = Probe()
+    app.driver_pool.factory = probe.wrap(app.driver_pool.factory)
+    cases = {name: case for name, case in CASES.items() if not args.only or name.startswith(args.only)}
+    results = {}
+    with FixtureServer({f"/{name}": html for name, (_, html, _, _) in cases.items()}) as server:
+        app.driver_pool.warm(1)  # browser start-up is not part of any case
+        try:
+            print(f"{'case':<16} {'wall s':>8} {'rpcs':>6} {'cpu s':>7} {'peak MB':>8}")
+            for name, (platform, _, items, offers) in cases.items():
+                results[name] = run_case(app, probe, server.url(f"/{name}"), platform, items, offers, args.repeat)
+                r = results[name]
+                print(f"{name:<16} {r['wall']:>8.3f} {r['rpcs']:>6} {r['cpu']:>7.3f} {r['peak_rss_mb']:>8.1f}")
+        finally:
+            app.driver_pool.close()
+
+    if args.update_baseline:
+        baseline.update(results)  # --only keeps the other cases' entries
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    found = regressions(results, baseline, args.threshold)
+    if found:
+        raise SystemExit("Regressions beyond {:.0%} or baseline mismatches:\n  ".format(args.threshold) + "\n  ".join(found))
+    print(f"\nNo regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Cold-start benchmark: import time, time to live/ready, time to the first successful scrape.
+
+    python -m bench.bench_startup                    # compare against bench/startup_baseline.json
+    python -m bench.bench_startup --update-baseline  # record a new baseline
+    python -m bench.bench_startup --skip-browser     # no Chrome here: fast-path case only
+
+Run from the backend directory. ``import main`` is timed in fresh
+interpreters, and fails the run if it pulls in the browser stack
+(Selenium, lxml, httpx), which only scrape workers should load. Each case
+then starts the API under uvicorn in a fresh process, polls
+/health/live and /health/ready, and times one scrape of a local fixture
+page from process launch until its job is done: "fast_path" needs no
+browser, "browser" (FAST_PATH_ENABLED=false) includes launching Chromium
+in the worker. Exits non-zero when any timing regresses by more than
+--threshold, or when the baseline has no entry for a timing that was run
+(record it with --update-baseline).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench.fixtures import zomato_menu, zomato_state_page
+from bench.server import FixtureServer, free_port
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(__file__), "startup_baseline.json")
+HEAVY_MODULES = ("selenium", "lxml.etree", "httpx")
+METRICS = ("import", "live", "ready", "first_scrape")
+ITEMS = 300
+
+IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+print(json.dumps({"seconds": time.perf_counter() - started, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def scratch_env(**overrides):
+    scratch = tempfile.mkdtemp(prefix="bench_startup_")
+    env = dict(os.environ)
+    env.update({
+        "STORAGE_DB_PATH": os.path.join(scratch, "scrapes.db"),
+        "JOBS_DB_PATH": os.path.join(scratch, "jobs.db"),
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(scratch, "metrics"),
+        "STREAM_DIR": os.path.join(scratch, "streams"),
+        "CACHE_DIR": "",
+        "STORAGE_BACKENDS": "sqlite",
+        "SCHEDULER_ENABLED": "false",
+        "SCRAPE_WORKERS": "1",
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.update(overrides)
+    return env
+
+
+# -------------------- Import --------------------
+def import_time(repeat):
+    samples, heavy = [], set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT], cwd=BACKEND, env=scratch_env(),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        heavy.update(result["heavy"])
+    return statistics.median(samples), sorted(heavy)
+
+
+# -------------------- Cold start --------------------
+def wait_until(check, timeout, interval=0.02):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if check():
+                return True
+        except httpx.TransportError:
+            pass
+        time.sleep(interval)
+    return False
+
+
+def cold_start(url, env, timeout):
+    """Seconds from launching the API until it is live, ready, and has finished one scrape of ``url``."""
+    port = free_port()
+    log = tempfile.TemporaryFile()
+    launched = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    timings = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            if not wait_until(lambda: client.get("/health/live").status_code == 200, timeout):
+                raise RuntimeError("API never became live")
+            timings["live"] = time.perf_counter() - launched
+            if not wait_until(lambda: client.get("/health/ready").status_code == 200, timeout):
+                raise RuntimeError(f"API never became ready: {client.get('/health/ready').json()}")
+            timings["ready"] = time.perf_counter() - launched
+
+            job = client.post("/scrape", json={"url": url, "force_refresh": True}).json()
+            done = {}
+
+            def finished():
+                done.update(client.get(f"/jobs/{job['job_id']}").json())
+                return done["status"] in ("done", "failed")
+
+            if not wait_until(finished, timeout, interval=0.05):
+                raise RuntimeError("first scrape never finished")
+            if done["status"] != "done" or done["result"]["item_count"] != ITEMS:
+                raise RuntimeError(f"first scrape failed: {done.get('error') or done['result']['item_count']}")
+            timings["first_scrape"] = time.perf_counter() - launched
+    except RuntimeError:
+        log.seek(0)
+        sys.stderr.write(log.read().decode("utf-8", "replace")[-4000:])
+        raise
+    finally:
+        server.terminate()
+        try:
+            server.wait(15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+    return timings
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            before = baseline.get(case, {}).get(metric)
+            if before is None:
+                found.append(f"{case} {metric}: not in the baseline")
+            elif before and value > before * (1 + threshold):
+                found.append(f"{case} {metric}: {before} -> {value} (+{value / before - 1:.0%})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds allowed for each cold-start stage")
+    parser.add_argument("--skip-browser", action="store_true", help="only the fast-path case (no Chrome needed)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown per metric")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        raise SystemExit(f"No baseline at {args.baseline}; record one with --update-baseline.")
+
+    seconds, heavy = import_time(args.repeat)
+    results = {"import": {"import": round(seconds, 4)}}
+    print(f"import main: {seconds * 1000:.0f} ms")
+    if heavy:
+        raise SystemExit(f"import main loaded the browser stack: {', '.join(heavy)}")
+
+    cases = {"fast_path": ("/city/zomato-state/order", {"FAST_PATH_ENABLED": "true"})}
+    if not args.skip_browser:
+        cases["browser"] = ("/city/zomato-menu/order", {"FAST_PATH_ENABLED": "false", "DRIVER_WARM_MIN": "1"})
+    pages = {"/city/zomato-state/order": zomato_state_page(ITEMS), "/city/zomato-menu/order": zomato_menu(ITEMS)}
+    with FixtureServer(pages) as fixtures:
+        print(f"{'case':<10} {'live s':>8} {'ready s':>8} {'first scrape s':>15}")
+        for case, (path, overrides) in cases.items():
+            samples = [cold_start(fixtures.url(path), scratch_env(**overrides), args.timeout) for _ in range(args.repeat)]
+            results[case] = {metric: round(statistics.median(s[metric] for s in samples), 4) for metric in METRICS[1:]}
+            r = results[case]
+            print(f"{case:<10} {r['live']:>8.3f} {r['ready']:>8.3f} {r['first_scrape']:>15.3f}")
+
+    if args.update_baseline:
+        baseline.update(results)  # --skip-browser keeps the browser case's entry
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    found = regressions(results, baseline, args.threshold)
+    if found:
+        raise SystemExit("Regressions beyond {:.0%} or missing baselines:\n  ".format(args.threshold) + "\n  ".join(found))
+    print(f"\nNo regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""API-process memory per request: polled job results vs. ``POST /scrape?stream=true``.
+
+    python -m bench.bench_streaming --sizes 300 3000 30000
+
+Run from the backend directory; no browser needed. Each size is a Zomato
+state page served by a local stub server and scraped over the fast path by
+one worker process, with the API under uvicorn in this process. "polled"
+fetches the finished job with GET /jobs/{id} (the old flow), "stream" reads
+the NDJSON stream one record at a time. Peak is this process's tracemalloc
+peak while the request runs: the API plus a client that keeps only counts.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import httpx
+
+# Spawned workers re-import this module; they must reuse the parent's scratch dir.
+SCRATCH = os.environ.setdefault("BENCH_STREAMING_DIR", tempfile.mkdtemp(prefix="bench_streaming_"))
+os.environ.update({
+    "STORAGE_DB_PATH": os.path.join(SCRATCH, "scrapes.db"),
+    "JOBS_DB_PATH": os.path.join(SCRATCH, "jobs.db"),
+    "PROMETHEUS_MULTIPROC_DIR": os.path.join(SCRATCH, "metrics"),
+    "STREAM_DIR": os.path.join(SCRATCH, "streams"),
+    "SCRAPE_WORKERS": "1",
+    "STORAGE_BACKENDS": "sqlite",
+})
+
+
+def polled(client, url):
+    job = client.post("/scrape", json={"url": url, "force_refresh": True}).json()
+    while True:
+        result = client.get(f"/jobs/{job['job_id']}").json()
+        if result["status"] in ("done", "failed"):
+            return len(result["result"]["data"])
+        time.sleep(0.05)
+
+
+def streamed(client, url):
+    items = 0
+    with client.stream("POST", "/scrape?stream=true", json={"url": url, "force_refresh": True}) as response:
+        for line in response.iter_lines():
+            if json.loads(line)["type"] == "item":
+                items += 1
+    return items
+
+
+def measure(fetch, client, url):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        items = fetch(client, url)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return items, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[300, 3000, 30000])
+    args = parser.parse_args()
+
+    import uvicorn
+
+    from bench.fixtures import zomato_state_page
+    from bench.server import FixtureServer, free_port
+    import main as app  # after the environment above is in place
+
+    api = uvicorn.Server(uvicorn.Config(app.app, port=free_port(), log_level="warning"))
+    threading.Thread(target=api.run, daemon=True).start()
+    while not api.started:
+        time.sleep(0.05)
+
+    # Pre-encoded so serving a page to the worker allocates nothing in this process.
+    pages = {
+        f"/city/zomato-{size}/order": ("text/html; charset=utf-8", zomato_state_page(size).encode("utf-8"))
+        for size in args.sizes
+    }
+    base_url = f"http://127.0.0.1:{api.config.port}"
+    try:
+        with FixtureServer(pages) as server, httpx.Client(base_url=base_url, timeout=None) as client:
+            print(f"{'items':>7} {'mode':<7} {'seconds':>8} {'peak MB':>8}")
+            for size in args.sizes:
+                url = server.url(f"/city/zomato-{size}/order")
+                for mode, fetch in (("polled", polled), ("stream", streamed)):
+                    items, elapsed, peak = measure(fetch, client, url)
+                    if items != size:
+                        raise SystemExit(f"{mode} returned {items} items, expected {size}")
+                    print(f"{size:>7} {mode:<7} {elapsed:>8.2f} {peak / 2 ** 20:>8.2f}")
+    finally:
+        api.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Concurrent scrapes per GB: one Chromium per driver vs. tabs in a shared Chromium.
+
+    python -m bench.bench_tabs --concurrency 8 --tabs-per-browser 4
+
+Run from the backend directory; needs Chrome (CHROME_BIN/CHROMEDRIVER_PATH).
+Both modes load the same medium Zomato fixture from a local stub server with
+``concurrency`` threads and report throughput and peak browser RSS.
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fixtures import SIZES, zomato_menu
+from bench.server import FixtureServer
+from browser_profile import chromium_rss, process_tree_rss
+from browser_tabs import TabbedBrowsers
+from driver_pool import DriverPool
+from extractors import EXTRACTORS
+
+
+def chrome_options():
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.binary_location = os.getenv("CHROME_BIN", "/usr/bin/chromium")
+    return options
+
+
+def process_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    service = Service(os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
+    return webdriver.Chrome(service=service, options=chrome_options())
+
+
+def browser_rss(drivers, tabbed):
+    if tabbed:
+        return sum(process_tree_rss(browser["pid"]) for browser in tabbed.stats()["browsers"])
+    return sum(chromium_rss(driver) or 0 for driver in drivers)
+
+
+def run(mode, url, concurrency, jobs, tabs_per_browser):
+    tabbed = TabbedBrowsers(
+        chrome_options, os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"), tabs_per_browser
+    ) if mode == "tabs" else None
+    pool = DriverPool(tabbed or process_driver, size=concurrency, max_uses=10 ** 6)
+    live, peak, lock = set(), [0], threading.Lock()
+
+    def scrape(_):
+        with pool.lease() as driver:
+            driver.get(url)
+            items, _, _ = EXTRACTORS["zomato"].extract(driver.page_source)
+            with lock:
+                live.add(driver)
+                peak[0] = max(peak[0], browser_rss(live, tabbed))
+            return len(items)
+
+    try:
+        pool.warm()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            counts = list(executor.map(scrape, range(jobs)))
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.close()
+        if tabbed:
+            tabbed.close()
+    assert all(count == SIZES["medium"] for count in counts), "a scrape returned a partial menu"
+    return elapsed, peak[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--tabs-per-browser", type=int, default=4)
+    args = parser.parse_args()
+
+    with FixtureServer({"/zomato": zomato_menu(SIZES["medium"])}) as server:
+        print(f"{'mode':<8} {'jobs/s':>7} {'peak RSS MB':>12} {'concurrent per GB':>18}")
+        for mode in ("process", "tabs"):
+            elapsed, peak = run(mode, server.url("/zomato"), args.concurrency, args.jobs, args.tabs_per_browser)
+            per_gb = args.concurrency / (peak / 2 ** 30) if peak else 0
+            print(f"{mode:<8} {args.jobs / elapsed:>7.2f} {peak / 2 ** 20:>12.0f} {per_gb:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
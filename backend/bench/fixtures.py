@@ -0,0 +1,231 @@
+"""Synthetic page snapshots that reproduce the markup each scraper targets.
+
+Pages are generated deterministically instead of being checked in, so the
+"huge" sizes don't bloat the repo. Sizes are items per menu.
+"""
+import json
+import random
+from html import escape
+
+SIZES = {"small": 30, "medium": 300, "huge": 3000}
+
+DISHES = [
+    "Rajma", "Chole", "Paneer Butter Masala", "Dal Makhani", "Veg Biryani", "Chicken Biryani",
+    "Kadai Paneer", "Aloo Gobi", "Butter Chicken", "Mix Veg", "Shahi Paneer", "Egg Curry",
+]
+SIDES = ["Rumali Roti", "Jeera Rice", "Tawa Paratha", "Steamed Rice", "Butter Naan", "Laccha Paratha"]
+FORMATS = ["Lunchbox", "Thali", "Combo", "Bowl", "Meal"]
+
+
+def dish_names(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(DISHES)} & {rng.choice(SIDES)} {rng.choice(FORMATS)} #{i}"
+        for i in range(count)
+    ]
+
+
+def page(body, title="Menu"):
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{escape(title)}</title></head><body>{body}</body></html>"
+
+
+# -------------------- Swiggy --------------------
+# Offer cards open one shared modal after a short delay, like the live page.
+OFFER_MODAL = """
+<div class='sc-modal igolxO' style='display:none'>
+  <div class='sc-close dnGnZy' aria-hidden='true' style='width:24px;height:24px'>x</div>
+  <div class='sc-title xtIpQ'></div><div class='sc-code hHZVJN'></div>
+</div>
+<script>
+const OFFERS = %s;
+const modal = document.querySelector('.igolxO');
+const show = (i) => setTimeout(() => {
+  modal.querySelector('.xtIpQ').innerText = OFFERS[i][0];
+  modal.querySelector('.hHZVJN').innerText = OFFERS[i][1];
+  modal.style.display = 'block';
+}, 50);
+const hide = () => setTimeout(() => { modal.style.display = 'none'; }, 30);
+document.querySelectorAll("[data-testid^='offer-card-container-']")
+  .forEach((card, i) => card.addEventListener('click', () => show(i)));
+modal.querySelector('.dnGnZy').addEventListener('click', hide);
+document.addEventListener('keydown', (e) => { if (e.key === 'Escape') hide(); });
+</script>
+"""
+
+
+def swiggy_offers(count, seed=0):
+    rng = random.Random(seed)
+    return [(f"{rng.randrange(10, 60)}% OFF UPTO ₹{rng.randrange(50, 200)}", f"USE CODE{i}") for i in range(count)]
+
+
+def swiggy_menu(count, restaurant="LunchBox - Meals and Thalis", city="Kanpur", seed=0, offers=0):
+    rng = random.Random(seed)
+    cards = []
+    for name in dish_names(count, seed):
+        final = rng.randrange(99, 499)
+        discounted = rng.random() < 0.4
+        prices = f"<div class='sc-aXZVg chixpw'>{final}</div>"
+        if discounted:
+            prices = f"<div class='sc-aXZVg hTspMV'>{final + rng.randrange(20, 120)}</div>" + prices
+        cards.append(
+            "<div class='styles_container__QMaYM'>"
+            f"<div aria-hidden='true' class='sc-aXZVg dwSeRx'>{escape(name)}</div>"
+            f"<div class='styles_price'>{prices}</div>"
+            "<button>ADD</button></div>"
+        )
+    offer_cards = "".join(
+        f"<div data-testid='offer-card-container-{i}' style='height:40px'>{escape(header)}</div>"
+        for i, (header, _) in enumerate(swiggy_offers(offers, seed))
+    )
+    body = (
+        f"<nav><a href='/city/{city.lower()}'><span itemprop='name'>{escape(city)}</span></a></nav>"
+        f"<h1><span class='_2vs3E'>{escape(restaurant)}</span></h1>"
+        f"<section>{offer_cards}</section>"
+        f"<main>{''.join(cards)}</main>"
+        + (OFFER_MODAL % json.dumps(swiggy_offers(offers, seed)) if offers else "")
+    )
+    return page(body, restaurant)
+
+
+# -------------------- Zomato --------------------
+def zomato_menu(count, restaurant="LunchBox - Meals and Thalis", city="Allahabad", seed=0):
+    rng = random.Random(seed)
+    crumbs = ["Home", "India", city, f"{city} Restaurants", restaurant]
+    breadcrumbs = "".join(f"<a class='sc-ukj373-3 kfNtYK' title='{escape(c)}'>{escape(c)}</a>" for c in crumbs)
+    cards = "".join(
+        "<div class='sc-nUItV gZWJDT'>"
+        f"<h4 class='sc-cGCqpu chKhYc'>{escape(name)}</h4>"
+        f"<span class='sc-17hyc2s-1 cCiQWA'>₹{rng.randrange(99, 499)}</span>"
+        "</div>"
+        for name in dish_names(count, seed)
+    )
+    return page(f"<nav>{breadcrumbs}</nav><section>{cards}</section>", restaurant)
+
+
+# -------------------- MyStore --------------------
+def mystore_cards(count, seller="Fresh Mart", seed=0, start=0):
+    rng = random.Random(seed)
+    cards = []
+    for i, name in enumerate(dish_names(start + count, seed)):
+        old = rng.randrange(100, 900)
+        new = int(old * rng.uniform(0.5, 0.95))
+        if i < start:
+            continue  # same prices for a product whichever page it is on
+        cards.append(
+            f"<div class='product-card d-flex flex-column' data-product-id='sku-{i}'>"
+            "<div class='product-price'>"
+            f"<span class='price-new'>₹{new}</span><span class='price-old'>₹{old}</span>"
+            f"<span class='discount-off'>{round(100 * (old - new) / old)}% off</span>"
+            "</div>"
+            "<div class='product-caption-top mt-auto'>"
+            f"<a class='twoline_ellipsis' href='/product/sku-{i}'>{escape(name)}</a>"
+            f"<a class='product_seller_name'>{escape(seller)}</a>"
+            "</div></div>"
+        )
+    return cards
+
+
+def mystore_page(cards, seller="Fresh Mart", extra=""):
+    body = (
+        f"<h1 class='catalog-title m-0 fw-semibold h2'>{escape(seller)}</h1>"
+        "<div class='seller-caption-top'>Kanpur</div>"
+        f"<div class='catalog'>{''.join(cards)}</div>{extra}"
+    )
+    return page(body, seller)
+
+
+def mystore_catalog(count, seller="Fresh Mart", seed=0):
+    return mystore_page(mystore_cards(count, seller, seed), seller)
+
+
+def mystore_paginated(path, count, per_page=24, seller="Fresh Mart", seed=0, overlap=2):
+    """{url path: html} for a catalog split over ``?page=N``.
+
+    Like the live pager, each page links only two pages ahead, and
+    consecutive pages repeat ``overlap`` products.
+    """
+    pages = -(-count // per_page)
+    routes = {}
+    for number in range(1, pages + 1):
+        start = max(0, (number - 1) * per_page - overlap)
+        cards = mystore_cards(min(number * per_page, count) - start, seller, seed, start)
+        links = "".join(
+            f"<a href='{path}?page={n}'>{n}</a>" for n in range(max(1, number - 2), min(pages, number + 2) + 1)
+        )
+        if number < pages:
+            links += f"<a rel='next' href='{path}?page={number + 1}'>Next</a>"
+        html = mystore_page(cards, seller, f"<nav><ul class='pagination'>{links}</ul></nav>")
+        routes[f"{path}?page={number}"] = html
+        if number == 1:
+            routes[path] = html
+    # Past the end the store repeats its last page.
+    routes[f"{path}?page={pages + 1}"] = routes[f"{path}?page={pages}"]
+    return routes
+
+
+# Appends the next batch of cards whenever the page is scrolled to the bottom.
+LAZY_LOADER = """
+<div class='load-more-sentinel' data-infinite-scroll='true'></div>
+<script>
+const BATCHES = %s;
+let next = 0;
+const load = () => {
+  if (next >= BATCHES.length) return;
+  const html = BATCHES[next++];
+  setTimeout(() => document.querySelector('.catalog').insertAdjacentHTML('beforeend', html), 100);
+};
+window.addEventListener('scroll', () => {
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 10) load();
+});
+</script>
+"""
+
+
+def mystore_lazy_catalog(count, batch=24, seller="Fresh Mart", seed=0):
+    """Catalog that renders ``batch`` cards and loads the rest as the page is scrolled."""
+    cards = mystore_cards(count, seller, seed)
+    batches = ["".join(cards[start:start + batch]) for start in range(batch, count, batch)]
+    return mystore_page(cards[:batch], seller, LAZY_LOADER % json.dumps(batches))
+
+
+# -------------------- Embedded JSON state --------------------
+def swiggy_state_page(count, restaurant="LunchBox - Meals and Thalis", city="Kanpur", seed=0):
+    """Client-rendered Swiggy page: empty DOM, menu in window.___INITIAL_STATE___ (prices in paise)."""
+    rng = random.Random(seed)
+    cards = []
+    for i, name in enumerate(dish_names(count, seed)):
+        price = rng.randrange(99, 499) * 100
+        info = {"id": str(100000 + i), "name": name, "category": "Recommended", "isVeg": 1, "price": price}
+        if rng.random() < 0.4:
+            info["finalPrice"] = price - rng.randrange(20, 90) * 100
+        cards.append({"card": {"info": info}})
+    state = {
+        "restaurant": {"info": {"name": restaurant, "city": city, "cuisines": ["North Indian"]}},
+        "offers": [
+            {"header": "60% OFF UPTO ₹110", "couponCode": "USE TRYNEW", "offerIds": ["o1"]},
+            {"header": "FLAT ₹125 OFF", "couponCode": "USE FLAT125", "offerIds": ["o2"]},
+        ],
+        "menu": {"itemCards": cards},
+    }
+    script = f"<script>window.___INITIAL_STATE___ = {json.dumps(state)};</script>"
+    return page(f"<div id='root'></div>{script}", restaurant)
+
+
+def zomato_state_page(count, restaurant="LunchBox - Meals and Thalis", city="Allahabad", seed=0):
+    """Zomato page whose menu lives in window.__PRELOADED_STATE__ = JSON.parse("...")."""
+    rng = random.Random(seed)
+    items = [
+        {"item": {"id": f"ctl_{i}", "name": name, "price": rng.randrange(99, 499), "desc": "", "item_state": "ENABLED"}}
+        for i, name in enumerate(dish_names(count, seed))
+    ]
+    state = {
+        "pages": {"restaurant": {"1": {
+            "sections": {"SECTION_BASIC_INFO": {"res_id": 1, "name": restaurant, "city": city}},
+            "order": {"menuList": {"menus": [{"menu": {"categories": [{"category": {"items": items}}]}}]}},
+        }}},
+    }
+    script = f"<script>window.__PRELOADED_STATE__ = JSON.parse({json.dumps(json.dumps(state))});</script>"
+    return page(f"<div id='root'></div>{script}", restaurant)
+
+
+PAGES = {"swiggy": swiggy_menu, "zomato": zomato_menu, "mystore": mystore_catalog}
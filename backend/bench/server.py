@@ -0,0 +1,69 @@
+"""Local stub HTTP server that serves fixture pages for offline runs."""
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def free_port():
+    """A port that was free a moment ago, for servers started in another process."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FixtureServer:
+    """Serve ``routes`` ({path: html or (content_type, body)}) on 127.0.0.1.
+
+        with FixtureServer({"/swiggy/menu": html}) as server:
+            scrape(server.url("/swiggy/menu"))
+    """
+
+    def __init__(self, routes, port=0, delay=0):
+        self.routes = routes
+        self.delay = delay  # seconds added to every response, e.g. to mimic network latency
+        self.hits = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                # Routes may include a query string; otherwise it is ignored.
+                path = self.path if self.path in server.routes else self.path.split("?", 1)[0]
+                server.hits[path] = server.hits.get(path, 0) + 1
+                if server.delay:
+                    time.sleep(server.delay)
+                route = server.routes.get(path)
+                if route is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                content_type, body = route if isinstance(route, tuple) else ("text/html; charset=utf-8", route)
+                payload = body.encode("utf-8") if isinstance(body, str) else body
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
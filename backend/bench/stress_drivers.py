@@ -0,0 +1,145 @@
+"""Concurrent browser launches: N scrapes at once must not collide or mix results.
+
+    python -m bench.stress_drivers                  # 8 simultaneous scrapes
+    python -m bench.stress_drivers --scrapes 16 --rounds 3
+    python -m bench.stress_drivers --fixed-port     # the old shared port 9222, to see it fail
+
+Run from the backend directory; needs Chrome (CHROME_BIN/CHROMEDRIVER_PATH).
+Every scrape gets its own fixture page (a distinct restaurant or seller and
+menu, cycling through the platforms), and all of them are released together
+so their browsers start at the same moment. Each result is checked against
+what the page actually contains, and every driver must have had its own
+DevTools address and profile directory. Exits non-zero on any failure.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+SCRATCH = tempfile.mkdtemp(prefix="stress_drivers_")
+os.environ.update({
+    "PROMETHEUS_MULTIPROC_DIR": os.path.join(SCRATCH, "metrics"),
+    "BROWSER_MODE": "process",
+})
+os.environ.setdefault("TIMEOUT_MYSTORE_SCROLL_QUIET", "0.2")
+
+from bench.fixtures import mystore_catalog, swiggy_menu, zomato_menu  # noqa: E402
+from bench.server import FixtureServer  # noqa: E402
+from extractors import EXTRACTORS  # noqa: E402
+
+PLATFORMS = ("swiggy", "zomato", "mystore")
+ITEMS = 40
+
+
+def fixtures(count):
+    """{path: (platform, html)}, one distinct page per scrape."""
+    pages = {}
+    for i in range(count):
+        platform = PLATFORMS[i % len(PLATFORMS)]
+        name = f"Stress Kitchen {i}"
+        if platform == "swiggy":
+            html = swiggy_menu(ITEMS + i, restaurant=name, city=f"City {i}", seed=i)
+        elif platform == "zomato":
+            html = zomato_menu(ITEMS + i, restaurant=name, city=f"City {i}", seed=i)
+        else:
+            html = mystore_catalog(ITEMS + i, seller=name, seed=i)
+        pages[f"/{platform}/{i}"] = (platform, html)
+    return pages
+
+
+def fixed_port_driver(app):
+    """The factory as it was: every Chromium on --remote-debugging-port=9222."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    def create():
+        options = app.chrome_options()
+        options.add_argument("--remote-debugging-port=9222")
+        return webdriver.Chrome(service=Service(os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver")), options=options)
+    return create
+
+
+def run_round(app, server, pages, drivers):
+    scrapers = {"swiggy": app.scrape_swiggy, "zomato": app.scrape_zomato, "mystore": app.scrape_mystore}
+    barrier = threading.Barrier(len(pages))
+    results = {}
+
+    def scrape(path, platform):
+        barrier.wait()
+        try:
+            results[path] = scrapers[platform](server.url(path))
+        except Exception as e:
+            results[path] = e
+
+    threads = [threading.Thread(target=scrape, args=(path, platform)) for path, (platform, _) in pages.items()]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    failures = []
+    for path, (platform, html) in pages.items():
+        result = results[path]
+        if isinstance(result, Exception):
+            failures.append(f"{path}: {type(result).__name__}: {str(result).splitlines()[0] if str(result) else ''}")
+            continue
+        items, restaurant, city, _, _ = result
+        want_items, want_restaurant, want_city = EXTRACTORS[platform].extract(html)
+        if restaurant != want_restaurant or (platform != "mystore" and city != want_city):
+            failures.append(f"{path}: got {restaurant!r}/{city!r}, expected {want_restaurant!r}/{want_city!r}")
+        elif [item["name"] for item in items] != [item["name"] for item in want_items]:
+            failures.append(f"{path}: {len(items)} items that don't match the page's {len(want_items)}")
+
+    addresses = [driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress") for driver in drivers]
+    profiles = [getattr(driver, "profile_dir", None) for driver in drivers]
+    if len(set(addresses)) != len(addresses):
+        failures.append(f"drivers shared a DevTools address: {sorted(addresses)}")
+    if None not in profiles and len(set(profiles)) != len(profiles):
+        failures.append("drivers shared a profile directory")
+    return wall, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scrapes", type=int, default=8, help="simultaneous scrapes (and browsers)")
+    parser.add_argument("--rounds", type=int, default=1, help="repeat with fresh browsers each round")
+    parser.add_argument("--fixed-port", action="store_true", help="launch every browser on port 9222, as before")
+    args = parser.parse_args()
+
+    os.environ["DRIVER_POOL_SIZE"] = str(args.scrapes)
+    import scrapers as app  # after the environment above is in place
+
+    factory = fixed_port_driver(app) if args.fixed_port else app.driver_pool.factory
+    drivers = []
+
+    def tracked():
+        driver = factory()
+        drivers.append(driver)
+        return driver
+
+    app.driver_pool.factory = tracked
+    pages = fixtures(args.scrapes)
+    failed = False
+    with FixtureServer({path: html for path, (_, html) in pages.items()}) as server:
+        for round_ in range(args.rounds):
+            drivers.clear()
+            try:
+                wall, failures = run_round(app, server, pages, drivers)
+            finally:
+                app.driver_pool.close()
+            print(f"round {round_ + 1}: {args.scrapes} scrapes on {len(drivers)} browsers in {wall:.2f}s, "
+                  f"{len(failures)} failed")
+            for failure in failures:
+                print(f"  {failure}")
+            failed = failed or bool(failures)
+    if failed:
+        sys.exit(1)
+    print("every scrape returned its own page")
+
+
+if __name__ == "__main__":
+    main()
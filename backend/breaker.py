@@ -0,0 +1,146 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+
+
+# -------------------- Circuit Breakers --------------------
+class CircuitBreakers:
+    """Per-platform circuit breakers shared by the API and worker processes through SQLite.
+
+    ``failures`` consecutive failures (timeouts or empty menus) open a
+    platform's breaker for ``cooldown`` seconds. After that one scrape is let
+    through as a probe: success closes the breaker, failure reopens it for
+    twice as long, up to ``max_cooldown``.
+    """
+
+    def __init__(self, path, failures=3, cooldown=30, max_cooldown=600, probe_timeout=300):
+        self.path = path
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS breakers (
+                    platform TEXT PRIMARY KEY,
+                    state TEXT NOT NULL DEFAULT 'closed',
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    cooldown REAL,
+                    open_until REAL,
+                    probe_started_at REAL,
+                    trips INTEGER NOT NULL DEFAULT 0,
+                    last_failure TEXT,
+                    changed_at REAL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self, platform):
+        """Yield the platform's row (created closed if missing) inside BEGIN IMMEDIATE."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR IGNORE INTO breakers (platform, changed_at) VALUES (?, ?)", (platform, time.time()))
+                row = dict(conn.execute("SELECT * FROM breakers WHERE platform = ?", (platform,)).fetchone())
+                yield conn, row
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def retry_after(self, platform, now=None):
+        """Seconds until the platform's breaker lets a scrape through, or None if it would now."""
+        now = now or time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM breakers WHERE platform = ?", (platform,)).fetchone()
+        if row is None or row["state"] == "closed":
+            return None
+        if row["state"] == "open" and now < row["open_until"]:
+            return row["open_until"] - now
+        if row["state"] == "half_open" and now - row["probe_started_at"] < self.probe_timeout:
+            return self.cooldown  # a probe is running; check back later
+        return None
+
+    def allow(self, platform, now=None):
+        """Claim the right to scrape: always while closed, once (as the probe) after a cooldown.
+
+        Returns "closed", "half_open" for the probe, or None when refused.
+        """
+        now = now or time.time()
+        with self._transaction(platform) as (conn, row):
+            if row["state"] == "closed":
+                return "closed"
+            if row["state"] == "open" and now < row["open_until"]:
+                return None
+            if row["state"] == "half_open" and now - row["probe_started_at"] < self.probe_timeout:
+                return None
+            conn.execute(
+                "UPDATE breakers SET state = 'half_open', probe_started_at = ?, changed_at = ? WHERE platform = ?",
+                (now, now, platform),
+            )
+            return "half_open"
+
+    def release(self, platform):
+        """Give up a probe that ended neither in success nor failure, so the next scrape probes."""
+        with self._transaction(platform) as (conn, row):
+            if row["state"] == "half_open":
+                conn.execute(
+                    "UPDATE breakers SET state = 'open', open_until = ?, probe_started_at = NULL WHERE platform = ?",
+                    (time.time(), platform),
+                )
+
+    def success(self, platform):
+        with self._transaction(platform) as (conn, row):
+            if row["state"] != "closed" or row["failures"]:
+                conn.execute(
+                    "UPDATE breakers SET state = 'closed', failures = 0, cooldown = NULL, open_until = NULL, "
+                    "probe_started_at = NULL, changed_at = ? WHERE platform = ?",
+                    (time.time(), platform),
+                )
+
+    def failure(self, platform, reason):
+        """Count a timeout or empty result; returns True if this opened the breaker."""
+        now = time.time()
+        with self._transaction(platform) as (conn, row):
+            failures = row["failures"] + 1
+            if row["state"] == "half_open":
+                cooldown = min((row["cooldown"] or self.cooldown) * 2, self.max_cooldown)
+            elif row["state"] == "closed" and failures >= self.threshold:
+                cooldown = self.cooldown
+            else:
+                conn.execute(
+                    "UPDATE breakers SET failures = ?, last_failure = ? WHERE platform = ?",
+                    (failures, reason, platform),
+                )
+                return False
+            conn.execute(
+                "UPDATE breakers SET state = 'open', failures = ?, cooldown = ?, open_until = ?, "
+                "probe_started_at = NULL, trips = trips + 1, last_failure = ?, changed_at = ? WHERE platform = ?",
+                (failures, cooldown, now + cooldown, reason, now, platform),
+            )
+        print(f"Circuit breaker for {platform} opened for {cooldown:.0f}s after {failures} failures ({reason}).")
+        return True
+
+    def stats(self):
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM breakers ORDER BY platform").fetchall()
+        return {
+            row["platform"]: {
+                "state": row["state"],
+                "consecutive_failures": row["failures"],
+                "trips": row["trips"],
+                "last_failure": row["last_failure"],
+                "retry_after": round(max(row["open_until"] - now, 0), 1) if row["state"] == "open" else None,
+            }
+            for row in rows
+        }
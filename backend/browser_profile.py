@@ -0,0 +1,280 @@
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from driver_pool import summarize
+
+
+# -------------------- Blocking Profiles --------------------
+BLOCK_PATTERNS = {
+    "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.ico*", "*.svg*"],
+    "fonts": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*"],
+    "trackers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*googleadservices.com*", "*connect.facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*",
+        "*branch.io*", "*sentry.io*", "*nr-data.net*", "*newrelic.com*", "*amplitude.com*", "*mixpanel.com*",
+        "*segment.io*", "*appsflyer.com*", "*moengage.com*", "*clevertap*", "*criteo.com*", "*bat.bing.com*",
+    ],
+}
+
+# What each mode blocks. "standard" never changes how a page renders.
+MODES = {
+    "off": (),
+    "standard": ("media", "trackers"),
+    "lite": ("images", "fonts", "media", "trackers"),
+}
+
+# Patterns a platform still needs in lite mode.
+PLATFORM_ALLOW = {
+    # The offer modal's close control is an SVG icon; without it the click
+    # target collapses and every card falls back to Escape.
+    "swiggy": ["*.svg*"],
+    "zomato": [],
+    "mystore": [],
+}
+
+# Browser-wide settings; they cannot vary per platform because a pooled
+# driver serves every platform.
+CHROME_PREFS = {
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.default_content_setting_values.popups": 2,
+    "profile.default_content_setting_values.automatic_downloads": 2,
+    "profile.managed_default_content_settings.plugins": 2,
+}
+
+
+def blocking_mode():
+    mode = os.getenv("RESOURCE_BLOCKING", "lite").strip().lower()
+    return mode if mode in MODES else "lite"
+
+
+def blocked_patterns(platform, mode=None):
+    allowed = set(PLATFORM_ALLOW.get(platform, ()))
+    return [
+        pattern
+        for category in MODES[mode or blocking_mode()]
+        for pattern in BLOCK_PATTERNS[category]
+        if pattern not in allowed
+    ]
+
+
+def configure_options(options, mode=None):
+    """Chrome launch settings for the blocking mode; call from the driver factory."""
+    mode = mode or blocking_mode()
+    options.add_experimental_option("prefs", CHROME_PREFS)
+    if "media" in MODES[mode]:
+        options.add_argument("--autoplay-policy=user-gesture-required")
+    if "fonts" in MODES[mode]:
+        options.add_argument("--disable-remote-fonts")
+    # Network events for the per-scrape byte count.
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+# -------------------- Isolation --------------------
+PROFILE_PREFIX = "pricebot-chrome-"
+# Launch flags that would make two browsers share a DevTools endpoint or a profile.
+SHARED_FLAGS = ("--remote-debugging-port", "--remote-debugging-pipe", "--user-data-dir")
+
+
+def isolate(options):
+    """Give one Chromium launch a fresh profile directory; returns its path.
+
+    Any fixed DevTools port is dropped: chromedriver then starts Chromium
+    on port 0 and reads the port the OS assigned from the profile's
+    DevToolsActivePort file, so concurrent launches can't collide on a
+    port, a profile lock or each other's cookies.
+    """
+    options.arguments[:] = [argument for argument in options.arguments if not argument.startswith(SHARED_FLAGS)]
+    profile_dir = tempfile.mkdtemp(prefix=PROFILE_PREFIX)
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    return profile_dir
+
+
+def stale_profiles(live, min_age=300):
+    """Profile directories of browsers that are gone (killed workers skip ``quit``)."""
+    root = tempfile.gettempdir()
+    stale = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if not name.startswith(PROFILE_PREFIX) or path in live:
+            continue
+        try:
+            if time.time() - os.path.getmtime(path) >= min_age:
+                stale.append(path)
+        except OSError:
+            pass
+    return stale
+
+
+def apply_blocking(driver, platform, mode=None):
+    """Swap in the platform's block list; pooled drivers get it before every navigation."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_patterns(platform, mode)})
+
+
+# -------------------- Measurements --------------------
+def network_usage(driver):
+    """Bytes, requests and blocked requests since the last call (drains the performance log)."""
+    usage = {"bytes": 0, "requests": 0, "blocked": 0}
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return None
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        if method == "Network.loadingFinished":
+            usage["requests"] += 1
+            usage["bytes"] += int(message["params"].get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed" and message["params"].get("blockedReason"):
+            usage["blocked"] += 1
+    return usage
+
+
+def _children(pid):
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return []
+    children = []
+    for task in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return children
+
+
+def process_tree(pid):
+    """``pid`` and all its live descendants; Linux only."""
+    stack, seen = [pid], []
+    while stack:
+        current = stack.pop()
+        if current in seen or not os.path.exists(f"/proc/{current}"):
+            continue
+        seen.append(current)
+        stack.extend(_children(current))
+    return seen
+
+
+def kill_tree(pid):
+    """SIGKILL ``pid`` and every descendant, children first; returns how many were signalled."""
+    killed = 0
+    for current in reversed(process_tree(pid)):
+        try:
+            os.kill(current, signal.SIGKILL)
+            killed += 1
+        except OSError:
+            pass
+    return killed
+
+
+def process_tree_rss(pid):
+    """Resident memory (bytes) of ``pid`` and all its descendants; Linux only."""
+    total = 0
+    for current in process_tree(pid):
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            pass
+    return total
+
+
+def process_tree_cpu(pid):
+    """User + system CPU seconds used so far by ``pid`` and its live descendants."""
+    total = 0
+    for current in process_tree(pid):
+        try:
+            with open(f"/proc/{current}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12])  # utime, stime
+        except (OSError, ValueError, IndexError):
+            pass
+    return total / os.sysconf("SC_CLK_TCK")
+
+
+def chromium_rss(driver):
+    """RSS of the browser behind ``driver`` (chromedriver excluded), or None.
+
+    For tab sessions this is the whole shared browser, not just one tab.
+    """
+    browser_pid = getattr(driver, "browser_pid", None)
+    if browser_pid is not None:
+        return process_tree_rss(browser_pid)
+    try:
+        service_pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    browsers = _children(service_pid)
+    if not browsers:
+        return None
+    return sum(process_tree_rss(pid) for pid in browsers)
+
+
+class PageMeter:
+    """Times one scrape from navigation until the page is usable."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.page_ready = None
+
+    def ready(self):
+        if self.page_ready is None:
+            self.page_ready = time.perf_counter() - self.started
+
+
+class ResourceStats:
+    """Per-platform bytes, page-ready time and Chromium RSS of recent browser scrapes."""
+
+    def __init__(self, sample_size=500):
+        self.sample_size = sample_size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, driver, platform, record=None):
+        """Apply the platform's blocking and fill ``record`` with this scrape's numbers."""
+        mode = blocking_mode()
+        apply_blocking(driver, platform, mode)
+        network_usage(driver)  # drop entries left over from the previous lease
+        meter = PageMeter()
+        try:
+            yield meter
+        finally:
+            sample = {
+                "mode": mode,
+                "page_ready": round(meter.page_ready, 4) if meter.page_ready is not None else None,
+                "total": round(time.perf_counter() - meter.started, 4),
+                **(network_usage(driver) or {}),
+                "chromium_rss": chromium_rss(driver),
+            }
+            if record is not None:
+                record.update(sample)
+            with self._lock:
+                samples = self._samples.setdefault(platform, deque(maxlen=self.sample_size))
+                samples.append(sample)
+
+    def stats(self):
+        with self._lock:
+            samples = {platform: list(values) for platform, values in self._samples.items()}
+        stats = {}
+        for platform, values in samples.items():
+            stats[platform] = {"mode": values[-1]["mode"]}
+            for field in ("page_ready", "total"):
+                stats[platform][field] = summarize([s[field] for s in values if s.get(field) is not None])
+            for field in ("bytes", "requests", "blocked", "chromium_rss"):
+                numbers = [s[field] for s in values if s.get(field) is not None]
+                stats[platform][field] = {
+                    "avg": round(sum(numbers) / len(numbers)) if numbers else 0,
+                    "max": max(numbers, default=0),
+                }
+        return stats
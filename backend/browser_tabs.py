@@ -0,0 +1,289 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import httpx
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.chromium.webdriver import ChromiumDriver
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from browser_profile import PROFILE_PREFIX, SHARED_FLAGS
+
+# chromedriver messages meaning the tab (or its renderer) is gone or wedged,
+# as opposed to a page that simply lacks an element.
+TAB_FAILURES = (
+    "tab crashed",
+    "page crash",
+    "receiving message from renderer",
+    "target frame detached",
+    "no such window",
+    "target window already closed",
+    "not connected to devtools",
+    "chrome not reachable",
+    "disconnected",
+)
+
+
+def is_tab_failure(exc):
+    message = (getattr(exc, "msg", None) or str(exc)).lower()
+    return isinstance(exc, WebDriverException) and any(failure in message for failure in TAB_FAILURES)
+
+
+def nested_prefs(prefs):
+    """{"a.b.c": 1} -> {"a": {"b": {"c": 1}}}, the layout of Chrome's Preferences file."""
+    nested = {}
+    for dotted, value in prefs.items():
+        node = nested
+        *parents, leaf = dotted.split(".")
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+    return nested
+
+
+# -------------------- Shared Browser --------------------
+class BrowserHost:
+    """One headless Chromium that tab sessions attach to over DevTools."""
+
+    def __init__(self, options, max_tabs, startup_timeout=20):
+        self.max_tabs = max_tabs
+        self.tabs = 0
+        self.port = None  # chosen by Chromium itself; read back from DevToolsActivePort
+        self.user_data_dir = tempfile.mkdtemp(prefix=PROFILE_PREFIX)
+
+        prefs = options.experimental_options.get("prefs")
+        if prefs:
+            os.makedirs(os.path.join(self.user_data_dir, "Default"))
+            with open(os.path.join(self.user_data_dir, "Default", "Preferences"), "w") as f:
+                json.dump(nested_prefs(prefs), f)
+
+        arguments = [
+            argument for argument in options.arguments
+            if not argument.startswith(SHARED_FLAGS)
+        ]
+        self.process = subprocess.Popen(
+            [options.binary_location, *arguments,
+             "--remote-debugging-port=0", f"--user-data-dir={self.user_data_dir}", "about:blank"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.anchor_id = self._wait_ready(startup_timeout)
+        except Exception:
+            self.close()
+            raise
+
+    def _active_port(self):
+        """The port Chromium bound, from the DevToolsActivePort file it writes (as chromedriver reads it)."""
+        try:
+            with open(os.path.join(self.user_data_dir, "DevToolsActivePort")) as f:
+                return int(f.readline())
+        except (OSError, ValueError):
+            return None  # not written yet, or written halfway
+
+    def _wait_ready(self, timeout):
+        """Block until DevTools answers; returns the id of the initial about:blank page."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Chromium exited during startup (code {self.process.returncode}).")
+            if self.port is None:
+                self.port = self._active_port()
+                if self.port is None:
+                    time.sleep(0.05)
+                    continue
+            try:
+                targets = httpx.get(f"http://127.0.0.1:{self.port}/json/list", timeout=1).json()
+                pages = [target["id"] for target in targets if target.get("type") == "page"]
+                if pages:
+                    return pages[0]
+            except (httpx.HTTPError, ValueError):
+                pass
+            time.sleep(0.1)
+        raise TimeoutError("Chromium did not open its DevTools port in time.")
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive:
+            self.process.terminate()
+            try:
+                self.process.wait(5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+# -------------------- Tab Sessions --------------------
+class TabDriver(ChromiumDriver):
+    """WebDriver session confined to its own browser context in a shared Chromium.
+
+    Behaves like a driver from ``get_chrome_driver``: cookies, storage and
+    cache are private to the context, ``window_handles`` only lists this
+    context's pages, and ``quit()`` closes the context, not the browser.
+    """
+
+    def __init__(self, host, service_url, options, page_load_timeout, release):
+        self.host = host
+        self.browser_pid = host.pid
+        self.service = None  # chromedriver is shared; quit() must not stop it
+        self._release = release
+        self.context_id = None
+        self.target_id = None
+
+        options.debugger_address = f"127.0.0.1:{host.port}"
+        executor = ChromiumRemoteConnection(
+            remote_server_addr=service_url, vendor_prefix="goog", browser_name="chrome", keep_alive=True,
+        )
+        RemoteWebDriver.__init__(self, command_executor=executor, options=options)
+        try:
+            self._open_context()
+            self.set_page_load_timeout(page_load_timeout)
+        except Exception:
+            try:
+                self._close_context()
+                RemoteWebDriver.quit(self)
+            except Exception:
+                pass
+            raise
+
+    def _open_context(self):
+        # Browser-level commands go through the host's anchor page, never a scrape tab.
+        self.switch_to.window(self.host.anchor_id)
+        self.context_id = self.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+        self.target_id = self.execute_cdp_cmd(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": self.context_id}
+        )["targetId"]
+        self.switch_to.window(self.target_id)
+
+    def _close_context(self):
+        if self.context_id is None:
+            return
+        context_id, self.context_id = self.context_id, None
+        self.switch_to.window(self.host.anchor_id)
+        self.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+
+    @property
+    def window_handles(self):
+        targets = self.execute_cdp_cmd("Target.getTargets", {})["targetInfos"]
+        own = {target["targetId"] for target in targets if target.get("browserContextId") == self.context_id}
+        handles = [handle for handle in super().window_handles if handle in own]
+        return sorted(handles, key=lambda handle: handle != self.target_id)
+
+    def reset_session(self):
+        """Replace the context instead of clearing it, so nothing carries over to the next scrape."""
+        self._close_context()
+        self._open_context()
+
+    def quit(self):
+        try:
+            self._close_context()
+        except Exception:
+            pass  # the browser may already be gone
+        try:
+            super().quit()  # an attached session detaches without closing Chromium
+        finally:
+            self._release(self)
+
+
+class TabbedBrowsers:
+    """Driver factory that packs up to ``tabs_per_browser`` sessions into each Chromium.
+
+    A crashed or hung tab only takes its own context down; a dead browser is
+    replaced once its remaining tabs have been discarded by the pool.
+    """
+
+    def __init__(self, options_factory, driver_path, tabs_per_browser=4, page_load_timeout=60):
+        self.options_factory = options_factory
+        self.driver_path = driver_path
+        self.tabs_per_browser = tabs_per_browser
+        self.page_load_timeout = page_load_timeout
+        self._service = None
+        self._hosts = []
+        self._lock = threading.Lock()
+        self._launch_lock = threading.Lock()
+        self._counters = {"browsers_started": 0, "browsers_lost": 0, "tabs_opened": 0}
+
+    def _service_url(self):
+        with self._lock:
+            if self._service is None:
+                service = Service(self.driver_path)
+                service.start()
+                self._service = service
+            return self._service.service_url
+
+    def _reserve(self):
+        with self._lock:
+            for host in self._hosts:
+                if host.alive and host.tabs < host.max_tabs:
+                    host.tabs += 1
+                    return host
+        return None
+
+    def _host(self):
+        host = self._reserve()
+        if host is not None:
+            return host
+        with self._launch_lock:  # one launch at a time; others reuse its spare tabs
+            host = self._reserve()
+            if host is not None:
+                return host
+            host = BrowserHost(self.options_factory(), self.tabs_per_browser)
+            with self._lock:
+                host.tabs += 1
+                self._hosts.append(host)
+                self._counters["browsers_started"] += 1
+            return host
+
+    def _release(self, driver):
+        host = driver.host
+        with self._lock:
+            host.tabs -= 1
+            finished = host.tabs == 0 and not host.alive
+            if finished:
+                self._hosts.remove(host)
+                self._counters["browsers_lost"] += 1
+        if finished:
+            host.close()
+
+    def __call__(self):
+        host = self._host()
+        try:
+            driver = TabDriver(host, self._service_url(), self.options_factory(), self.page_load_timeout, self._release)
+        except Exception:
+            with self._lock:
+                host.tabs -= 1
+            raise
+        with self._lock:
+            self._counters["tabs_opened"] += 1
+        return driver
+
+    def close(self):
+        with self._lock:
+            hosts, self._hosts = self._hosts, []
+            service, self._service = self._service, None
+        for host in hosts:
+            host.close()
+        if service is not None:
+            service.stop()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tabs_per_browser": self.tabs_per_browser,
+                "browsers": [{"pid": host.pid, "tabs": host.tabs, "alive": host.alive} for host in self._hosts],
+                **self._counters,
+            }
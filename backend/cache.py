@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+
+# -------------------- URL Normalization --------------------
+def normalize_url(url):
+    """Lowercase scheme/host/path and drop query strings, fragments and trailing slashes.
+
+    Query strings on these platforms only carry tracking or UI state
+    (utm_*, ref, lat/lng hints), never which restaurant is shown.
+    """
+    parts = urlsplit(url.strip().lower())
+    host = parts.netloc[4:] if parts.netloc.startswith("www.") else parts.netloc
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme or "https", host, path, "", ""))
+
+
+def slug(text, default="unknown"):
+    """A label made safe to use as one directory name ("..", slashes and all)."""
+    return re.sub(r"[^a-z0-9]+", "_", (text or "").lower()).strip("_") or default
+
+
+# -------------------- Result Cache --------------------
+class ResultCache:
+    """LRU result cache with per-platform TTLs and an optional on-disk tier.
+
+    The disk tier is shared between processes: workers write to it after a
+    scrape and the API process promotes entries to memory on read.
+    """
+
+    def __init__(self, ttls, default_ttl=900, max_entries=512, disk_dir=None):
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (stored_at, platform, result)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def ttl(self, platform):
+        return self.ttls.get(platform, self.default_ttl)
+
+    def _disk_path(self, key, labels):
+        city, restaurant = labels
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, slug(city, "unknown_city"), slug(restaurant, "unknown_restaurant"), f"{digest}.json")
+
+    def _remember(self, key, stored_at, platform, result):
+        self._entries[key] = (stored_at, platform, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get(self, key, platform, labels=(None, None)):
+        """Return ``(result, age_seconds)`` or None when missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, _, result = entry
+                if now - stored_at <= self.ttl(platform):
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return result, now - stored_at
+                del self._entries[key]
+                self._counters["expired"] += 1
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key, labels), encoding="utf-8") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = None
+            if stored and now - stored["stored_at"] <= self.ttl(platform):
+                with self._lock:
+                    self._remember(key, stored["stored_at"], platform, stored["result"])
+                    self._counters["disk_hits"] += 1
+                return stored["result"], now - stored["stored_at"]
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def promote(self, key, platform, result, stored_at):
+        """Memory tier only: for results another process already wrote to disk (or that never go there)."""
+        with self._lock:
+            self._remember(key, stored_at, platform, result)
+
+    def put(self, key, platform, result, labels=(None, None), stored_at=None):
+        stored_at = stored_at or time.time()
+        self.promote(key, platform, result, stored_at)
+
+        if self.disk_dir:
+            path = self._disk_path(key, labels)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "platform": platform, "stored_at": stored_at, "result": result}, f)
+            os.replace(tmp_path, path)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, **self._counters}
@@ -0,0 +1,195 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from lxml import etree
+
+from extractors import has_class
+from waits import wait_for_dom_stable
+
+# Query parameters that number catalog pages, most common first.
+PAGE_PARAMS = ("page", "pageNo", "page_no", "pg", "p")
+PATH_PAGE = re.compile(r"/page/(\d+)/?$")
+
+next_links = etree.XPath("//link[@rel='next']/@href | //a[@rel='next']/@href")
+pager_links = etree.XPath(
+    f"//*[{has_class('pagination')} or {has_class('pager')} or @aria-label='pagination']//a/@href"
+)
+# Infinite scroll containers and "Load more" buttons without an href of their own.
+lazy_markers = etree.XPath(
+    "//*[@data-infinite-scroll or @data-next-page or contains(@class, 'infinite-scroll') or contains(@class, 'load-more')]"
+    " | //button[starts-with(translate(normalize-space(.), 'LOADSHWVIEMR', 'loadshwviemr'), 'load more')"
+    " or starts-with(translate(normalize-space(.), 'LOADSHWVIEMR', 'loadshwviemr'), 'show more')"
+    " or starts-with(translate(normalize-space(.), 'LOADSHWVIEMR', 'loadshwviemr'), 'view more')]"
+)
+
+# Scrolls to the bottom, clicks a visible "Load more"-style button and returns the card count (cards is an XPath).
+SCROLL_SCRIPT = """
+const [cards] = arguments;
+window.scrollTo(0, document.body.scrollHeight);
+const more = Array.from(document.querySelectorAll('button, a:not([href])')).find(
+    (el) => /^(load|show|view) more/i.test(el.innerText.trim()) && el.offsetParent !== null
+);
+if (more) more.click();
+return document.evaluate(`count(${cards})`, document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+"""
+
+
+# -------------------- Pagination --------------------
+class PageScheme:
+    """Catalog pages addressable as ``?<param>=N`` or ``.../page/N``."""
+
+    def __init__(self, url, param):
+        self.url = url
+        self.param = param  # None for /page/N paths
+
+    def page_url(self, number):
+        parts = urlsplit(self.url)
+        if self.param is None:
+            path = PATH_PAGE.sub("", parts.path).rstrip("/") + f"/page/{number}"
+            return urlunsplit(parts._replace(path=path))
+        query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != self.param]
+        return urlunsplit(parts._replace(query=urlencode(query + [(self.param, number)])))
+
+    def current(self):
+        parts = urlsplit(self.url)
+        if self.param is None:
+            match = PATH_PAGE.search(parts.path)
+            return int(match.group(1)) if match else 1
+        value = dict(parse_qsl(parts.query)).get(self.param, "1")
+        return int(value) if value.isdigit() else 1
+
+
+def page_numbers(root, url):
+    """{param: [page numbers]} linked from the pager; param None means /page/N paths."""
+    numbers = {}
+    for href in next_links(root) + pager_links(root):
+        target = urlsplit(urljoin(url, href))
+        query = dict(parse_qsl(target.query))
+        param = next((name for name in PAGE_PARAMS if query.get(name, "").isdigit()), None)
+        if param:
+            numbers.setdefault(param, []).append(int(query[param]))
+            continue
+        match = PATH_PAGE.search(target.path)
+        if match:
+            numbers.setdefault(None, []).append(int(match.group(1)))
+    return numbers
+
+
+def page_scheme(root, url):
+    """How this catalog's pages are addressed, or None when they are not."""
+    numbers = page_numbers(root, url)
+    if not numbers:
+        return None
+    return PageScheme(url, max(numbers, key=lambda param: len(numbers[param])))
+
+
+def links_ahead(root, scheme, number):
+    """True if page ``number``'s pager points past it (a rel=next link or a higher page)."""
+    if next_links(root):
+        return True
+    return any(linked > number for linked in page_numbers(root, scheme.url).get(scheme.param, ()))
+
+
+def is_lazy_loaded(root):
+    return bool(lazy_markers(root))
+
+
+# -------------------- Crawler --------------------
+class CatalogCrawler:
+    """Collects every product of a paginated or lazy-loaded catalog, deduplicated by product id.
+
+    ``extractor`` provides ``header`` and ``iter_keyed_items`` (see MyStoreExtractor).
+    """
+
+    def __init__(self, extractor, max_pages=200, parallel=4):
+        self.extractor = extractor
+        self.max_pages = max_pages
+        self.parallel = parallel
+
+    def crawl(self, url, root, fetch, parallel=None, emit=None, stats=None):
+        """Crawl on from the parsed first page ``root``; returns ``(items, restaurant, city)``.
+
+        ``fetch(page_url)`` returns the HTML of another page (or None on failure)
+        and is called from up to ``parallel`` threads at once. New items of each
+        page pass through ``emit`` (e.g. streams.emit) in page order. ``stats``
+        is filled with the mechanism, pages fetched, duplicates and crawl time.
+        """
+        started = time.perf_counter()
+        parallel = max(1, parallel or self.parallel)
+        emit = emit or (lambda items: items)
+        restaurant, city = self.extractor.header(root)
+
+        seen, items = set(), []
+        counters = {"pages": 1, "duplicates": 0}
+
+        def add(page_root):
+            fresh = []
+            for key, item in self.extractor.iter_keyed_items(page_root):
+                if key in seen:
+                    counters["duplicates"] += 1
+                    continue
+                seen.add(key)
+                fresh.append(item)
+            items.extend(emit(fresh))
+            return len(fresh)
+
+        add(root)
+        scheme = page_scheme(root, url)
+        mechanism = "single_page"
+        if scheme is not None:
+            mechanism = "pagination"
+            if links_ahead(root, scheme, scheme.current()):
+                self._follow(scheme, fetch, parallel, add, counters)
+        elif is_lazy_loaded(root):
+            mechanism = "lazy_load"
+
+        if stats is not None:
+            stats.update({
+                "mechanism": mechanism,
+                "pages": counters["pages"],
+                "products": len(items),
+                "duplicates": counters["duplicates"],
+                "seconds": round(time.perf_counter() - started, 3),
+            })
+        return items, restaurant, city
+
+    def _follow(self, scheme, fetch, parallel, add, counters):
+        """Fetch the following pages ``parallel`` at a time.
+
+        Stops at the first page that adds nothing new or whose pager points
+        no further. Pagers often link only a few pages ahead, so the crawl
+        does not trust them for the page count; at most ``parallel - 1``
+        fetches are wasted past the end.
+        """
+        number = scheme.current() + 1
+        with ThreadPoolExecutor(parallel) as pool:
+            while number <= self.max_pages:
+                window = range(number, min(number + parallel, self.max_pages + 1))
+                counters["pages"] += len(window)
+                pages = pool.map(lambda n: fetch(scheme.page_url(n)), window)
+                for page_number, html in zip(window, pages):
+                    page_root = self.extractor.parse(html) if html else None
+                    if page_root is None or not add(page_root) or not links_ahead(page_root, scheme, page_number):
+                        return
+                number += len(window)
+
+
+# -------------------- Lazy Loading --------------------
+def scroll_until_stable(driver, cards_xpath, timeout=60, round_timeout=5, quiet=0.75, patience=2):
+    """Scroll a lazy-loaded page until ``patience`` rounds in a row add no cards.
+
+    Returns ``(rounds that loaded more cards, final card count)``.
+    """
+    deadline = time.monotonic() + timeout
+    count = driver.execute_script(SCROLL_SCRIPT, cards_xpath)
+    loads, idle = 0, 0
+    while idle < patience and time.monotonic() < deadline:
+        wait_for_dom_stable(driver, min(round_timeout, max(deadline - time.monotonic(), 0.1)), quiet)
+        latest = driver.execute_script(SCROLL_SCRIPT, cards_xpath)
+        if latest > count:
+            loads, idle, count = loads + 1, 0, latest
+        else:
+            idle += 1
+    return loads, count
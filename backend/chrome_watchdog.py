@@ -0,0 +1,185 @@
+import os
+import shutil
+import threading
+
+from browser_profile import kill_tree, stale_profiles
+import telemetry
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# -------------------- Process Table --------------------
+def is_chrome(name):
+    """chromedriver, chromium/chrome and their helper processes (chrome_crashpad, ...)."""
+    return name.startswith(("chrom", "headless_shell"))
+
+
+def read_process(pid):
+    """(name, state, ppid, rss bytes) of ``pid`` from /proc, or None if it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    name = stat[stat.index("(") + 1:stat.rindex(")")]
+    fields = stat.rsplit(")", 1)[1].split()
+    return name, fields[0], int(fields[1]), int(fields[21]) * PAGE_SIZE
+
+
+def command_line(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().decode("utf-8", "replace").split("\0")
+    except OSError:
+        return []
+
+
+def process_table():
+    """{pid: (name, state, ppid, rss)} of this user's processes."""
+    table = {}
+    uid = os.getuid()
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        pid = int(entry)
+        try:
+            if os.stat(f"/proc/{pid}").st_uid != uid:
+                continue
+        except OSError:
+            continue
+        info = read_process(pid)
+        if info is not None:
+            table[pid] = info
+    return table
+
+
+# -------------------- Watchdog --------------------
+class ChromeWatchdog:
+    """Reaps Chromium and chromedriver processes no scrape worker owns any more.
+
+    A browser belongs to a worker while the worker is one of its ancestors.
+    Once the worker dies (killed by the supervisor, crashed) or a quit
+    leaves the browser behind, it is reparented away from the workers and
+    killed, with its helpers, after being seen orphaned on ``grace``
+    consecutive sweeps. Only headless browsers and chromedrivers of this
+    user are touched. Zombies left for this process to reap are reaped,
+    and profile directories no running browser uses are deleted.
+    """
+
+    def __init__(self, owners, interval=30.0, grace=2):
+        # owners() -> pids of the live scrape workers.
+        self.owners = owners
+        self.interval = interval
+        self.grace = grace
+        self.supported = os.path.isdir("/proc")
+        self._suspects = {}
+        self._last = {"processes": 0, "owned": 0, "orphaned": 0, "zombies": 0, "owned_rss": 0, "orphaned_rss": 0}
+        self._counters = {
+            "sweeps": 0, "orphans_killed": 0, "processes_killed": 0, "zombies_reaped": 0, "profiles_removed": 0,
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _is_ours(self, pid, name):
+        if name.startswith("chromedriver"):
+            return True
+        return any(arg == "--headless" or arg.startswith("--headless=") for arg in command_line(pid))
+
+    def sweep(self):
+        """One pass: count browser processes, kill confirmed orphans, reap zombies."""
+        if not self.supported:
+            return
+        owners = set(self.owners())
+        me = os.getpid()
+        table = process_table()
+
+        owned, orphans, zombies, rss = 0, [], 0, {"owned": 0, "orphaned": 0}
+        profiles = set()
+        for pid, (name, state, ppid, size) in table.items():
+            if not is_chrome(name):
+                continue
+            if state == "Z":
+                zombies += 1
+                continue
+            profiles.update(
+                argument.split("=", 1)[1] for argument in command_line(pid) if argument.startswith("--user-data-dir=")
+            )
+            ancestor = ppid
+            while ancestor > 1 and ancestor not in owners and ancestor in table:
+                ancestor = table[ancestor][2]
+            if ancestor in owners:
+                owned += 1
+                rss["owned"] += size
+                continue
+            rss["orphaned"] += size
+            if not (ppid in table and is_chrome(table[ppid][0])) and self._is_ours(pid, name):
+                orphans.append(pid)  # a tree root; its helpers go with it
+
+        reaped = 0
+        for pid, (name, state, ppid, _) in table.items():
+            # Chromium reparented to this process (PID 1 in a container); worker exits are multiprocessing's.
+            if state == "Z" and ppid == me and is_chrome(name) and pid not in owners:
+                try:
+                    os.waitpid(pid, os.WNOHANG)
+                    reaped += 1
+                except ChildProcessError:
+                    pass
+
+        suspects, killed_trees, killed = {}, 0, 0
+        for pid in orphans:
+            seen = self._suspects.get(pid, 0) + 1
+            if seen >= self.grace:
+                killed += kill_tree(pid)
+                killed_trees += 1
+                print(f"Killed orphaned {table[pid][0]} (pid {pid}) and its children.")
+            else:
+                suspects[pid] = seen
+
+        removed = 0
+        for path in stale_profiles(profiles):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+
+        with self._lock:
+            self._suspects = suspects
+            self._last = {
+                "processes": owned + len(orphans) + zombies, "owned": owned, "orphaned": len(orphans),
+                "zombies": zombies, "owned_rss": rss["owned"], "orphaned_rss": rss["orphaned"],
+            }
+            self._counters["sweeps"] += 1
+            self._counters["orphans_killed"] += killed_trees
+            self._counters["processes_killed"] += killed
+            self._counters["zombies_reaped"] += reaped
+            self._counters["profiles_removed"] += removed
+        for state in ("owned", "orphaned", "zombies"):
+            telemetry.CHROME_PROCESSES.labels(state).set(self._last[state])
+        for state, size in rss.items():
+            telemetry.CHROME_RSS.labels(state).set(size)
+        if killed_trees:
+            telemetry.CHROME_REAPED.labels("orphan").inc(killed_trees)
+        if reaped:
+            telemetry.CHROME_REAPED.labels("zombie").inc(reaped)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Chrome watchdog sweep failed: {repr(e)}")
+
+    def start(self):
+        if self._thread is None and self.supported:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="chrome-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {"supported": self.supported, "interval": self.interval, **self._last, **self._counters}
@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolExhaustedError(Exception):
+    """No browser freed up within the acquire timeout: a local shortage, not the site's fault."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# -------------------- Helpers --------------------
+def summarize(samples):
+    """Return count/avg/p50/p95/max (seconds) for a list of timings."""
+    if not samples:
+        return {"count": 0, "avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    n = len(ordered)
+    return {
+        "count": n,
+        "avg": round(sum(ordered) / n, 4),
+        "p50": round(ordered[int(0.50 * (n - 1))], 4),
+        "p95": round(ordered[int(0.95 * (n - 1))], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+# -------------------- Driver Pool --------------------
+class DriverPool:
+    """Bounded pool of warm WebDriver sessions.
+
+    A driver is leased for exactly one scrape, then reset (tabs, cookies and
+    storage cleared) and returned. Drivers are recycled after ``max_uses``
+    leases or as soon as they stop answering a health check.
+    """
+
+    def __init__(self, factory, size=1, max_uses=20, acquire_timeout=60, sample_size=1000, fatal=None, on_lease=None):
+        self.factory = factory
+        # on_lease(seconds) is told how long each lease waited for a driver.
+        self.on_lease = on_lease
+        # fatal(exc) -> True when a scrape error means the driver itself is broken.
+        self.fatal = fatal
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []  # LIFO so the warmest driver is reused first
+        self._uses = {}
+        self._in_use = 0
+        self._waiting = 0
+
+        self._queue_wait = deque(maxlen=sample_size)
+        self._lease_time = deque(maxlen=sample_size)
+        self._counters = {
+            "leases": 0,
+            "created": 0,
+            "recycled": 0,
+            "unhealthy": 0,
+            "reset_failures": 0,
+            "acquire_timeouts": 0,
+            "crashed": 0,
+        }
+
+    # ---------------- Lifecycle ----------------
+    def _create(self):
+        driver = self.factory()
+        with self._lock:
+            self._uses[id(driver)] = 0
+            self._counters["created"] += 1
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        if hasattr(driver, "reset_session"):
+            driver.reset_session()
+            return
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass  # about:blank and some error pages deny storage access
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def warm(self, count=None):
+        """Start up to ``count`` drivers ahead of time (defaults to the pool size).
+
+        Each start holds a lease slot, so warming alongside live scrapes never
+        overfills the pool; it stops early when every slot is taken.
+        """
+        count = self.size if count is None else min(count, self.size)
+        while True:
+            with self._lock:
+                if len(self._idle) + self._in_use >= count:
+                    return
+            if not self._slots.acquire(blocking=False):
+                return
+            try:
+                driver = self._create()
+                with self._lock:
+                    self._idle.append(driver)
+            finally:
+                self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+    # ---------------- Leasing ----------------
+    def _checkout(self):
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                return self._create()
+            if self._is_healthy(driver):
+                return driver
+            with self._lock:
+                self._counters["unhealthy"] += 1
+            self._discard(driver)
+
+    def _checkin(self, driver):
+        with self._lock:
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            worn_out = self._uses[id(driver)] >= self.max_uses
+        if worn_out:
+            with self._lock:
+                self._counters["recycled"] += 1
+            self._discard(driver)
+            return
+
+        try:
+            self._reset(driver)
+        except Exception as e:
+            print(f"Driver reset failed, discarding: {repr(e)}")
+            with self._lock:
+                self._counters["reset_failures"] += 1
+            self._discard(driver)
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    @contextmanager
+    def lease(self):
+        requested = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.acquire_timeout)
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._counters["acquire_timeouts"] += 1
+        if not acquired:
+            raise PoolExhaustedError("No browser became available in time.", self.acquire_timeout)
+
+        try:
+            driver = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        leased = time.perf_counter()
+        with self._lock:
+            self._in_use += 1
+            self._counters["leases"] += 1
+            self._queue_wait.append(leased - requested)
+        if self.on_lease:
+            self.on_lease(leased - requested)
+
+        broken = False
+        try:
+            yield driver
+        except Exception as e:
+            broken = self.fatal is not None and self.fatal(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._lease_time.append(time.perf_counter() - leased)
+            try:
+                if broken:
+                    with self._lock:
+                        self._counters["crashed"] += 1
+                    self._discard(driver)
+                else:
+                    self._checkin(driver)
+            finally:
+                self._slots.release()
+
+    # ---------------- Metrics ----------------
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_uses": self.max_uses,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                **self._counters,
+                "queue_wait": summarize(list(self._queue_wait)),
+                "lease_time": summarize(list(self._lease_time)),
+            }
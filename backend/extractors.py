@@ -0,0 +1,168 @@
+from lxml import etree, html as lxml_html
+
+from selector_registry import registry
+
+# Header placeholders when a page doesn't name its restaurant or city.
+UNKNOWN_RESTAURANT = "UnknownRestaurant"
+UNKNOWN_CITY = "UnknownCity"
+
+
+# -------------------- Helpers --------------------
+def has_class(name):
+    """XPath predicate matching one whole class token (like CSS ``.name``)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def text_of(element):
+    return " ".join(element.text_content().split()) if element is not None else ""
+
+
+def first(elements):
+    return elements[0] if elements else None
+
+
+# -------------------- Extractor Interface --------------------
+class MenuExtractor:
+    """Parses one ``driver.page_source`` snapshot into menu rows.
+
+    Subclasses implement ``header`` and ``iter_items`` with the platform's
+    precompiled selectors (selector_rules/<platform>.json); nothing here
+    makes WebDriver calls.
+    """
+
+    platform = None
+
+    def selectors(self):
+        """The platform's current selector set; look it up once per page."""
+        return registry.get(self.platform)
+
+    def parse(self, page_source):
+        return lxml_html.fromstring(page_source)
+
+    def header(self, root):
+        """Return ``(restaurant, city)``."""
+        raise NotImplementedError
+
+    def iter_items(self, root):
+        """Yield menu rows one at a time, in page order."""
+        raise NotImplementedError
+
+    def extract(self, page_source):
+        """Return ``(items, restaurant, city)``."""
+        root = self.parse(page_source)
+        restaurant, city = self.header(root)
+        return list(self.iter_items(root)), restaurant, city
+
+
+class SwiggyExtractor(MenuExtractor):
+    platform = "swiggy"
+
+    def header(self, root):
+        selectors = self.selectors()
+        restaurant = text_of(first(selectors.restaurant(root))) or UNKNOWN_RESTAURANT
+        city = text_of(first(selectors.city(root))) or UNKNOWN_CITY
+        return restaurant, city
+
+    def iter_items(self, root):
+        selectors = self.selectors()
+        for product in selectors.products(root):
+            name = text_of(first(selectors.name(product))) or "N/A"
+            final_price = first(selectors.final_price(product))
+            mrp_element = first(selectors.mrp(product))
+            if mrp_element is None:
+                mrp_element = final_price
+            mrp = text_of(mrp_element) if mrp_element is not None else "N/A"
+
+            discounted_price = "N/A"
+            if final_price is not None and mrp != text_of(final_price):
+                discounted_price = text_of(final_price)
+
+            yield {
+                "name": name,
+                "MRP": mrp,
+                "Discounted Price": discounted_price,
+            }
+
+
+class ZomatoExtractor(MenuExtractor):
+    platform = "zomato"
+
+    def header(self, root):
+        city = UNKNOWN_CITY
+        restaurant = UNKNOWN_RESTAURANT
+
+        breadcrumb_links = self.selectors().breadcrumbs(root)
+        if len(breadcrumb_links) >= 5:
+            city = (breadcrumb_links[2].get("title") or city).strip()
+            restaurant = (breadcrumb_links[4].get("title") or restaurant).strip()
+        return restaurant, city
+
+    def iter_items(self, root):
+        selectors = self.selectors()
+        for product in selectors.products(root):
+            price = first(selectors.price(product))
+            name = first(selectors.name(product))
+            if price is None or name is None:
+                continue
+            yield {"name": text_of(name), "MRP": text_of(price)}
+
+
+class MyStoreExtractor(MenuExtractor):
+    platform = "mystore"
+
+    # Document structure rather than site markup, so these stay out of the rules file.
+    previous_div = etree.XPath("preceding::div[1]")
+    parent_div = etree.XPath("ancestor::div[1]")
+
+    def container(self, card):
+        """Nearest div opening before the card, like BeautifulSoup's find_previous("div")."""
+        previous = first(self.previous_div(card))
+        parent = first(self.parent_div(card))
+        if previous is None or parent is None:
+            return parent if previous is None else previous
+        # A preceding div inside the card's parent opens after the parent does.
+        return previous if any(a is parent for a in previous.iterancestors()) else parent
+
+    def header(self, root):
+        selectors = self.selectors()
+        restaurant = text_of(first(selectors.restaurant(root))) or UNKNOWN_RESTAURANT
+        city = text_of(first(selectors.city(root))) or UNKNOWN_CITY
+        return restaurant, city
+
+    def key(self, card, item, selectors=None):
+        """Product id: a data-product-id attribute, else the product link, else name/seller/price."""
+        selectors = selectors or self.selectors()
+        product_id = first(selectors.product_id(card)) or first(selectors.product_link(card))
+        if product_id:
+            return product_id.strip()
+        return item["name"], item["seller"], item["Discounted Price"]
+
+    def iter_items(self, root):
+        for _, item in self.iter_keyed_items(root):
+            yield item
+
+    def iter_keyed_items(self, root):
+        """Yield ``(product id, item)`` pairs."""
+        selectors = self.selectors()
+        for card in selectors.cards(root):
+            container = self.container(card)
+            price_new = first(selectors.price_new(container)) if container is not None else None
+            price_old = first(selectors.price_old(container)) if container is not None else None
+            discount = first(selectors.discount(container)) if container is not None else None
+            name = first(selectors.name(card))
+            seller = first(selectors.seller(card))
+
+            item = {
+                "name": text_of(name) if name is not None else "N/A",
+                "MRP": text_of(price_old) if price_old is not None else "N/A",
+                "Discounted Price": text_of(price_new) if price_new is not None else "N/A",
+                "discount": text_of(discount) if discount is not None else "N/A",
+                "seller": text_of(seller) if seller is not None else "N/A"
+            }
+            yield self.key(card, item, selectors), item
+
+
+EXTRACTORS = {
+    extractor.platform: extractor
+    for extractor in (SwiggyExtractor(), ZomatoExtractor(), MyStoreExtractor())
+}
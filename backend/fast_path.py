@@ -0,0 +1,319 @@
+import json
+import os
+import re
+import threading
+
+import httpx
+
+import archive
+from catalog import CatalogCrawler, is_lazy_loaded, page_scheme
+from extractors import EXTRACTORS, UNKNOWN_CITY, UNKNOWN_RESTAURANT
+
+
+class FastPathMiss(Exception):
+    """The page could not be read without a browser."""
+
+
+# -------------------- Embedded State --------------------
+NEXT_DATA = re.compile(r'<script[^>]+id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+# window.__PRELOADED_STATE__ = JSON.parse("...");  (Zomato)
+JSON_PARSE_STATE = re.compile(r'window\.__PRELOADED_STATE__\s*=\s*JSON\.parse\(("(?:[^"\\]|\\.)*")\)', re.S)
+# window.___INITIAL_STATE___ = {...};  (Swiggy) and plain-object __PRELOADED_STATE__
+OBJECT_STATE = re.compile(r'window\.(?:___INITIAL_STATE___|__INITIAL_STATE__|__PRELOADED_STATE__)\s*=\s*(\{.*?\})\s*;?\s*</script>', re.S)
+
+
+def embedded_states(html):
+    """Yield every JSON state blob embedded in the page."""
+    for match in NEXT_DATA.finditer(html):
+        try:
+            yield json.loads(match.group(1))
+        except ValueError:
+            pass
+    for match in JSON_PARSE_STATE.finditer(html):
+        try:
+            yield json.loads(json.loads(match.group(1)))
+        except ValueError:
+            pass
+    for match in OBJECT_STATE.finditer(html):
+        try:
+            yield json.loads(match.group(1))
+        except ValueError:
+            pass
+
+
+def walk(node):
+    """Depth-first iteration over every dict inside a JSON document."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def as_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        digits = re.sub(r"[^\d.]", "", value)
+        try:
+            return float(digits) if digits else None
+        except ValueError:
+            return None
+    return None
+
+
+def known(value, placeholder):
+    """The extractors' placeholder for a missing header becomes None, so callers can fall back to the URL."""
+    return None if value == placeholder else value
+
+
+def format_amount(value):
+    return str(int(value)) if float(value).is_integer() else f"{value:.2f}"
+
+
+# -------------------- Platform Readers --------------------
+class FastPath:
+    """Reads a restaurant page over plain HTTP.
+
+    Tries the embedded JSON state first and the server-rendered DOM second.
+    Either way the result uses the same item schema as the Selenium scrapers.
+    """
+
+    platform = None
+    # Offers only come from embedded state; where they matter, a DOM-only read is left to the browser.
+    dom_without_offers = True
+
+    def api_url(self, url):
+        """Optional menu API endpoint to fetch instead of the page itself."""
+        return None
+
+    def items_from_state(self, state):
+        return []
+
+    def names_from_state(self, state):
+        return None, None
+
+    def offers_from_state(self, state):
+        return [], []
+
+    def extract(self, client, url, details=None):
+        """``details`` (a dict) receives reader-specific facts about the fetch, e.g. crawl stats."""
+        api_url = self.api_url(url)
+        response = client.get(api_url or url)
+        if response.status_code != 200:
+            raise FastPathMiss(f"HTTP {response.status_code}")
+        archive.capture("api" if api_url else "http", response.text, api_url or url)
+        return self.read(response.text, api=bool(api_url))
+
+    def read(self, text, api=False):
+        """Menu of a fetched page, or of a menu-API body when ``api``: embedded state first, then the HTML."""
+        states = [json.loads(text)] if api else list(embedded_states(text))
+        for state in states:
+            items = self.items_from_state(state)
+            if items:
+                restaurant, city = self.names_from_state(state)
+                discounts, coupons = self.offers_from_state(state)
+                return items, restaurant, city, discounts, coupons
+
+        if not api:
+            items, restaurant, city = EXTRACTORS[self.platform].extract(text)
+            if items and not self.dom_without_offers:
+                raise FastPathMiss("Offers are only shown in the browser")
+            if items:
+                return items, known(restaurant, UNKNOWN_RESTAURANT), known(city, UNKNOWN_CITY), [], []
+        raise FastPathMiss("No menu found in embedded state or server-rendered HTML")
+
+
+def dedupe(items, keys):
+    seen, unique = set(), []
+    for key, item in zip(keys, items):
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+class SwiggyFastPath(FastPath):
+    platform = "swiggy"
+    dom_without_offers = False
+    RESTAURANT_ID = re.compile(r"rest(\d+)")
+
+    def api_url(self, url):
+        # e.g. SWIGGY_MENU_API="https://www.swiggy.com/dapi/menu/pl?page-type=REGULAR_MENU&complete-menu=true&lat=26.45&lng=80.33&restaurantId={restaurant_id}"
+        template = os.getenv("SWIGGY_MENU_API")
+        match = self.RESTAURANT_ID.search(url)
+        return template.format(restaurant_id=match.group(1)) if template and match else None
+
+    def items_from_state(self, state):
+        # Menu items carry prices in paise: {"id", "name", "price"|"defaultPrice", "finalPrice"?}
+        items, keys = [], []
+        for node in walk(state):
+            price = as_number(node.get("price", node.get("defaultPrice")))
+            if not isinstance(node.get("name"), str) or price is None or ("isVeg" not in node and "category" not in node):
+                continue
+            final = as_number(node.get("finalPrice"))
+            items.append({
+                "name": node["name"].strip(),
+                "MRP": format_amount(price / 100),
+                "Discounted Price": format_amount(final / 100) if final is not None and final != price else "N/A",
+            })
+            keys.append(node.get("id") or (node["name"], price))
+        return dedupe(items, keys)
+
+    def names_from_state(self, state):
+        for node in walk(state):
+            if isinstance(node.get("name"), str) and isinstance(node.get("city"), str) and "cuisines" in node:
+                return node["name"].strip(), node["city"].strip()
+        return None, None
+
+    def offers_from_state(self, state):
+        discounts, coupons = [], []
+        for node in walk(state):
+            header = node.get("header")
+            if not isinstance(header, str) or not ("couponCode" in node or "offerIds" in node):
+                continue
+            if header.strip() and header.strip() not in discounts:
+                discounts.append(header.strip())
+            coupon = node.get("couponCode") or node.get("description")
+            if isinstance(coupon, str) and coupon.strip() and coupon.strip() not in coupons:
+                coupons.append(coupon.strip())
+        return discounts, coupons
+
+
+class ZomatoFastPath(FastPath):
+    platform = "zomato"
+
+    def items_from_state(self, state):
+        # Menu items carry rupee prices: {"id", "name", "price", "display_price"?, "item_state"?}
+        items, keys = [], []
+        for node in walk(state):
+            price = as_number(node.get("display_price", node.get("price")))
+            if not isinstance(node.get("name"), str) or price is None or ("desc" not in node and "item_state" not in node):
+                continue
+            items.append({"name": node["name"].strip(), "MRP": f"₹{format_amount(price)}"})
+            keys.append(node.get("id") or (node["name"], price))
+        return dedupe(items, keys)
+
+    def names_from_state(self, state):
+        for node in walk(state):
+            if isinstance(node.get("name"), str) and isinstance(node.get("city"), str) and "res_id" in node:
+                return node["name"].strip(), node["city"].strip()
+        return None, None
+
+
+class MyStoreFastPath(FastPath):
+    """Crawls every catalog page over HTTP, several pages at a time."""
+
+    platform = "mystore"
+
+    def __init__(self):
+        self.crawler = CatalogCrawler(
+            EXTRACTORS["mystore"],
+            max_pages=int(os.getenv("MYSTORE_MAX_PAGES", "200")),
+            parallel=int(os.getenv("MYSTORE_PAGE_WORKERS", "4")),
+        )
+
+    def extract(self, client, url, details=None):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise FastPathMiss(f"HTTP {response.status_code}")
+
+        extractor = EXTRACTORS[self.platform]
+        root = extractor.parse(response.text)
+        if page_scheme(root, url) is None and is_lazy_loaded(root):
+            raise FastPathMiss("Lazy-loaded catalog needs the browser")
+        snapshots = archive.current()  # pages are fetched on the crawler's threads
+        archive.capture("http", response.text, url, snapshots)
+
+        def fetch(page_url):
+            page = client.get(page_url)
+            if page.status_code != 200:
+                return None
+            archive.capture("http", page.text, page_url, snapshots)
+            return page.text
+
+        stats = {}
+        items, restaurant, city = self.crawler.crawl(url, root, fetch, stats=stats)
+        if not items:
+            raise FastPathMiss("No products in the server-rendered catalog")
+        if details is not None:
+            details.update(stats, fetched_by="http")
+        return items, known(restaurant, UNKNOWN_RESTAURANT), known(city, UNKNOWN_CITY), [], []
+
+
+FAST_PATHS = {reader.platform: reader for reader in (SwiggyFastPath(), ZomatoFastPath(), MyStoreFastPath())}
+
+
+# -------------------- Client --------------------
+class FastPathClient:
+    """Per-process keep-alive HTTP client plus hit-rate counters."""
+
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/124.0 Safari/537.36"
+        ),
+        "Accept": "text/html,application/json;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-IN,en;q=0.9",
+    }
+
+    def __init__(self, timeout=10.0, max_connections=10):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    headers=self.HEADERS,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                )
+            return self._client
+
+    def _count(self, platform, outcome):
+        with self._lock:
+            counters = self._counters.setdefault(platform, {"attempts": 0, "hits": 0, "misses": 0, "errors": 0})
+            counters["attempts"] += 1
+            counters[outcome] += 1
+
+    def extract(self, platform, url, details=None):
+        """Return the scraper 5-tuple, or None when the browser is needed."""
+        reader = FAST_PATHS.get(platform)
+        if reader is None:
+            return None
+        try:
+            result = reader.extract(self.client, url, details)
+        except FastPathMiss as e:
+            print(f"Fast path miss for {url}: {e}")
+            self._count(platform, "misses")
+            return None
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Fast path error for {url}: {repr(e)}")
+            self._count(platform, "errors")
+            return None
+        self._count(platform, "hits")
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                platform: {**counters, "hit_rate": round(counters["hits"] / counters["attempts"], 4)}
+                for platform, counters in self._counters.items()
+            }
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
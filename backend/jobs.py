@@ -0,0 +1,495 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+from browser_profile import kill_tree, process_tree_rss
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# -------------------- Job Store --------------------
+class JobStore:
+    """SQLite-backed job queue shared by the API process and its workers."""
+
+    def __init__(self, path, max_queued=100, retention=24 * 3600):
+        self.path = path
+        self.max_queued = max_queued
+        self.retention = retention
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    worker_id TEXT,
+                    result TEXT,
+                    error TEXT,
+                    status_code INTEGER,
+                    batch_id TEXT,
+                    cache_key TEXT,
+                    stream INTEGER DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    pid INTEGER,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    jobs_done INTEGER DEFAULT 0,
+                    stats TEXT
+                );
+            """)
+            self._add_missing_columns(conn, "jobs", {"batch_id": "TEXT", "cache_key": "TEXT", "stream": "INTEGER DEFAULT 0"})
+            conn.executescript("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+                CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id, finished_at);
+                CREATE INDEX IF NOT EXISTS idx_jobs_cache_key ON jobs (cache_key, status);
+            """)
+
+    @staticmethod
+    def _add_missing_columns(conn, table, columns):
+        """Bring databases created by older versions up to the current schema."""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    # ---------------- API side ----------------
+    def enqueue(self, url, platform, cache_key=None, stream=False):
+        return self.enqueue_many([(url, platform, cache_key)], stream=stream)[0]
+
+    def enqueue_many(self, entries, batch_id=None, stream=False):
+        """Queue ``(url, platform, cache_key)`` entries atomically: all of them or none.
+
+        An entry whose cache key already has a queued or running job is
+        coalesced onto that job instead of queueing a second scrape; those
+        jobs come back with ``coalesced`` set. ``stream`` jobs spool their
+        items as they are extracted (see streams.py).
+        """
+        now = time.time()
+        jobs = []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                    (now - self.retention,),
+                )
+                new_rows, claimed_keys = [], {}
+                for url, platform, cache_key in entries:
+                    active = None
+                    if cache_key:
+                        active = claimed_keys.get(cache_key) or conn.execute(
+                            "SELECT id FROM jobs WHERE cache_key = ? AND status IN ('queued', 'running') LIMIT 1",
+                            (cache_key,),
+                        ).fetchone()
+                    if active:
+                        jobs.append((active[0], True))
+                        continue
+                    job_id = uuid.uuid4().hex
+                    new_rows.append((job_id, url, platform, now, batch_id, cache_key, int(stream)))
+                    jobs.append((job_id, False))
+                    if cache_key:
+                        claimed_keys[cache_key] = (job_id,)
+
+                queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued + len(new_rows) > self.max_queued:
+                    raise QueueFullError(
+                        f"Scrape queue is full ({queued} jobs waiting, {len(new_rows)} requested, "
+                        f"limit {self.max_queued})."
+                    )
+                conn.executemany(
+                    "INSERT INTO jobs (id, url, platform, status, created_at, batch_id, cache_key, stream) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                    new_rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [{**self.get(job_id), "coalesced": coalesced} for job_id, coalesced in jobs]
+
+    def record_done(self, url, platform, result, cache_key=None):
+        """Store an already-finished job, e.g. one answered from the cache."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, url, platform, status, created_at, started_at, finished_at, "
+                "result, status_code, cache_key) VALUES (?, ?, ?, 'done', ?, ?, ?, ?, 200, ?)",
+                (job_id, url, platform, now, now, now, json.dumps(result), cache_key),
+            )
+        return self.get(job_id)
+
+    def finished_jobs(self, job_ids):
+        """Finished jobs among ``job_ids``, oldest first."""
+        job_ids = list(job_ids)
+        rows = []
+        with self._connect() as conn:
+            for start in range(0, len(job_ids), 500):
+                chunk = job_ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows.extend(conn.execute(
+                    f"SELECT * FROM jobs WHERE id IN ({placeholders}) AND status IN ('done', 'failed')",
+                    chunk,
+                ).fetchall())
+        return sorted((self._to_dict(row) for row in rows), key=lambda job: job["finished_at"])
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def counts(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def workers(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM workers ORDER BY worker_id").fetchall()
+        workers = []
+        for row in rows:
+            worker = dict(row)
+            worker["stats"] = json.loads(worker["stats"]) if worker["stats"] else {}
+            workers.append(worker)
+        return workers
+
+    def requeue_orphans(self):
+        """Put jobs left 'running' by a previous process back on the queue."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, worker_id = NULL WHERE status = 'running'"
+            )
+            conn.execute("DELETE FROM workers")
+        return cur.rowcount
+
+    # ---------------- Worker side ----------------
+    def claim(self, worker_id, caps=None):
+        """Take the oldest queued job whose platform is below its concurrency cap."""
+        caps = caps or {}
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            running = conn.execute(
+                "SELECT platform, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY platform"
+            ).fetchall()
+            blocked = [platform for platform, count in running if count >= caps.get(platform, float("inf"))]
+            placeholders = ", ".join("?" for _ in blocked)
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE status = 'queued' AND platform NOT IN ({placeholders}) "
+                "ORDER BY created_at LIMIT 1",
+                blocked,
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, worker_id = ? WHERE id = ?",
+                (time.time(), worker_id, row["id"]),
+            )
+            conn.execute("COMMIT")
+        return self._to_dict(row)
+
+    def finish(self, job_id, result):
+        """``result`` is JSON-able, or already-encoded JSON text."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, result = ?, status_code = 200 WHERE id = ?",
+                (time.time(), result if isinstance(result, str) else json.dumps(result), job_id),
+            )
+
+    def fail(self, job_id, error, status_code=500):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = ?, status_code = ? WHERE id = ?",
+                (time.time(), error, status_code, job_id),
+            )
+
+    def running(self, worker_id):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'running' AND worker_id = ?", (worker_id,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def fail_running(self, worker_id, error, status_code=500, job_ids=None):
+        """Fail the jobs a dead worker was running; returns them.
+
+        With ``job_ids`` only those jobs fail, and the worker's other running
+        jobs go back on the queue.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'running' AND worker_id = ?", (worker_id,)
+            ).fetchall()
+            failed = [row for row in rows if job_ids is None or row["id"] in job_ids]
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = ?, status_code = ? WHERE id = ?",
+                [(time.time(), error, status_code, row["id"]) for row in failed],
+            )
+            conn.executemany(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, worker_id = NULL WHERE id = ?",
+                [(row["id"],) for row in rows if row not in failed],
+            )
+            conn.execute("COMMIT")
+        return [self._to_dict(row) for row in failed]
+
+    def heartbeat(self, worker_id, jobs_done, stats):
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO workers (worker_id, pid, started_at, heartbeat_at, jobs_done, stats)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(worker_id) DO UPDATE SET
+                       started_at = CASE WHEN workers.pid = excluded.pid THEN workers.started_at
+                                         ELSE excluded.started_at END,
+                       pid = excluded.pid, heartbeat_at = excluded.heartbeat_at,
+                       jobs_done = excluded.jobs_done, stats = excluded.stats""",
+                (worker_id, os.getpid(), time.time(), time.time(), jobs_done, json.dumps(stats)),
+            )
+
+
+# -------------------- Worker Process --------------------
+def worker_main(worker_id, db_path, handler, stats, cleanup, stop_event, caps=None, poll_interval=0.5, threads=1,
+                max_jobs=0, warmup=None):
+    """Drain the queue until ``stop_event`` is set, or until ``max_jobs`` jobs were taken.
+
+    ``handler(job)`` returns the result (JSON-able or JSON text); exceptions carrying a
+    ``status_code``/``detail`` (e.g. HTTPException) keep their status code.
+    With ``threads`` > 1 the process runs that many jobs at once (e.g. one
+    per browser tab). ``warmup()`` (e.g. starting browsers) runs on a side
+    thread while jobs are already being taken; a heartbeat follows it.
+    """
+    store = JobStore(db_path)
+    progress = {"jobs_done": 0, "claimed": 0}
+    lock = threading.Lock()
+
+    def drain():
+        while not stop_event.is_set():
+            with lock:
+                if max_jobs and progress["claimed"] >= max_jobs:
+                    return  # recycled: the supervisor starts a fresh process
+                progress["claimed"] += 1
+            job = store.claim(worker_id, caps)
+            if job is None:
+                with lock:
+                    progress["claimed"] -= 1
+                stop_event.wait(poll_interval)
+                continue
+
+            try:
+                store.finish(job["id"], handler(job))
+            except Exception as e:
+                if not hasattr(e, "status_code"):
+                    traceback.print_exc()
+                status_code = getattr(e, "status_code", 500)
+                detail = getattr(e, "detail", None) or f"Scraping failed: {str(e)}"
+                store.fail(job["id"], str(detail), status_code)
+
+            with lock:
+                progress["jobs_done"] += 1
+                jobs_done = progress["jobs_done"]
+            store.heartbeat(worker_id, jobs_done, stats())
+
+    def warm():
+        try:
+            warmup()
+        except Exception:
+            traceback.print_exc()
+        with lock:
+            jobs_done = progress["jobs_done"]
+        store.heartbeat(worker_id, jobs_done, stats())
+
+    store.heartbeat(worker_id, 0, stats())
+    if warmup:
+        threading.Thread(target=warm, name=f"{worker_id}-warmup", daemon=True).start()
+    try:
+        runners = [
+            threading.Thread(target=drain, name=f"{worker_id}-slot-{i}", daemon=True)
+            for i in range(1, threads)
+        ]
+        for runner in runners:
+            runner.start()
+        drain()
+        for runner in runners:
+            runner.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cleanup()
+
+
+class WorkerPool:
+    """Scrape worker processes under a supervisor thread.
+
+    The supervisor replaces a worker that exits (recycled after ``max_jobs``
+    jobs, or crashed) and kills and replaces one whose job has run longer
+    than ``job_timeout`` seconds or whose process tree (the worker plus its
+    chromedriver and Chromium children) holds more than ``max_rss`` bytes.
+    The jobs a killed or crashed worker was running are failed, except that
+    on a timeout only the overdue jobs fail and the worker's other jobs are
+    requeued. Zero disables a limit.
+    """
+
+    REASONS = ("recycled", "crashed", "timeout", "memory")
+
+    def __init__(self, db_path, handler, stats, cleanup, size=1, caps=None, threads=1,
+                 max_jobs=0, job_timeout=0, max_rss=0, check_interval=5.0, on_restart=None, warmup=None):
+        self.db_path = db_path
+        self.threads = threads
+        self.caps = caps or {}
+        self.handler = handler
+        self.stats_hook = stats
+        self.cleanup = cleanup
+        self.warmup = warmup
+        self.size = size
+        self.max_jobs = max_jobs
+        self.job_timeout = job_timeout
+        self.max_rss = max_rss
+        self.check_interval = check_interval
+        # on_restart(reason, failed_jobs) runs in the API process after each replacement.
+        self.on_restart = on_restart
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._processes = {}
+        self._rss = {}
+        self._restarts = dict.fromkeys(self.REASONS, 0)
+        self._lock = threading.Lock()
+        self._supervisor = None
+
+    def _spawn(self, worker_id):
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(worker_id, self.db_path, self.handler, self.stats_hook, self.cleanup, self._stop, self.caps),
+            kwargs={"threads": self.threads, "max_jobs": self.max_jobs, "warmup": self.warmup},
+            name=f"scrape-{worker_id}",
+        )
+        process.start()
+        with self._lock:
+            self._processes[worker_id] = process
+
+    def start(self):
+        self._stop.clear()
+        for i in range(self.size):
+            self._spawn(f"worker-{i}")
+        self._supervisor = threading.Thread(target=self._supervise, name="worker-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def pids(self):
+        """Every worker process pid, including ones that exited but are not yet replaced."""
+        with self._lock:
+            return [process.pid for process in self._processes.values()]
+
+    # ---------------- Supervision ----------------
+    def _replace(self, worker_id, process, reason, error=None, status_code=500, job_ids=None):
+        if process.is_alive():
+            kill_tree(process.pid)
+        process.join(10)
+        failed = JobStore(self.db_path).fail_running(
+            worker_id, error or f"Worker exited with code {process.exitcode}", status_code, job_ids
+        ) if reason != "recycled" else []
+        with self._lock:
+            self._restarts[reason] += 1
+            self._rss.pop(worker_id, None)
+        if reason != "recycled":
+            print(f"Replacing {worker_id} (pid {process.pid}): {reason}; failed jobs {[job['id'] for job in failed]}")
+        if self.on_restart:
+            self.on_restart(reason, failed)
+        if not self._stop.is_set():
+            self._spawn(worker_id)
+
+    def check(self):
+        """One supervision pass over every worker."""
+        store = JobStore(self.db_path)
+        with self._lock:
+            processes = list(self._processes.items())
+        for worker_id, process in processes:
+            if self._stop.is_set():
+                return
+            if not process.is_alive():
+                self._replace(worker_id, process, "recycled" if process.exitcode == 0 else "crashed")
+                continue
+            rss = process_tree_rss(process.pid)
+            with self._lock:
+                self._rss[worker_id] = rss
+            if self.max_rss and rss > self.max_rss:
+                self._replace(
+                    worker_id, process, "memory",
+                    f"Worker exceeded its {self.max_rss // 2 ** 20} MB memory limit ({rss // 2 ** 20} MB)",
+                )
+                continue
+            if self.job_timeout:
+                overdue = [
+                    job for job in store.running(worker_id)
+                    if job["started_at"] and time.time() - job["started_at"] > self.job_timeout
+                ]
+                if overdue:
+                    self._replace(
+                        worker_id, process, "timeout",
+                        f"Scrape exceeded the {self.job_timeout:g}s wall-clock limit", status_code=504,
+                        job_ids={job["id"] for job in overdue},
+                    )
+
+    def _supervise(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Worker supervision failed: {repr(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_jobs": self.max_jobs,
+                "job_timeout": self.job_timeout,
+                "max_rss": self.max_rss,
+                "workers": {
+                    worker_id: {"pid": process.pid, "alive": process.is_alive(), "rss": self._rss.get(worker_id)}
+                    for worker_id, process in self._processes.items()
+                },
+                "restarts": dict(self._restarts),
+            }
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+        with self._lock:
+            processes, self._processes = list(self._processes.values()), {}
+        for process in processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
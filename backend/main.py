@@ -1,50 +1,46 @@
 import os
+import io
+import math
+import random
 import csv
+import json
 import time
-from fastapi import FastAPI, HTTPException
+import uuid
+from contextlib import nullcontext
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
-from selenium.common.exceptions import (
-    ElementClickInterceptedException,
-    ElementNotInteractableException,
-    TimeoutException
-)
-from bs4 import BeautifulSoup
+# The browser stack (Selenium, lxml, httpx) lives in scrapers.py and is only
+# imported inside scrape workers (browser_stack); the API process never loads it.
+from cache import ResultCache, normalize_url
+from storage import CsvStorage, MultiStorage, SQLiteStorage
+from archive import HtmlArchive
+import archive
+from jobs import JobStore, QueueFullError, WorkerPool
+from driver_pool import PoolExhaustedError
+from breaker import CircuitBreakers
+from chrome_watchdog import ChromeWatchdog
+from scheduler import Scheduler
+import streams
+import telemetry
+from telemetry import span
+from matching import ItemMatcher, normalize_name
+from prices import parse_offers
 
 app = FastAPI()
-
-# -------------------- Chrome Driver Path --------------------
-CHROMEDRIVER_PATH = "/opt/homebrew/bin/chromedriver"  
+STARTED_AT = time.time()  # module import; startup timings are measured from here
 
 # -------------------- Request Schema --------------------
 class ScrapeRequest(BaseModel):
     url: str
-
-# -------------------- Chrome Driver --------------------
-def get_chrome_driver():
-    options = Options()
-    options.add_argument("--headless=new")  # or --headless=chrome if "new" causes issues
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-software-rasterizer")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--remote-debugging-port=9222")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-
-    options.binary_location = os.getenv("CHROME_BIN", "/usr/bin/chromium")
-    service = Service(os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
-
-    return webdriver.Chrome(service=service, options=options)
-
+    force_refresh: bool = False
 
 
+class ScheduleRequest(BaseModel):
+    url: str
+    interval: float  # seconds between re-scrapes
+    priority: float = 1.0
 
 # -------------------- Identify Platform --------------------
 def identify_website(url: str):
@@ -56,316 +52,873 @@ def identify_website(url: str):
         return "mystore"
     return None
 
-# -------------------- Scrapers --------------------
-
-class SwiggyDiscountCouponExtractor:
-    def __init__(self, driver):
-        self.driver = driver
+# -------------------- Helpers --------------------
+def extract_restaurant_and_city(url):
+    url = url.lower()
+    parts = url.split('/')
+    restaurant = 'unknown_restaurant'
+    city = 'unknown_city'
 
+    if "swiggy" in url or "zomato" in url:
+        if len(parts) > 4:
+            city = parts[3]
+        if len(parts) > 5:
+            restaurant = parts[5].split('?')[0].replace('-', '_')
+    elif "mystore" in url:
+        city = "mystore"
+        restaurant = parts[2].split('.')[0]
+    return restaurant.strip('_'), city.strip('_')
 
-    def extract_discounts_and_coupons(self):
-        discounts, coupons = [], []
 
-        try:
-            print("Finding offer cards...")
-            cards = self.driver.find_elements(By.XPATH, "//div[starts-with(@data-testid, 'offer-card-container-')]")
-            print(f"Found {len(cards)} offer cards.")
+# -------------------- Storage --------------------
+STORAGE_DB_PATH = os.getenv("STORAGE_DB_PATH", os.path.join("data", "scrapes.db"))
 
-            for i in range(len(cards)):
-                try:
-                    cards = self.driver.find_elements(By.XPATH, "//div[starts-with(@data-testid, 'offer-card-container-')]")
-                    card = cards[i]
+# Scrape history; also answers the read endpoints.
+history = SQLiteStorage(STORAGE_DB_PATH)
 
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", card)
-                    time.sleep(0.5)
-                    print(f"Card {i+1} text: {card.text.strip()[:80]}")
+STORAGE_BACKENDS = {
+    "sqlite": lambda: history,
+    "csv": CsvStorage,
+}
 
+storage = MultiStorage([
+    STORAGE_BACKENDS[name.strip()]()
+    for name in os.getenv("STORAGE_BACKENDS", "sqlite").split(",")
+    if name.strip()
+], timer=span)
 
-                    try:
-                        card.click()
-                    except ElementClickInterceptedException:
-                        self.driver.execute_script("arguments[0].click();", card)
-                    time.sleep(2)
+# Every page snapshot behind a scrape, for replaying through new extractors
+# (python -m archive reextract). An empty ARCHIVE_DIR turns it off.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("data", "archive"))
+html_archive = HtmlArchive(ARCHIVE_DIR, level=int(os.getenv("ARCHIVE_ZSTD_LEVEL", "9"))) if ARCHIVE_DIR else None
 
-                    print(f"Clicked card {i+1}")
 
-                    try:
-                        WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'igolxO')]"))
-                        )
-                        time.sleep(0.5)
+def archive_scrape(platform, city, restaurant, url, source, scrape_id):
+    """Store what this scrape captured; the scrape itself never fails over its archive copy."""
+    snapshots = archive.current()
+    if html_archive is None or snapshots is None or not snapshots.pages:
+        return None
+    try:
+        with span("archive"):
+            return html_archive.save(snapshots, platform, city, restaurant, url, source, scrape_id=scrape_id)
+    except Exception as e:
+        print(f"Archiving {url} failed: {repr(e)}")
+        return None
 
-                        heading_elements = self.driver.find_elements(By.XPATH, "//div[contains(@class, 'xtIpQ')]")
-                        for el in heading_elements:
-                            text = el.text.strip()
-                            if text and text not in discounts:
-                                discounts.append(text)
 
-                        coupon_elements = self.driver.find_elements(By.XPATH, "//div[contains(@class, 'hHZVJN')]")
-                        for el in coupon_elements:
-                            text = el.text.strip()
-                            if text and text not in coupons:
-                                coupons.append(text)
+# -------------------- Cross-Platform Matching --------------------
+matcher = ItemMatcher(threshold=float(os.getenv("MATCH_THRESHOLD", "0.6")))
 
-                        close_btn = self.driver.find_element(By.XPATH, "//div[contains(@class, 'dnGnZy') and @aria-hidden='true']")
-                        close_btn.click()
-                        time.sleep(0.5)
-                    except TimeoutException:
-                        print(f"Timeout waiting for modal content on card {i+1}.")
-                        close_btn = self.driver.find_element(By.XPATH, "//div[contains(@class, 'dnGnZy') and @aria-hidden='true']")
-                        close_btn.click()
-                        time.sleep(0.5)
 
+def compare_restaurants(city, restaurant=None):
+    """Swiggy-vs-Zomato price tables for restaurants listed on both platforms."""
+    grouped = {}
+    for row in history.restaurants(city):
+        grouped.setdefault(normalize_name(row["name"]), {})[row["platform"]] = row
+    wanted = normalize_name(restaurant) if restaurant else None
 
-                except Exception as e:
-                    print(f"Error processing card {i+1}: {repr(e)}")
-                    
+    comparisons = []
+    for key, platforms in grouped.items():
+        if wanted and key != wanted:
+            continue
+        if "swiggy" not in platforms or "zomato" not in platforms:
+            continue
+        swiggy, zomato = platforms["swiggy"], platforms["zomato"]
+        table = matcher.compare(
+            (city, key), history.current_menu(swiggy["id"]), history.current_menu(zomato["id"])
+        )
+        comparisons.append({"city": city, "restaurant": swiggy["name"], "zomato_restaurant": zomato["name"], **table})
+    return comparisons
+
+
+# -------------------- Scrape Jobs --------------------
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join("data", "jobs.db"))
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "0.5"))
+# Spools of ?stream=true scrapes, written by workers and tailed by the API.
+STREAM_DIR = os.getenv("STREAM_DIR", os.path.join("data", "streams"))
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "0.2"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600)))
+
+
+def parse_platform_values(spec):
+    """Parse "swiggy=2,zomato=1" into {"swiggy": 2, "zomato": 1}."""
+    values = {}
+    for entry in spec.split(","):
+        if "=" in entry:
+            platform, value = entry.split("=", 1)
+            values[platform.strip().lower()] = int(value)
+    return values
+
+
+def parse_url_csv(text):
+    """URLs from a CSV upload: the "url" column if there is a header, else the first column."""
+    rows = [row for row in csv.reader(io.StringIO(text)) if row]
+    column = 0
+    if rows:
+        header = [cell.strip().lower() for cell in rows[0]]
+        if "url" in header:
+            column = header.index("url")
+            rows = rows[1:]
+    return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+
+
+job_store = JobStore(
+    JOBS_DB_PATH,
+    max_queued=int(os.getenv("MAX_QUEUED_JOBS", "1000")),
+    retention=JOB_RETENTION_SECONDS,
+)
 
-        except Exception as e:
-            print("Error during overall coupon extraction:", repr(e))
 
-        return discounts, coupons
+# Trips per platform on consecutive timeouts or empty menus; shared by the API and the workers.
+breakers = CircuitBreakers(
+    JOBS_DB_PATH,
+    failures=int(os.getenv("BREAKER_FAILURES", "3")),
+    cooldown=float(os.getenv("BREAKER_COOLDOWN", "30")),
+    max_cooldown=float(os.getenv("BREAKER_MAX_COOLDOWN", "600")),
+)
 
 
+def circuit_open_error(platform, retry_after):
+    seconds = math.ceil(retry_after)
+    return HTTPException(
+        status_code=503,
+        detail=f"{platform.title()} scrapes are failing; not scraping it for another {seconds}s.",
+        headers={"Retry-After": str(seconds)},
+    )
 
-def scrape_swiggy(url):
-    driver = get_chrome_driver()
-    driver.get(url)
 
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'QMaYM')]"))
+def pool_exhausted_error(retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    return HTTPException(
+        status_code=503,
+        detail=f"All browsers are busy; try again in {seconds}s.",
+        headers={"Retry-After": str(seconds)},
     )
 
-    try:
-        city = driver.find_element(By.XPATH, "//a[contains(@href, '/city/')]/span[@itemprop='name']").text.strip()
-    except NoSuchElementException:
-        city = "UnknownCity"
 
-    try:
-        restaurant = driver.find_element(By.XPATH, "//span[@class='_2vs3E']").text.strip()
-    except NoSuchElementException:
-        restaurant = "UnknownRestaurant"
-
-    
-    items = []
-    products = driver.find_elements(By.XPATH, "//div[contains(@class, 'QMaYM')]")
-    for product in products:
-        try:
-            name = product.find_element(By.XPATH, ".//div[@aria-hidden='true' and contains(@class, 'dwSeRx')]").text.strip()
-        except NoSuchElementException:
-            name = "N/A"
+def check_circuit(platform):
+    """Fail fast with a 503 while the platform's breaker is open."""
+    retry_after = breakers.retry_after(platform)
+    if retry_after is not None:
+        raise circuit_open_error(platform, retry_after)
 
-        mrp = "N/A"
-        discounted_price = "N/A"
 
-        try:
-            mrp = product.find_element(By.XPATH, ".//div[contains(@class, 'hTspMV')]").text.strip()
-        except NoSuchElementException:
-            try:
-                mrp = product.find_element(By.XPATH, ".//div[contains(@class, 'chixpw')]").text.strip()
-            except NoSuchElementException:
-                pass
-
-        try:
-            discounted_element = product.find_element(By.XPATH, ".//div[contains(@class, 'chixpw')]")
-            if mrp != discounted_element.text.strip():
-                discounted_price = discounted_element.text.strip()
-        except NoSuchElementException:
-            pass
+SCRAPE_RETRIES = int(os.getenv("SCRAPE_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", "2"))
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "30"))
 
-        items.append({
-            "name": name,
-            "MRP": mrp,
-            "Discounted Price": discounted_price,
-        })
 
-    
-    discount_coupon_extractor = SwiggyDiscountCouponExtractor(driver)
-    discounts, coupons = discount_coupon_extractor.extract_discounts_and_coupons()
+_browser_stack = None
 
-    driver.quit()
-    return items, restaurant, city, discounts, coupons
 
+def browser_stack():
+    """scrapers.py (Selenium, lxml, httpx), imported on first use; only scrape workers get this far."""
+    global _browser_stack
+    if _browser_stack is None:
+        import scrapers
+        _browser_stack = scrapers
+    return _browser_stack
 
-def scrape_zomato(url):
-    driver = get_chrome_driver()
-    driver.get(url)
 
-    try:
-        WebDriverWait(driver, 100).until(
-            EC.presence_of_element_located((By.XPATH, "//div[@class= 'sc-nUItV gZWJDT']"))
-        )
-    except Exception:
-        driver.quit()
-        raise TimeoutError("Zomato page took too long to load.")
+class EmptyScrapeError(Exception):
+    """The page loaded but held no items, usually because its markup changed."""
 
 
-    city = "UnknownCity"
-    restaurant = "UnknownRestaurant"
+def scrape_with_retries(platform, url, resources, crawl=None):
+    """Browser scrape retried with exponential backoff on timeouts and empty menus.
 
-    try:
-        breadcrumb_links = driver.find_elements(By.XPATH, "//a[contains(@class, 'sc-ukj373-3')]")
-        if len(breadcrumb_links) >= 5:
-            city = breadcrumb_links[2].get_attribute("title").strip()
-            restaurant = breadcrumb_links[4].get_attribute("title").strip()
-    except Exception:
-        pass
-
-    items = []
-    elements = driver.find_elements(By.XPATH, "//div[@class= 'sc-nUItV gZWJDT']")
-    for el in elements:
+    Each of those counts towards the platform's circuit breaker, and retrying
+    stops as soon as it opens. Running out of local browsers
+    (PoolExhaustedError) is neither retried nor counted.
+    """
+    reason = None  # why the previous attempt failed
+    for attempt in range(SCRAPE_RETRIES + 1):
+        if attempt:
+            check_circuit(platform)
+            delay = min(RETRY_BACKOFF * 2 ** (attempt - 1), RETRY_BACKOFF_MAX) * random.uniform(0.5, 1)
+            print(f"{reason} on {url}; retrying in {delay:.1f}s.")
+            with span("retry_backoff"):
+                time.sleep(delay)
+            streams.restart()
+            archive.discard()
         try:
-            price = el.find_element(By.XPATH, ".//span[@class= 'sc-17hyc2s-1 cCiQWA']").text.strip()
-            name = el.find_element(By.XPATH, ".//h4[@class = 'sc-cGCqpu chKhYc']").text.strip()
-            items.append({"name": name, "MRP": price})
-        except NoSuchElementException:
+            result = browser_stack().browser_scrape(platform, url, resources, crawl)
+        except TimeoutError:
+            reason = "Timed out"
+            breakers.failure(platform, "timeout")
+            if attempt == SCRAPE_RETRIES:
+                raise
             continue
+        if result[0]:
+            return result
+        reason = "No items found"
+        breakers.failure(platform, "empty")
+        if attempt == SCRAPE_RETRIES:
+            raise EmptyScrapeError("The page loaded but no items were found; its layout may have changed.")
+
+
+def run_scrape(url, platform):
+    """Scrape and store one URL; the result carries a per-stage timing trace."""
+    with telemetry.trace(platform) as trace:
+        outcome, source = "failure", "browser"
+        try:
+            result = scrape_and_store(url, platform)
+            outcome, source = "success", result["source"]
+        except HTTPException as e:
+            if e.status_code == 504:
+                outcome = "timeout"
+            elif e.status_code == 503:
+                outcome = "rejected"
+            raise
+        finally:
+            telemetry.finish(platform, source, outcome, time.perf_counter() - trace.started)
+    result["trace"] = trace.to_dict()
+    return result
+
+
+def scrape_and_store(url, platform):
+    granted = breakers.allow(platform)
+    if granted is None:
+        raise circuit_open_error(platform, breakers.retry_after(platform) or breakers.cooldown)
+    try:
+        with archive.capturing() if html_archive else nullcontext():
+            return _scrape_and_store(url, platform)
+    finally:
+        if granted == "half_open":
+            breakers.release(platform)  # a no-op once the probe has closed or reopened the breaker
+
+
+def _scrape_and_store(url, platform):
+    scrapers = browser_stack()
+    source = "browser"
+    resources = {}
+    crawl = {}  # MyStore: catalog mechanism, pages fetched and crawl time
+    with span("fast_path"):
+        fast = scrapers.fast_path.extract(platform, url, crawl) if scrapers.FAST_PATH_ENABLED else None
+    if not fast:
+        archive.discard()  # the fast path's fetch, if any, is not what the browser scraped
+    try:
+        if fast:
+            source = "fast_path"
+            data, restaurant, city, discounts, coupons = fast
+            data = list(scrapers.publish(data))
+            url_restaurant, url_city = extract_restaurant_and_city(url)
+            restaurant = restaurant or url_restaurant
+            city = city or url_city
+        else:
+            data, restaurant, city, discounts, coupons = scrape_with_retries(platform, url, resources, crawl)
+    except HTTPException:
+        raise
+    except PoolExhaustedError as e:
+        raise pool_exhausted_error(e.retry_after)
+    except TimeoutError as te:
+        raise HTTPException(status_code=504, detail=str(te) or "Timed out waiting for the page.")
+    except EmptyScrapeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
 
-    driver.quit()
-    return items, restaurant, city, [], []  # No discounts or coupons for Zomato
-
-def scrape_mystore(url):
-    driver = get_chrome_driver()
-    driver.get(url)
-    time.sleep(5)
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-
-    # Extract restaurant name
-    restaurant_tag = soup.select_one("h1.catalog-title.m-0.fw-semibold.h2")
-    restaurant = restaurant_tag.text.strip() if restaurant_tag else "UnknownRestaurant"
-
-    # Extract city name
-    city_tag = soup.select_one("div.seller-caption-top")
-    city = city_tag.text.strip() if city_tag else "UnknownCity"
-
-    items = []
-    cards = soup.select("div.product-caption-top.mt-auto")
-    for card in cards:
-        name = card.select_one("a.twoline_ellipsis")
-        seller = card.select_one("a.product_seller_name")
-        container = card.find_previous("div")
-        price_new = container.select_one("span.price-new")
-        price_old = container.select_one("span.price-old")
-        discount = container.select_one("span.discount-off")
-
-        items.append({
-            "name": name.text.strip() if name else "N/A",
-            "MRP": price_old.text.strip() if price_old else "N/A",
-            "Discounted Price": price_new.text.strip() if price_new else "N/A",
-            "discount": discount.text.strip() if discount else "N/A",
-            "seller": seller.text.strip() if seller else "N/A"
-            })
-
-
-    driver.quit()
-    return items, restaurant, city, [], []  # No coupons/discounts currently extracted for MyStore
+    if data:
+        breakers.success(platform)
+    offer_rules = {"discounts": parse_offers(discounts), "coupons": parse_offers(coupons)}
+    streams.write({"type": "offers", "discounts": discounts, "coupons": coupons, "offer_rules": offer_rules})
+    refs = storage.save_scrape(platform, restaurant, city, data, discounts, coupons)
+    archived = archive_scrape(platform, city, restaurant, url, source, refs.get("scrape_id"))
 
-# -------------------- Helpers --------------------
-def extract_restaurant_and_city(url):
-    url = url.lower()
-    parts = url.split('/')
-    restaurant = 'unknown_restaurant'
-    city = 'unknown_city'
+    return {
+        "status": "success",
+        "platform": platform,
+        "source": source,
+        "restaurant": restaurant,
+        "city": city,
+        "item_count": len(data),
+        "scrape_id": refs.get("scrape_id"),
+        "changes": refs.get("changes"),
+        "items_csv": refs.get("items_csv"),
+        "offers_csv": refs.get("offers_csv") if platform == "swiggy" else None,
+        "cached": False,
+        "age": 0,
+        "resources": resources or None,
+        "crawl": crawl or None,
+        "offer_rules": offer_rules,
+        "archive": archived,
+        "data": data
+    }
 
-    if "swiggy" in url or "zomato" in url:
-        if len(parts) > 4:
-            city = parts[3]
-        if len(parts) > 5:
-            restaurant = parts[5].split('?')[0].replace('-', '_')
-    elif "mystore" in url:
-        city = "mystore"
-        restaurant = parts[2].split('.')[0]
-    return restaurant.strip('_'), city.strip('_')
 
-def write_csv(data, platform, restaurant, city, discounts, coupons):
-    city = city.replace(" ", "_").strip()
-    restaurant = restaurant.replace(" ", "_").strip()
-    platform = platform.lower().strip()
+# -------------------- Result Cache --------------------
+result_cache = ResultCache(
+    ttls=parse_platform_values(os.getenv("CACHE_TTL", "swiggy=900,zomato=900,mystore=3600")),
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "512")),
+    disk_dir=os.getenv("CACHE_DIR") or None,
+)
 
-    folder_path = os.path.join("data", city, restaurant)
-    os.makedirs(folder_path, exist_ok=True)
 
-    # ---------------- Write item data ----------------
-    items_filename = f"{restaurant}_{city}_{platform}_items.csv"
-    items_path = os.path.join(folder_path, items_filename)
+def cache_key(url, platform):
+    return f"{platform}:{normalize_url(url)}"
 
-    with open(items_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
 
-        if data:
-            headers = list(data[0].keys())
-            writer.writerow(headers)
-            for item in data:
-                writer.writerow([item.get(h, "N/A") for h in headers])
-        else:
-            writer.writerow(["No items found."])
-
-    # ---------------- Write discounts/coupons if Swiggy ----------------
-    offers_path = None
-    if platform == "swiggy":
-        offers_filename = f"{restaurant}_{city}_{platform}_offers.csv"
-        offers_path = os.path.join(folder_path, offers_filename)
-
-        with open(offers_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Discounts"])
-            if discounts:
-                for discount in discounts:
-                    writer.writerow([discount])
-            else:
-                writer.writerow(["No Discounts"])
+def cache_labels(url):
+    restaurant, city = extract_restaurant_and_city(normalize_url(url))
+    return city, restaurant
+
+
+def cached_result(url, platform):
+    hit = result_cache.get(cache_key(url, platform), platform, cache_labels(url))
+    if hit is None:
+        return None
+    result, age = hit
+    return {**result, "cached": True, "age": round(age, 1)}
+
+
+def remember_job(job):
+    """Promote a freshly finished job into this process's memory cache (the worker wrote the disk tier)."""
+    result = job.get("result")
+    if job["status"] == "done" and result and not result.get("cached") and not result.get("streamed"):
+        result_cache.promote(cache_key(job["url"], job["platform"]), job["platform"], result, job["finished_at"])
+
+
+# Worker-process hooks; module-level so the spawned workers can import them.
+def run_job(job):
+    if job.get("stream"):
+        with streams.spooling(streams.spool_path(STREAM_DIR, job["id"])):
+            result = run_scrape(job["url"], job["platform"])
+        # The items went out through the spool; keep the stored result small.
+        result = {**{key: value for key, value in result.items() if key != "data"}, "streamed": True}
+    else:
+        result = run_scrape(job["url"], job["platform"])
+    if result_cache.disk_dir and not result.get("streamed"):
+        # Shares the result with the API process through the disk tier.
+        result_cache.put(cache_key(job["url"], job["platform"]), job["platform"], result, cache_labels(job["url"]))
+    started = time.perf_counter()
+    encoded = json.dumps(result)
+    telemetry.STAGE_SECONDS.labels(job["platform"], "serialize").observe(time.perf_counter() - started)
+    return encoded
+
+
+def without_trace(result, trace=False):
+    if trace or not result or "trace" not in result:
+        return result
+    return {key: value for key, value in result.items() if key != "trace"}
 
-            writer.writerow([])  # Blank line between sections
-            writer.writerow(["Coupons"])
-            if coupons:
-                for coupon in coupons:
-                    writer.writerow([coupon])
-            else:
-                writer.writerow(["No Coupons"])
 
-    return items_path, offers_path
+def worker_stats():
+    # Browser stats stay empty until the warm-up or the first job has imported the browser stack.
+    return {
+        **(_browser_stack.stats() if _browser_stack else {}),
+        "archive": html_archive.stats() if html_archive else None,
+    }
+
+
+def close_worker():
+    if _browser_stack:
+        _browser_stack.close()
+
+
+def warm_worker():
+    browser_stack().warm()
+
+
+def worker_restarted(reason, failed_jobs):
+    """Supervisor hook: a worker was recycled, crashed, or killed over a limit."""
+    telemetry.WORKER_RESTARTS.labels(reason).inc()
+    for job in failed_jobs:
+        duration = time.time() - (job["started_at"] or time.time())
+        telemetry.finish(job["platform"], "browser", "timeout" if reason == "timeout" else "failure", duration)
+        if reason == "timeout":
+            breakers.failure(job["platform"], "timeout")
+
+
+worker_pool = WorkerPool(
+    JOBS_DB_PATH,
+    handler=run_job,
+    stats=worker_stats,
+    cleanup=close_worker,
+    size=int(os.getenv("SCRAPE_WORKERS", "3")),
+    caps=parse_platform_values(os.getenv("PLATFORM_CONCURRENCY", "swiggy=2,zomato=2,mystore=2")),
+    # Concurrent jobs per worker process; match DRIVER_POOL_SIZE in tabs mode.
+    threads=int(os.getenv("SCRAPE_THREADS", "1")),
+    # A fresh process (and fresh browsers) every N jobs; 0 keeps workers forever.
+    max_jobs=int(os.getenv("SCRAPE_WORKER_MAX_JOBS", "200")),
+    # Per-job wall clock and per-worker RSS (worker + its browsers); a worker over either is killed.
+    job_timeout=float(os.getenv("SCRAPE_JOB_TIMEOUT", "900")),
+    max_rss=int(float(os.getenv("SCRAPE_WORKER_MAX_RSS_MB", "4096")) * 2 ** 20),
+    check_interval=float(os.getenv("WORKER_CHECK_INTERVAL", "5")),
+    on_restart=worker_restarted,
+    warmup=warm_worker,
+)
+
+# Kills Chromium/chromedriver left behind by dead workers or failed quits; exports browser counts and RSS.
+chrome_watchdog = ChromeWatchdog(
+    worker_pool.pids,
+    interval=float(os.getenv("CHROME_WATCHDOG_INTERVAL", "30")),
+    grace=int(os.getenv("CHROME_WATCHDOG_GRACE", "2")),
+)
+
+
+# -------------------- Scheduler --------------------
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_MIN_INTERVAL = float(os.getenv("SCHEDULER_MIN_INTERVAL", "60"))
+
+scheduler = Scheduler(
+    job_store,
+    cache_key,
+    rates=parse_platform_values(os.getenv("SCHEDULER_RATES", "swiggy=6,zomato=6,mystore=12")),  # scrapes/minute
+    burst=int(os.getenv("SCHEDULER_BURST", "2")),
+    # Queued + running jobs of any origin; keeps scheduled bursts off Chromium.
+    max_in_flight=int(os.getenv("SCHEDULER_MAX_IN_FLIGHT", "4")),
+    caps=worker_pool.caps,
+    jitter=float(os.getenv("SCHEDULER_JITTER", "0.1")),
+    tick=float(os.getenv("SCHEDULER_TICK", "1")),
+    on_finished=remember_job,
+    paused=lambda platform: breakers.retry_after(platform) is not None,
+)
+
+
+# -------------------- Health --------------------
+# Ready once READY_MIN_WORKERS workers have checked in and READY_MIN_WARM_DRIVERS
+# browsers are up across them. Workers start their browsers in the background
+# (DRIVER_WARM_MIN each), so by default readiness doesn't wait for Chromium.
+READY_MIN_WORKERS = int(os.getenv("READY_MIN_WORKERS", "1"))
+READY_MIN_WARM_DRIVERS = int(os.getenv("READY_MIN_WARM_DRIVERS", "0"))
+
+startup = {"started": False, "seconds": None, "ready_seconds": None}
+
+
+def readiness():
+    live = set(worker_pool.pids())
+    workers = [worker for worker in job_store.workers() if worker["pid"] in live]
+    warm = sum(
+        pool.get("idle", 0) + pool.get("in_use", 0)
+        for pool in (worker["stats"].get("driver_pool") or {} for worker in workers)
+    )
+    warming = sum(not (worker["stats"].get("warmup") or {}).get("done") for worker in workers)
+    ready = (
+        startup["started"]
+        and len(workers) >= min(READY_MIN_WORKERS, worker_pool.size)
+        and warm >= READY_MIN_WARM_DRIVERS
+    )
+    return {
+        "ready": ready,
+        "workers": len(workers),
+        "warm_drivers": warm,
+        "workers_warming": warming,
+        "startup_seconds": startup["seconds"],
+        "ready_seconds": startup["ready_seconds"],
+    }
 
 
 # -------------------- Endpoints --------------------
+@app.on_event("startup")
+def start_workers():
+    telemetry.reset()
+    streams.prune(STREAM_DIR, JOB_RETENTION_SECONDS)
+    requeued = job_store.requeue_orphans()
+    if requeued:
+        print(f"Requeued {requeued} jobs interrupted by the last shutdown.")
+    worker_pool.start()
+    chrome_watchdog.start()
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+    startup["started"] = True
+    startup["seconds"] = round(time.time() - STARTED_AT, 3)
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    scheduler.stop()
+    chrome_watchdog.stop()
+    worker_pool.stop()
+
+
+@app.get("/health/live")
+def liveness_endpoint():
+    """The API process is up and answering; says nothing about workers or browsers."""
+    return {"status": "alive", "uptime": round(time.time() - STARTED_AT, 1)}
+
+
+@app.get("/health/ready")
+def readiness_endpoint(response: Response):
+    """200 once this replica can take scrapes, 503 until then; always reports worker and warm-browser counts."""
+    status = readiness()
+    if status["ready"] and startup["ready_seconds"] is None:
+        startup["ready_seconds"] = round(time.time() - STARTED_AT, 3)
+        status["ready_seconds"] = startup["ready_seconds"]
+    if not status["ready"]:
+        response.status_code = 503
+    return status
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus metrics from the API and every worker process."""
+    body, content_type = telemetry.render()
+    return Response(body, media_type=content_type)
+
+
+@app.get("/pool/stats")
+def pool_stats_endpoint():
+    return {
+        worker["worker_id"]: {**worker["stats"].get("driver_pool", {}), "browsers": worker["stats"].get("browsers")}
+        for worker in job_store.workers()
+    }
+
+
+@app.get("/resources/stats")
+def resource_stats_endpoint():
+    """Per-worker, per-platform bytes, page-ready time and Chromium RSS of browser scrapes."""
+    return {
+        worker["worker_id"]: worker["stats"].get("resources", {})
+        for worker in job_store.workers()
+    }
+
+
+@app.get("/fastpath/stats")
+def fast_path_stats_endpoint():
+    totals = {}
+    for worker in job_store.workers():
+        for platform, counters in worker["stats"].get("fast_path", {}).items():
+            platform_totals = totals.setdefault(platform, {"attempts": 0, "hits": 0, "misses": 0, "errors": 0})
+            for name in platform_totals:
+                platform_totals[name] += counters.get(name, 0)
+    for counters in totals.values():
+        counters["hit_rate"] = round(counters["hits"] / counters["attempts"], 4) if counters["attempts"] else 0.0
+    return totals
+
+
+@app.get("/selectors/stats")
+def selector_stats_endpoint():
+    """Hit/miss counts of every selector and XPath alternative, summed over workers since their last reload."""
+    platforms = {}
+    for worker in job_store.workers():
+        for platform, rules in worker["stats"].get("selectors", {}).items():
+            totals = platforms.setdefault(platform, {"versions": {}, "errors": {}, "selectors": {}})
+            totals["versions"][worker["worker_id"]] = rules["version"]
+            if rules["error"]:
+                totals["errors"][worker["worker_id"]] = rules["error"]
+            for name, counters in rules["selectors"].items():
+                selector = totals["selectors"].setdefault(name, {"hits": 0, "misses": 0, "fallback_hits": 0, "expressions": {}})
+                for field in ("hits", "misses", "fallback_hits"):
+                    selector[field] += counters[field]
+                for expression in counters["expressions"]:
+                    selector["expressions"][expression["xpath"]] = (
+                        selector["expressions"].get(expression["xpath"], 0) + expression["hits"]
+                    )
+    for totals in platforms.values():
+        for selector in totals["selectors"].values():
+            lookups = selector["hits"] + selector["misses"]
+            selector["hit_rate"] = round(selector["hits"] / lookups, 4) if lookups else None
+    return platforms
+
+
 @app.post("/test")
 def test_endpoint(request: ScrapeRequest):
     return {"url_received": request.url}
 
 
-@app.post("/scrape")
-def scrape_endpoint(request: ScrapeRequest):
+@app.post("/scrape", status_code=202)
+def scrape_endpoint(request: ScrapeRequest, stream: bool = False, trace: bool = False):
+    """Queue a scrape and return its job id; ``?stream=true`` streams the items instead."""
     url = request.url.strip()
     platform = identify_website(url)
 
     if not platform:
         raise HTTPException(status_code=400, detail="Unsupported or invalid platform URL")
 
+    cached = None if request.force_refresh else cached_result(url, platform)
+    if stream:
+        return stream_scrape(url, platform, cached, trace)
+    if cached:
+        job = job_store.record_done(url, platform, cached, cache_key(url, platform))
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": f"/jobs/{job['id']}",
+            "cached": True,
+            "age": cached["age"],
+        }
+
+    check_circuit(platform)
     try:
-        if platform == "swiggy":
-            data, restaurant, city, discounts, coupons = scrape_swiggy(url)
-        elif platform == "zomato":
-            data, restaurant, city, discounts, coupons = scrape_zomato(url)
-        elif platform == "mystore":
-            data, restaurant, city, discounts, coupons = scrape_mystore(url)
-    except TimeoutError as te:
-        raise HTTPException(status_code=504, detail=str(te))
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
-    
-    items_path, offers_path = write_csv(data, platform, restaurant, city, discounts, coupons)
+        job = job_store.enqueue(url, platform, cache_key(url, platform))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}",
+        "cached": False,
+        "coalesced": job["coalesced"],
+    }
+
+
+def stream_scrape(url, platform, cached, trace=False):
+    """NDJSON: a ``job`` record, one ``item`` record per menu row as the worker
+    extracts it, then trailing ``offers`` and ``metadata`` records (or ``error``).
+    """
+    if cached:
+        job = job_store.record_done(url, platform, cached, cache_key(url, platform))
+    else:
+        check_circuit(platform)
+        try:
+            # Streamed jobs only coalesce with each other: their results carry no items.
+            job = job_store.enqueue(url, platform, cache_key(url, platform) + "|stream", stream=True)
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        streams.prune(STREAM_DIR, JOB_RETENTION_SECONDS)
+
+    def records():
+        yield json.dumps({
+            "type": "job",
+            "job_id": job["id"],
+            "status_url": f"/jobs/{job['id']}",
+            "cached": bool(cached),
+            "coalesced": job.get("coalesced", False),
+        }) + "\n"
+        if cached:
+            for item in cached["data"]:
+                yield json.dumps({"type": "item", "item": item}) + "\n"
+            metadata = {key: value for key, value in cached.items() if key != "data"}
+            yield json.dumps({"type": "metadata", **without_trace(metadata, trace)}) + "\n"
+            return
+
+        def finished():
+            current = job_store.get(job["id"])
+            return current if current and current["status"] in ("done", "failed") else None
+
+        done = yield from streams.tail(streams.spool_path(STREAM_DIR, job["id"]), finished, STREAM_POLL_INTERVAL)
+        if done["status"] == "failed":
+            yield json.dumps({"type": "error", "status_code": done["status_code"], "error": done["error"]}) + "\n"
+        else:
+            yield json.dumps({"type": "metadata", **without_trace(done["result"], trace)}) + "\n"
+
+    return StreamingResponse(records(), media_type="application/x-ndjson")
+
 
+@app.get("/jobs/{job_id}")
+def job_endpoint(job_id: str, trace: bool = False):
+    """Job status; ``?trace=true`` keeps the per-stage timing trace in the result."""
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    remember_job(job)
+    return {**job, "result": without_trace(job["result"], trace)}
 
 
+@app.get("/changes")
+def changes_endpoint(since: str = "0", cursor: int = 0, limit: int = 500,
+                     platform: str = None, city: str = None, restaurant: str = None):
+    """Item-level price changes after ``since`` (epoch seconds or ISO 8601)."""
+    try:
+        since_ts = float(since)
+    except ValueError:
+        try:
+            since_ts = datetime.fromisoformat(since).timestamp()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="'since' must be epoch seconds or an ISO 8601 timestamp")
+    limit = max(1, min(limit, 5000))
+    return history.changes(since_ts, cursor, limit, platform, city, restaurant)
+
+
+@app.get("/compare")
+def compare_endpoint(city: str, restaurant: str = None):
+    """Item-level Swiggy vs Zomato prices for a city (optionally one restaurant)."""
+    comparisons = compare_restaurants(city, restaurant)
+    if restaurant and not comparisons:
+        raise HTTPException(status_code=404, detail="Restaurant not found on both Swiggy and Zomato")
+    return {"comparisons": comparisons, "matcher": matcher.stats()}
+
+
+# ---------------- Analytics ----------------
+# Read from rollups kept current by every save; pages continue from the previous response's ``next_cursor``.
+def analytics_page(query, limit, max_limit=1000, **kwargs):
+    try:
+        return query(limit=max(1, min(limit, max_limit)), **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/analytics/items")
+def analytics_items(city: str = None, platform: str = None, restaurant: str = None, q: str = None,
+                    cursor: str = None, limit: int = 100):
+    """Items currently on menus with typed prices (paise) and discount depth."""
+    return analytics_page(history.analytics.items, limit, city=city, platform=platform,
+                          restaurant=restaurant, q=q, cursor=cursor)
+
+
+@app.get("/analytics/items/{item_id}/history")
+def analytics_item_history(item_id: int, cursor: str = None, limit: int = 100):
+    """Every recorded price point of one item, oldest first."""
+    result = analytics_page(history.analytics.item_history, limit, item_id=item_id, cursor=cursor)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return result
+
+
+@app.get("/analytics/cities")
+def analytics_cities(platform: str = None, q: str = None, cursor: str = None, limit: int = 100):
+    """Per city and platform: item counts, average and median prices, discount share and depth.
+
+    ``q`` restricts the figures to dishes whose name contains it, e.g. ``q=thali``.
+    """
+    return analytics_page(history.analytics.cities, limit, platform=platform, q=q, cursor=cursor)
+
+
+@app.get("/analytics/platforms")
+def analytics_platforms():
+    return history.analytics.platforms()
+
+
+@app.get("/analytics/discounts")
+def analytics_discounts(by: str = "avg", city: str = None, platform: str = None, min_items: int = 5,
+                        cursor: str = None, limit: int = 50):
+    """Outlets ranked by average (``by=avg``) or deepest (``by=max``) item discount."""
+    if by not in ("avg", "max"):
+        raise HTTPException(status_code=400, detail="'by' must be 'avg' or 'max'")
+    return analytics_page(history.analytics.discount_ranking, limit, by=by, city=city, platform=platform,
+                          min_items=max(1, min_items), cursor=cursor)
+
+
+@app.post("/schedule")
+def schedule_endpoint(request: ScheduleRequest):
+    """Track a URL for periodic re-scrapes (re-posting updates its interval and priority)."""
+    url = request.url.strip()
+    platform = identify_website(url)
+    if not platform:
+        raise HTTPException(status_code=400, detail="Unsupported or invalid platform URL")
+    if request.interval < SCHEDULER_MIN_INTERVAL:
+        raise HTTPException(status_code=400, detail=f"'interval' must be at least {SCHEDULER_MIN_INTERVAL:g} seconds")
+    if request.priority <= 0:
+        raise HTTPException(status_code=400, detail="'priority' must be positive")
+    return scheduler.track(url, platform, request.interval, request.priority)
+
+
+@app.get("/schedule")
+def schedule_list_endpoint(platform: str = None):
+    return {"urls": scheduler.tracked(platform)}
+
+
+@app.delete("/schedule")
+def unschedule_endpoint(url: str):
+    if not scheduler.untrack(url.strip()):
+        raise HTTPException(status_code=404, detail="URL is not scheduled")
+    return {"url": url.strip(), "tracked": False}
+
+
+@app.get("/schedule/stats")
+def schedule_stats_endpoint():
+    """Per-platform lag behind due times, throughput, rate-limit tokens and in-flight jobs."""
+    return scheduler.stats()
+
+
+@app.get("/breakers")
+def breakers_endpoint():
+    """Circuit breaker state per platform and each worker's adaptive page timeouts."""
     return {
-        "status": "success",
-        "platform": platform,
-        "restaurant": restaurant,
-        "city": city,
-        "item_count": len(data),
-        "items_csv": items_path,
-        "offers_csv": offers_path if platform == "swiggy" else None,
-        "data": data
+        "breakers": breakers.stats(),
+        "timeouts": {worker["worker_id"]: worker["stats"].get("timeouts", {}) for worker in job_store.workers()},
     }
 
+
+@app.get("/jobs")
+def jobs_summary_endpoint():
+    return {"counts": job_store.counts(), "workers": job_store.workers(), "cache": result_cache.stats()}
+
+
+@app.get("/workers")
+def workers_endpoint():
+    """Worker processes (pid, RSS incl. browsers, restarts by reason) and the Chrome watchdog's process counts."""
+    return {"supervisor": worker_pool.stats(), "chrome": chrome_watchdog.stats()}
+
+
+@app.post("/scrape/batch")
+async def scrape_batch_endpoint(request: Request, trace: bool = False):
+    """Accepts {"urls": [...]} or a multipart CSV upload in the "file" field.
+
+    Streams one NDJSON record per URL as soon as its job finishes.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None:
+            raise HTTPException(status_code=400, detail="Upload a CSV file in the 'file' field.")
+        urls = parse_url_csv((await upload.read()).decode("utf-8-sig"))
+        force_refresh = str(form.get("force_refresh", "")).lower() == "true"
+    else:
+        body = await request.json()
+        urls = body.get("urls", []) if isinstance(body, dict) else body
+        force_refresh = isinstance(body, dict) and bool(body.get("force_refresh"))
+
+    urls = list(dict.fromkeys(url.strip() for url in urls if isinstance(url, str) and url.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="No URLs provided")
+
+    by_platform, rejected = {}, []
+    for url in urls:
+        platform = identify_website(url)
+        if platform:
+            by_platform.setdefault(platform, []).append(url)
+        else:
+            rejected.append(url)
+
+    batch_id = uuid.uuid4().hex
+    cached, entries, refused = [], [], []
+    for platform, group in by_platform.items():
+        retry_after = breakers.retry_after(platform)
+        for url in group:
+            hit = None if force_refresh else cached_result(url, platform)
+            if hit:
+                cached.append((url, platform, hit))
+            elif retry_after is not None:
+                refused.append((url, platform, circuit_open_error(platform, retry_after).detail))
+            else:
+                entries.append((url, platform, cache_key(url, platform)))
+    try:
+        jobs = job_store.enqueue_many(entries, batch_id=batch_id) if entries else []
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    # Different URLs can normalize onto the same (coalesced) job.
+    pending = {}
+    for (url, _, _), job in zip(entries, jobs):
+        pending.setdefault(job["id"], []).append(url)
+
+    def record(url, platform, status, status_code, error=None, result=None, job_id=None):
+        return json.dumps({
+            "url": url,
+            "job_id": job_id,
+            "platform": platform,
+            "status": status,
+            "status_code": status_code,
+            "error": error,
+            "result": without_trace(result, trace),
+        }) + "\n"
+
+    def stream():
+        yield json.dumps({
+            "batch_id": batch_id,
+            "total": len(urls),
+            "platforms": {platform: len(group) for platform, group in by_platform.items()},
+            "cached": len(cached),
+        }) + "\n"
+        for url in rejected:
+            yield record(url, None, "failed", 400, "Unsupported or invalid platform URL")
+        for url, platform, result in cached:
+            yield record(url, platform, "done", 200, result=result)
+        for url, platform, error in refused:
+            yield record(url, platform, "failed", 503, error)
+
+        while pending:
+            finished = job_store.finished_jobs(pending)
+            for job in finished:
+                remember_job(job)
+                for url in pending.pop(job["id"]):
+                    yield record(url, job["platform"], job["status"], job["status_code"],
+                                 job["error"], job["result"], job["id"])
+            if not finished:
+                time.sleep(BATCH_POLL_INTERVAL)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -0,0 +1,249 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from difflib import SequenceMatcher
+
+from prices import effective_price
+
+STOPWORDS = {"and", "with", "the", "of", "a", "an", "in", "n"}
+NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+# -------------------- Normalization --------------------
+def normalize_name(name):
+    """"Rajma & Rumali Roti Lunchbox" -> "rajma rumali roti lunchbox"."""
+    text = NON_WORD.sub(" ", name.lower().replace("&", " and "))
+    return " ".join(token for token in text.split() if token not in STOPWORDS)
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Vocabulary:
+    """Token counts across both menus; maps rare misspellings onto common tokens.
+
+    "Chikcen" seen once next to "chicken" seen 40 times becomes "chicken".
+    Lookups go through a trigram index, so the vocabulary is never scanned.
+    """
+
+    def __init__(self, token_sets, min_ratio=0.75, min_length=4, dominance=3):
+        self.counts = Counter(token for tokens in token_sets for token in tokens)
+        self.min_ratio = min_ratio
+        self.min_length = min_length
+        self.dominance = dominance
+        self.grams = defaultdict(set)
+        for token in self.counts:
+            for gram in trigrams(token):
+                self.grams[gram].add(token)
+        self._canonical = {}
+
+    def canonical_token(self, token):
+        if token in self._canonical:
+            return self._canonical[token]
+        best = token
+        if len(token) >= self.min_length:
+            floor = max(self.counts[token], 1) * self.dominance
+            candidates = {known for gram in trigrams(token) for known in self.grams.get(gram, ())}
+            scored = [
+                (SequenceMatcher(None, token, known).ratio(), self.counts[known], known)
+                for known in candidates if self.counts[known] >= floor
+            ]
+            if scored:
+                ratio, _, known = max(scored)
+                if ratio >= self.min_ratio:
+                    best = known
+        self._canonical[token] = best
+        return best
+
+    def canonical(self, tokens):
+        return {self.canonical_token(token) for token in tokens}
+
+
+# -------------------- Index --------------------
+def deletion_keys(tokens):
+    """The token set itself plus every set with one token dropped.
+
+    Two names one extra/missing word apart ("Smoked Butter Chicken Lunchbox"
+    vs "Butter Chicken Lunchbox") always share a key.
+    """
+    yield frozenset(tokens)
+    if len(tokens) > 2:
+        for token in tokens:
+            yield frozenset(tokens - {token})
+
+
+class MenuIndex:
+    """Inverted indexes over one menu's (canonicalized) names.
+
+    Candidates come from deletion-key buckets first and from IDF-weighted
+    token postings otherwise, so no lookup ever scans the whole menu.
+    """
+
+    def __init__(self, names, vocabulary, max_posting=500, max_bucket=50):
+        self.vocabulary = vocabulary
+        self.names = [normalize_name(name) for name in names]
+        self.tokens = [vocabulary.canonical(name.split()) for name in self.names]
+        self.max_posting = max_posting
+        self.max_bucket = max_bucket
+
+        self.postings = defaultdict(list)
+        self.keys = defaultdict(list)
+        for i, tokens in enumerate(self.tokens):
+            for token in tokens:
+                self.postings[token].append(i)
+            for key in deletion_keys(tokens):
+                self.keys[key].append(i)
+
+        total = max(len(self.names), 1)
+        self.idf = {token: math.log(1 + total / len(ids)) for token, ids in self.postings.items()}
+
+    def candidates(self, tokens, limit=20):
+        """Up to ``limit`` entry indexes worth scoring against canonical ``tokens``."""
+        found = {}
+        for key in deletion_keys(tokens):
+            for i in self.keys.get(key, ())[:self.max_bucket]:
+                found[i] = None
+        if found:
+            return list(found)
+
+        weights = defaultdict(float)
+        skipped = []
+        for token in tokens:
+            ids = self.postings.get(token, ())
+            if len(ids) > self.max_posting:
+                skipped.append(token)  # too common to discriminate ("lunchbox", "combo")
+                continue
+            for i in ids:
+                weights[i] += self.idf[token]
+        if not weights and skipped:
+            # Only common tokens: fall back to a bounded slice of the rarest one.
+            rarest = min(skipped, key=lambda token: len(self.postings[token]))
+            for i in self.postings[rarest][:self.max_posting]:
+                weights[i] += self.idf[rarest]
+        return sorted(weights, key=weights.get, reverse=True)[:limit]
+
+
+def jaccard(left_tokens, right_tokens):
+    return len(left_tokens & right_tokens) / max(len(left_tokens | right_tokens), 1)
+
+
+def similarity(left, right, left_tokens, right_tokens):
+    return 0.5 * jaccard(left_tokens, right_tokens) + 0.5 * SequenceMatcher(None, left, right, autojunk=False).ratio()
+
+
+def match_names(left_names, right_names, threshold=0.6, max_candidates=20, rescore=5):
+    """Pair names one-to-one; returns ``[(left_index, right_index, score)]``.
+
+    Candidates are ranked by token overlap and only the best ``rescore`` get
+    the (slower) character-level comparison, so cost is
+    O((n + m) * max_candidates), not O(n * m).
+    """
+    left_normalized = [normalize_name(name) for name in left_names]
+    vocabulary = Vocabulary(
+        [name.split() for name in left_normalized] + [normalize_name(name).split() for name in right_names]
+    )
+    index = MenuIndex(right_names, vocabulary)
+    pairs = []
+    for i, left in enumerate(left_normalized):
+        tokens = vocabulary.canonical(left.split())
+        ranked = sorted(
+            index.candidates(tokens, max_candidates),
+            key=lambda j: jaccard(tokens, index.tokens[j]),
+            reverse=True,
+        )
+        for j in ranked[:rescore]:
+            right = index.names[j]
+            score = 1.0 if left == right else similarity(left, right, tokens, index.tokens[j])
+            if score >= threshold:
+                pairs.append((score, i, j))
+
+    # Greedy best-first assignment keeps every item in at most one pair.
+    pairs.sort(reverse=True)
+    used_left, used_right, matches = set(), set(), []
+    for score, i, j in pairs:
+        if i not in used_left and j not in used_right:
+            used_left.add(i)
+            used_right.add(j)
+            matches.append((i, j, round(score, 4)))
+    return sorted(matches)
+
+
+# -------------------- Comparison --------------------
+class ItemMatcher:
+    """Builds per-restaurant Swiggy-vs-Zomato price tables.
+
+    Name pairings are cached per restaurant and menu (keyed by a hash of both
+    name lists, in sorted order), so repeat comparisons only re-join the
+    latest prices. Pairs are cached as positions in the sorted lists and
+    mapped back to each call's own order, since a repriced item moves to the
+    end of its menu.
+    """
+
+    def __init__(self, threshold=0.6, max_entries=256):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _menus_key(restaurant_key, left_names, right_names):
+        digest = hashlib.blake2b(digest_size=16)
+        for names in (left_names, right_names):
+            for name in sorted(names):
+                digest.update(name.encode("utf-8") + b"\0")
+            digest.update(b"\1")
+        return restaurant_key, digest.hexdigest()
+
+    def pairs(self, restaurant_key, left_names, right_names):
+        left_order = sorted(range(len(left_names)), key=left_names.__getitem__)
+        right_order = sorted(range(len(right_names)), key=right_names.__getitem__)
+        key = self._menus_key(restaurant_key, left_names, right_names)
+        with self._lock:
+            matches = self._cache.get(key)
+            if matches is not None:
+                self._cache.move_to_end(key)
+        if matches is None:
+            matches = match_names(
+                [left_names[i] for i in left_order], [right_names[j] for j in right_order], self.threshold
+            )
+            with self._lock:
+                self._cache[key] = matches
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return sorted((left_order[i], right_order[j], score) for i, j, score in matches)
+
+    def compare(self, restaurant_key, left_items, right_items, left="swiggy", right="zomato"):
+        left_names = [item["name"] for item in left_items]
+        right_names = [item["name"] for item in right_items]
+        matches = self.pairs(restaurant_key, left_names, right_names)
+
+        rows = []
+        for i, j, score in matches:
+            left_price = effective_price(left_items[i])
+            right_price = effective_price(right_items[j])
+            delta = right_price - left_price if left_price is not None and right_price is not None else None
+            rows.append({
+                f"{left}_name": left_names[i],
+                f"{right}_name": right_names[j],
+                "score": score,
+                f"{left}_price": left_price / 100 if left_price is not None else None,
+                f"{right}_price": right_price / 100 if right_price is not None else None,
+                "delta": delta / 100 if delta is not None else None,
+                "delta_pct": round(100 * delta / left_price, 2) if delta is not None and left_price else None,
+            })
+
+        matched_left = {i for i, _, _ in matches}
+        matched_right = {j for _, j, _ in matches}
+        return {
+            "matched": rows,
+            f"{left}_only": [name for i, name in enumerate(left_names) if i not in matched_left],
+            f"{right}_only": [name for j, name in enumerate(right_names) if j not in matched_right],
+        }
+
+    def stats(self):
+        with self._lock:
+            return {"cached_restaurants": len(self._cache), "max_entries": self.max_entries}
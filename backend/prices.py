@@ -0,0 +1,167 @@
+import re
+from itertools import islice
+
+AMOUNT = re.compile(r"\d[\d,]*(?:\.\d+)?")
+# One match per line of a newline-joined column: the line's first amount, or an empty group.
+FIRST_AMOUNT_PER_LINE = re.compile(r"^[^\d\n]*(\d[\d,]*(?:\.\d+)?)?[^\n]*$", re.M)
+PERCENT = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+
+# Typed columns added to every item by ``normalize_items``.
+TYPED_FIELDS = ("mrp_paise", "price_paise", "discount_pct")
+
+
+def parse_amount(text):
+    """Parse a scraped price ("₹1,299", "259", "N/A") into integer paise, or None."""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return int(round(text * 100))
+    match = AMOUNT.search(str(text))
+    if not match:
+        return None
+    return int(round(float(match.group(0).replace(",", "")) * 100))
+
+
+def effective_price(item):
+    """What a customer pays for a scraped row: the discounted price when there is one."""
+    if item.get("price_paise") is not None:
+        return item["price_paise"]
+    discounted = parse_amount(item.get("Discounted Price"))
+    return discounted if discounted is not None else parse_amount(item.get("MRP"))
+
+
+# -------------------- Columns --------------------
+def to_paise(amount):
+    if amount.isdigit():
+        return int(amount) * 100
+    return int(round(float(amount.replace(",", "")) * 100))
+
+
+def parse_amounts(values):
+    """``parse_amount`` over a whole column at once.
+
+    Menus repeat the same few price strings, so each distinct string is
+    parsed once (by one regex pass over them joined together) and the
+    results are mapped back onto the column.
+    """
+    parsed = dict.fromkeys(values)
+    strings = [value for value in parsed if type(value) is str]
+    matches = FIRST_AMOUNT_PER_LINE.findall("\n".join(strings))
+    if len(matches) == len(strings):
+        for value, amount in zip(strings, matches):
+            parsed[value] = to_paise(amount) if amount else None
+    else:  # a value spans lines
+        for value in strings:
+            parsed[value] = parse_amount(value)
+    for value in parsed:
+        if value is not None and type(value) is not str:
+            parsed[value] = parse_amount(value)
+    return [parsed[value] for value in values]
+
+
+def parse_percents(values):
+    """First "NN%" of each value as a float, else None."""
+    parsed = dict.fromkeys(values)
+    for value in parsed:
+        match = PERCENT.search(value) if isinstance(value, str) else None
+        parsed[value] = float(match.group(1)) if match else None
+    return [parsed[value] for value in values]
+
+
+def discount_percent(mrp, price, stated=None):
+    """Effective discount: from MRP vs price when both are known, else the page's own "% off"."""
+    if mrp and price is not None and price <= mrp:
+        return round(100 * (mrp - price) / mrp, 2)
+    if stated is not None:
+        return stated
+    return 0.0 if price is not None else None
+
+
+def normalize_items(items):
+    """Add ``mrp_paise``, ``price_paise`` and ``discount_pct`` to every item (in place); returns ``items``.
+
+    The raw strings stay as scraped. ``price_paise`` is what a customer
+    pays: the discounted price when there is one, else the MRP.
+    """
+    if not items:
+        return items
+    mrps = parse_amounts([item.get("MRP") for item in items])
+    discounted = parse_amounts([item.get("Discounted Price") for item in items])
+    stated = parse_percents([item.get("discount") for item in items])
+    prices = [cut if cut is not None else mrp for cut, mrp in zip(discounted, mrps)]
+    discounts = list(map(discount_percent, mrps, prices, stated))
+    for item, mrp, price, discount in zip(items, mrps, prices, discounts):
+        item["mrp_paise"] = mrp
+        item["price_paise"] = price
+        item["discount_pct"] = discount
+    return items
+
+
+def iter_normalized(items, batch_size=256):
+    """``normalize_items`` over an item stream, ``batch_size`` items at a time."""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield from normalize_items(batch)
+
+
+# -------------------- Offers --------------------
+RUPEES = r"(?:₹|rs\.?|inr)\s*(\d[\d,]*(?:\.\d+)?)"
+OFFER_PATTERNS = {
+    # Swiggy words the same cut "off", "discount" or "cashback" ("Flat 10% discount", "an additional ₹75 discount").
+    "percent": re.compile(r"(\d+(?:\.\d+)?)\s*%\s*(?:off|discount|cashback)", re.I),
+    "flat": re.compile(rf"flat\s+{RUPEES}(?:\s+off)?|{RUPEES}\s+(?:off|discount|cashback)", re.I),
+    "fixed_price": re.compile(rf"(?:items?\s+)?at\s+{RUPEES}", re.I),
+    "max_discount": re.compile(rf"up\s*to\s+{RUPEES}", re.I),
+    "min_order": re.compile(rf"(?:above|over|min(?:imum)?\.?\s+(?:order|cart)(?:\s+(?:value|of))?)\s+{RUPEES}", re.I),
+    "code": re.compile(r"\b(?i:use|code)\s*:?\s+(?!(?i:code)\b)([A-Z0-9]{3,})\b"),
+    "free_delivery": re.compile(r"free\s+deliver", re.I),
+    "bogo": re.compile(r"\bbuy\s+(\d+)\s+get\s+(\d+)|\bbogo\b", re.I),
+}
+
+
+def first_amount(match):
+    return next(to_paise(group) for group in match.groups() if group)
+
+
+def parse_offer(text):
+    """Structure an offer string ("60% Off Upto ₹110", "Flat ₹125 Off Above ₹499", ...).
+
+    Returns ``{"type", "text", "percent", "amount_paise", "max_discount_paise",
+    "min_order_paise", "code"}``; ``type`` is percent, flat, fixed_price,
+    bogo, free_delivery or other.
+    """
+    rule = {
+        "type": "other", "text": text, "percent": None, "amount_paise": None,
+        "max_discount_paise": None, "min_order_paise": None, "code": None,
+    }
+    match = OFFER_PATTERNS["percent"].search(text)
+    if match:
+        rule["type"], rule["percent"] = "percent", float(match.group(1))
+    else:
+        for kind in ("flat", "fixed_price"):
+            match = OFFER_PATTERNS[kind].search(text)
+            if match:
+                rule["type"], rule["amount_paise"] = kind, first_amount(match)
+                break
+        else:
+            if OFFER_PATTERNS["bogo"].search(text):
+                rule["type"] = "bogo"
+            elif OFFER_PATTERNS["free_delivery"].search(text):
+                rule["type"] = "free_delivery"
+
+    for field, kind in (("max_discount_paise", "max_discount"), ("min_order_paise", "min_order")):
+        match = OFFER_PATTERNS[kind].search(text)
+        if match:
+            rule[field] = first_amount(match)
+    match = OFFER_PATTERNS["code"].search(text)
+    if match:
+        rule["code"] = match.group(1)
+    return rule
+
+
+def parse_offers(texts):
+    return [parse_offer(text) for text in texts]
+
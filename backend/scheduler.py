@@ -0,0 +1,309 @@
+import random
+import sqlite3
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+
+from jobs import QueueFullError
+
+
+# -------------------- Scheduler --------------------
+class Scheduler:
+    """Periodic re-scrapes of tracked URLs, fed into the job queue.
+
+    State lives in the jobs database, so in-flight counts come straight from
+    the ``jobs`` table and a restart resumes where it stopped: token buckets
+    keep their level and due times are not reset, so nothing stampedes.
+
+    Every tick enqueues the most urgent due URLs, where urgency is
+    ``priority * (1 + overdue / interval)``, while keeping:
+      * all queued + running jobs (scheduled or not) under ``max_in_flight``,
+      * each platform under its ``caps`` entry,
+      * each platform within its token bucket (``rates`` per minute, ``burst``).
+    The next due time of every URL is jittered by +/- ``jitter`` of its interval.
+    Platforms for which ``paused(platform)`` is true (e.g. an open circuit
+    breaker) are skipped; their URLs stay due.
+    """
+
+    def __init__(self, job_store, cache_key, rates=None, burst=2, max_in_flight=4, caps=None,
+                 jitter=0.1, tick=1.0, retry_after=30, window=900, on_finished=None, paused=None):
+        self.job_store = job_store
+        self.path = job_store.path
+        self.cache_key = cache_key
+        self.rates = rates or {}
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.caps = caps or {}
+        self.jitter = jitter
+        self.tick_interval = tick
+        self.retry_after = retry_after
+        self.window = window
+        self.on_finished = on_finished
+        self.paused = paused or (lambda platform: False)
+        self._recent = {}  # platform -> deque of (finished_at, lag, status)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tracked_urls (
+                    url TEXT PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    interval REAL NOT NULL,
+                    priority REAL NOT NULL DEFAULT 1,
+                    enabled INTEGER NOT NULL DEFAULT 1,
+                    created_at REAL NOT NULL,
+                    next_due REAL NOT NULL,
+                    last_due REAL,
+                    last_enqueued_at REAL,
+                    last_job_id TEXT,
+                    last_status TEXT,
+                    last_finished_at REAL,
+                    runs INTEGER NOT NULL DEFAULT 0,
+                    failures INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_tracked_due ON tracked_urls (enabled, next_due);
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    platform TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _jittered(self, interval):
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    # ---------------- Registry ----------------
+    def track(self, url, platform, interval, priority=1.0):
+        """Add or update a tracked URL. A new URL becomes due within one jitter of now."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO tracked_urls (url, platform, interval, priority, created_at, next_due)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET
+                       interval = excluded.interval, priority = excluded.priority, enabled = 1""",
+                (url, platform, interval, priority, now, now + random.uniform(0, self.jitter * interval)),
+            )
+        return self.get(url)
+
+    def untrack(self, url):
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM tracked_urls WHERE url = ?", (url,)).rowcount > 0
+
+    def get(self, url):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM tracked_urls WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def tracked(self, platform=None):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM tracked_urls WHERE ? IS NULL OR platform = ? ORDER BY next_due",
+                (platform, platform),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # ---------------- Ticks ----------------
+    def _buckets(self, conn, now):
+        levels = {row["platform"]: row for row in conn.execute("SELECT * FROM rate_buckets")}
+        buckets = {}
+        for platform, per_minute in self.rates.items():
+            row = levels.get(platform)
+            if row is None:
+                buckets[platform] = float(self.burst)
+            else:
+                buckets[platform] = min(float(self.burst), row["tokens"] + (now - row["updated_at"]) * per_minute / 60)
+        return buckets
+
+    def tick(self, now=None):
+        """Collect finished runs and enqueue whatever is due and allowed; returns the enqueued jobs."""
+        now = now or time.time()
+        self._collect(now)
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                in_flight = {
+                    platform: count for platform, count in conn.execute(
+                        "SELECT platform, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY platform"
+                    )
+                }
+                room = self.max_in_flight - sum(in_flight.values())
+                picked = []
+                if room > 0:
+                    buckets = self._buckets(conn, now)
+                    paused = {}
+                    rows = conn.execute(
+                        "SELECT * FROM tracked_urls WHERE enabled = 1 AND next_due <= ? "
+                        "ORDER BY priority * (1 + (? - next_due) / interval) DESC",
+                        (now, now),
+                    ).fetchall()
+                    for row in rows:
+                        if len(picked) >= room:
+                            break
+                        platform = row["platform"]
+                        if platform not in paused:
+                            paused[platform] = self.paused(platform)
+                        if paused[platform]:
+                            continue
+                        if in_flight.get(platform, 0) >= self.caps.get(platform, float("inf")):
+                            continue
+                        if platform in buckets and buckets[platform] < 1:
+                            continue
+                        if platform in buckets:
+                            buckets[platform] -= 1
+                        in_flight[platform] = in_flight.get(platform, 0) + 1
+                        picked.append(row)
+
+                    conn.executemany(
+                        "INSERT INTO rate_buckets (platform, tokens, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(platform) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                        [(platform, tokens, now) for platform, tokens in buckets.items()],
+                    )
+                    conn.executemany(
+                        "UPDATE tracked_urls SET last_due = next_due, next_due = ?, last_enqueued_at = ?, "
+                        "last_status = NULL WHERE url = ?",
+                        [(now + self._jittered(row["interval"]), now, row["url"]) for row in picked],
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if not picked:
+            return []
+        try:
+            jobs = self.job_store.enqueue_many(
+                [(row["url"], row["platform"], self.cache_key(row["url"], row["platform"])) for row in picked]
+            )
+        except QueueFullError as e:
+            print(f"Scheduler: {e} Retrying {len(picked)} URLs in {self.retry_after}s.")
+            with self._connect() as conn:
+                conn.executemany(
+                    "UPDATE tracked_urls SET next_due = ? WHERE url = ?",
+                    [(now + self.retry_after, row["url"]) for row in picked],
+                )
+            return []
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE tracked_urls SET last_job_id = ? WHERE url = ?",
+                [(job["id"], row["url"]) for row, job in zip(picked, jobs)],
+            )
+        return jobs
+
+    def _collect(self, now):
+        """Record runs whose job has finished since the last tick."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT t.url, t.platform, t.last_due, j.id AS job_id, j.status, j.started_at, j.finished_at
+                   FROM tracked_urls t JOIN jobs j ON j.id = t.last_job_id
+                   WHERE t.last_status IS NULL AND j.status IN ('done', 'failed')"""
+            ).fetchall()
+            finished = []
+            for row in rows:
+                claimed = conn.execute(
+                    "UPDATE tracked_urls SET last_status = ?, last_finished_at = ?, runs = runs + 1, "
+                    "failures = failures + ? WHERE url = ? AND last_job_id = ? AND last_status IS NULL",
+                    (row["status"], row["finished_at"], int(row["status"] == "failed"), row["url"], row["job_id"]),
+                ).rowcount
+                if claimed:
+                    finished.append(row)
+
+        with self._lock:
+            for row in finished:
+                recent = self._recent.setdefault(row["platform"], deque())
+                lag = max(0.0, (row["started_at"] or row["finished_at"]) - (row["last_due"] or row["started_at"]))
+                recent.append((row["finished_at"], lag, row["status"]))
+            for recent in self._recent.values():
+                while recent and recent[0][0] < now - self.window:
+                    recent.popleft()
+
+        if self.on_finished:
+            for row in finished:
+                job = self.job_store.get(row["job_id"])
+                if job:
+                    self.on_finished(job)
+
+    # ---------------- Thread ----------------
+    def _run(self):
+        while not self._stop.wait(self.tick_interval):
+            try:
+                self.tick()
+            except Exception:
+                traceback.print_exc()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # ---------------- Stats ----------------
+    def stats(self, now=None):
+        """Per platform: tracked/due URLs, lag behind due times, throughput, tokens and in-flight jobs."""
+        now = now or time.time()
+        with self._connect() as conn:
+            tracked = conn.execute(
+                """SELECT platform, COUNT(*) AS tracked,
+                          SUM(CASE WHEN next_due <= ? THEN 1 ELSE 0 END) AS due,
+                          MAX(CASE WHEN next_due <= ? THEN ? - next_due ELSE 0 END) AS oldest_overdue,
+                          SUM(runs) AS runs, SUM(failures) AS failures
+                   FROM tracked_urls WHERE enabled = 1 GROUP BY platform""",
+                (now, now, now),
+            ).fetchall()
+            in_flight = dict(conn.execute(
+                "SELECT platform, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY platform"
+            ).fetchall())
+            buckets = self._buckets(conn, now)
+
+        with self._lock:
+            recent = {platform: list(runs) for platform, runs in self._recent.items()}
+
+        platforms = {}
+        for row in tracked:
+            platform = row["platform"]
+            runs = recent.get(platform, [])
+            lags = sorted(lag for _, lag, _ in runs)
+            platforms[platform] = {
+                "tracked": row["tracked"],
+                "due": row["due"],
+                "oldest_overdue_seconds": round(row["oldest_overdue"] or 0, 1),
+                "runs": row["runs"],
+                "failures": row["failures"],
+                "in_flight": in_flight.get(platform, 0),
+                "rate_per_minute": self.rates.get(platform),
+                "tokens": round(buckets[platform], 2) if platform in buckets else None,
+                "throughput_per_minute": round(len(runs) * 60 / self.window, 2),
+                "failed_in_window": sum(1 for _, _, status in runs if status == "failed"),
+                "lag_seconds": {
+                    "avg": round(sum(lags) / len(lags), 1),
+                    "p95": round(lags[min(len(lags) - 1, int(0.95 * len(lags)))], 1),
+                    "max": round(lags[-1], 1),
+                } if lags else None,
+            }
+        return {
+            "running": self._thread is not None,
+            "window_seconds": self.window,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": sum(in_flight.values()),
+            "platforms": platforms,
+        }
@@ -0,0 +1,429 @@
+import os
+import shutil
+import time
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException
+)
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.keys import Keys
+from driver_pool import DriverPool
+from extractors import EXTRACTORS
+from selector_registry import registry as selector_registry
+from fast_path import FastPathClient
+from waits import AdaptiveTimeouts, platform_timeout, wait_for_dom_stable
+from browser_profile import ResourceStats, configure_options, isolate
+from browser_tabs import TabbedBrowsers, is_tab_failure
+from catalog import CatalogCrawler, is_lazy_loaded, page_scheme, scroll_until_stable
+import archive
+import streams
+import telemetry
+from telemetry import span
+from prices import iter_normalized
+
+# -------------------- Chrome Driver Path --------------------
+CHROMEDRIVER_PATH = "/opt/homebrew/bin/chromedriver"  
+
+
+# -------------------- Chrome Driver --------------------
+def chrome_options():
+    options = Options()
+    options.add_argument("--headless=new")  # or --headless=chrome if "new" causes issues
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-software-rasterizer")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    configure_options(options)
+
+    options.binary_location = os.getenv("CHROME_BIN", "/usr/bin/chromium")
+    return options
+
+
+class IsolatedChrome(webdriver.Chrome):
+    """A ``webdriver.Chrome`` on an ``isolate``d profile, which it deletes on quit."""
+
+    def __init__(self, profile_dir, **kwargs):
+        self.profile_dir = profile_dir
+        super().__init__(**kwargs)
+
+    def quit(self):
+        try:
+            super().quit()
+        finally:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+def get_chrome_driver():
+    """A Chromium with its own profile and DevTools port, so concurrent drivers never share either."""
+    options = chrome_options()
+    profile_dir = isolate(options)
+    service = Service(os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"))
+    try:
+        return IsolatedChrome(profile_dir, service=service, options=options)
+    except Exception:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        raise
+
+
+# -------------------- Driver Pool --------------------
+# BROWSER_MODE=process: one Chromium per pooled driver.
+# BROWSER_MODE=tabs: pooled drivers are isolated tabs, TABS_PER_BROWSER to a Chromium.
+BROWSER_MODE = os.getenv("BROWSER_MODE", "process").strip().lower()
+
+tabbed_browsers = TabbedBrowsers(
+    chrome_options,
+    os.getenv("CHROMEDRIVER_PATH", "/usr/bin/chromedriver"),
+    tabs_per_browser=int(os.getenv("TABS_PER_BROWSER", "4")),
+    page_load_timeout=float(os.getenv("BROWSER_PAGE_LOAD_TIMEOUT", "60")),
+) if BROWSER_MODE == "tabs" else None
+
+# Each worker process owns its own pool; every driver gets its own profile and
+# DevTools port, so pools and workers scale with memory, not port conflicts.
+driver_pool = DriverPool(
+    tabbed_browsers or get_chrome_driver,
+    size=int(os.getenv("DRIVER_POOL_SIZE", "1")),
+    max_uses=int(os.getenv("DRIVER_MAX_USES", "20")),
+    acquire_timeout=float(os.getenv("DRIVER_ACQUIRE_TIMEOUT", "60")),
+    fatal=is_tab_failure,
+    on_lease=lambda wait: telemetry.record("driver_acquire", wait),
+)
+
+# Bytes, page-ready time and Chromium RSS of each browser scrape (RESOURCE_BLOCKING=off|standard|lite).
+resource_stats = ResourceStats()
+
+
+# -------------------- Scrapers --------------------
+# Page waits follow each platform's recent p95 page-ready time; PLATFORM_TIMEOUTS are the ceilings.
+page_timeouts = AdaptiveTimeouts(
+    multiplier=float(os.getenv("TIMEOUT_P95_MULTIPLIER", "3")),
+    floor=float(os.getenv("TIMEOUT_FLOOR", "3")),
+)
+
+
+def wait_for_selector(driver, platform, name):
+    """Wait up to the page timeout for any alternative of a registry selector, counting the lookup."""
+    chain = getattr(selector_registry.get(platform), name)
+    try:
+        WebDriverWait(driver, page_timeouts.page(platform)).until(EC.presence_of_element_located(chain.locator))
+    except TimeoutException:
+        chain.record(False)
+        raise
+    chain.record(True)
+
+
+def publish(items):
+    """Give scraped rows their typed price columns and copy them to the stream as they go by."""
+    return streams.emit(iter_normalized(items))
+
+
+def extract_items(platform, page_source):
+    """Parse a page snapshot; each item reaches a streaming client as soon as it is parsed."""
+    archive.capture("page", page_source)
+    extractor = EXTRACTORS[platform]
+    root = extractor.parse(page_source)
+    restaurant, city = extractor.header(root)
+    return list(publish(extractor.iter_items(root))), restaurant, city
+
+
+class SwiggyDiscountCouponExtractor:
+    # One round-trip for every heading/coupon text currently on the page.
+    OFFER_TEXTS_SCRIPT = """
+        const texts = (xpath) => {
+            const found = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const values = [];
+            for (let i = 0; i < found.snapshotLength; i++) {
+                const text = found.snapshotItem(i).innerText.trim();
+                if (text) values.push(text);
+            }
+            return values;
+        };
+        const [discounts, coupons, modal] = arguments;
+        return {discounts: texts(discounts), coupons: texts(coupons), html: modal ? modal.outerHTML : null};
+    """
+
+    def __init__(self, driver, platform="swiggy"):
+        self.driver = driver
+        self.selectors = selector_registry.get(platform)
+        self.cards = self.selectors.offer_cards.locator
+        self.modal = self.selectors.offer_modal.locator
+        self.close_button = self.selectors.offer_close.locator
+        self.timeouts = {
+            name: platform_timeout(platform, name)
+            for name in ("modal_open", "modal_close", "dom_stable", "dom_quiet")
+        }
+
+    def _open(self, card):
+        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card)
+        try:
+            card.click()
+        except (ElementClickInterceptedException, ElementNotInteractableException):
+            self.driver.execute_script("arguments[0].click();", card)
+        WebDriverWait(self.driver, self.timeouts["modal_open"]).until(EC.visibility_of_element_located(self.modal))
+
+    def _close(self):
+        try:
+            self.driver.find_element(*self.close_button).click()
+        except (NoSuchElementException, ElementClickInterceptedException, ElementNotInteractableException):
+            ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
+        WebDriverWait(self.driver, self.timeouts["modal_close"]).until(EC.invisibility_of_element_located(self.modal))
+
+    def extract_discounts_and_coupons(self):
+        discounts, coupons = [], []
+
+        try:
+            cards = self.driver.find_elements(*self.cards)
+            self.selectors.offer_cards.record(bool(cards))
+            print(f"Found {len(cards)} offer cards.")
+
+            for i in range(len(cards)):
+                status = "ok"
+                started = time.perf_counter()
+                try:
+                    try:
+                        self._open(cards[i])
+                    except StaleElementReferenceException:
+                        # The list re-rendered under us; look the cards up again once.
+                        cards = self.driver.find_elements(*self.cards)
+                        self._open(cards[i])
+                    opened = time.perf_counter()
+                    telemetry.record("offer_modal_open", opened - started, card=i + 1)
+
+                    modal = self.driver.find_element(*self.modal)
+                    wait_for_dom_stable(self.driver, self.timeouts["dom_stable"], self.timeouts["dom_quiet"], modal)
+                    telemetry.record("offer_modal_ready", time.perf_counter() - opened, card=i + 1)
+
+                    texts = self.driver.execute_script(
+                        self.OFFER_TEXTS_SCRIPT, self.selectors.offer_discounts.xpath, self.selectors.offer_coupons.xpath,
+                        modal if archive.current() is not None else None,  # its HTML rides along when archiving
+                    )
+                    archive.capture("offer_modal", texts["html"])
+                    self.selectors.offer_discounts.record(bool(texts["discounts"]))
+                    self.selectors.offer_coupons.record(bool(texts["coupons"]))
+                    for text in texts["discounts"]:
+                        if text not in discounts:
+                            discounts.append(text)
+                    for text in texts["coupons"]:
+                        if text not in coupons:
+                            coupons.append(text)
+
+                    self._close()
+                except TimeoutException:
+                    status = "timeout"
+                    print(f"Timeout waiting for modal on card {i+1}.")
+                    try:
+                        self._close()
+                    except Exception:
+                        pass
+                except Exception as e:
+                    status = "error"
+                    print(f"Error processing card {i+1}: {repr(e)}")
+
+                total = time.perf_counter() - started
+                telemetry.record("offer_card", total, card=i + 1, status=status)
+                telemetry.OFFER_CARDS.labels(status).inc()
+                print(f"Card {i+1}: {status} in {total:.2f}s")
+
+        except Exception as e:
+            print("Error during overall coupon extraction:", repr(e))
+
+        return discounts, coupons
+
+
+
+def scrape_swiggy(url, resources=None):
+    with driver_pool.lease() as driver, resource_stats.measure(driver, "swiggy", resources) as meter:
+        return _scrape_swiggy(driver, url, meter)
+
+
+def _scrape_swiggy(driver, url, meter):
+    with span("page_load"):
+        driver.get(url)
+
+    with span("first_element"):
+        wait_for_selector(driver, "swiggy", "products")
+    meter.ready()
+    page_timeouts.observe("swiggy", meter.page_ready)
+
+    with span("item_extraction"):
+        items, restaurant, city = extract_items("swiggy", driver.page_source)
+
+    with span("offer_extraction"):
+        discount_coupon_extractor = SwiggyDiscountCouponExtractor(driver)
+        discounts, coupons = discount_coupon_extractor.extract_discounts_and_coupons()
+
+    return items, restaurant, city, discounts, coupons
+
+
+def scrape_zomato(url, resources=None):
+    with driver_pool.lease() as driver, resource_stats.measure(driver, "zomato", resources) as meter:
+        return _scrape_zomato(driver, url, meter)
+
+
+def _scrape_zomato(driver, url, meter):
+    with span("page_load"):
+        driver.get(url)
+
+    try:
+        with span("first_element"):
+            wait_for_selector(driver, "zomato", "products")
+    except TimeoutException:
+        raise TimeoutError("Zomato page took too long to load.")
+    meter.ready()
+    page_timeouts.observe("zomato", meter.page_ready)
+
+    with span("item_extraction"):
+        items, restaurant, city = extract_items("zomato", driver.page_source)
+
+    return items, restaurant, city, [], []  # No discounts or coupons for Zomato
+
+# Browser-side catalog crawl; pages that need a browser are fetched one at a time on the leased session.
+catalog_crawler = CatalogCrawler(EXTRACTORS["mystore"], max_pages=int(os.getenv("MYSTORE_MAX_PAGES", "200")), parallel=1)
+
+
+def wait_for_mystore_cards(driver):
+    """Wait for the first product card; an empty catalog simply times out (returns False)."""
+    try:
+        wait_for_selector(driver, "mystore", "cards")
+    except TimeoutException:
+        return False
+    return True
+
+
+def mystore_page(driver, url):
+    driver.get(url)
+    wait_for_mystore_cards(driver)
+    page_source = driver.page_source
+    archive.capture("page", page_source, url)
+    return page_source
+
+
+def scrape_mystore(url, resources=None, crawl=None):
+    with driver_pool.lease() as driver, resource_stats.measure(driver, "mystore", resources) as meter:
+        return _scrape_mystore(driver, url, meter, crawl)
+
+
+def _scrape_mystore(driver, url, meter, crawl=None):
+    with span("page_load"):
+        driver.get(url)
+    with span("first_element"):
+        found = wait_for_mystore_cards(driver)
+    meter.ready()
+    if found:
+        page_timeouts.observe("mystore", meter.page_ready)
+
+    started = time.perf_counter()
+    extractor = EXTRACTORS["mystore"]
+    page_source = driver.page_source
+    root = extractor.parse(page_source)
+    loads = 0
+    if page_scheme(root, url) is None:
+        with span("catalog_scroll"):
+            # Unmarked infinite scroll only gets one idle round before we call the catalog complete.
+            loads, _ = scroll_until_stable(
+                driver, selector_registry.get("mystore").cards.xpath,
+                timeout=platform_timeout("mystore", "scroll"),
+                round_timeout=platform_timeout("mystore", "scroll_round"),
+                quiet=platform_timeout("mystore", "scroll_quiet"),
+                patience=2 if is_lazy_loaded(root) else 1,
+            )
+        if loads:
+            page_source = driver.page_source
+            root = extractor.parse(page_source)
+    archive.capture("page", page_source, url)  # after scrolling: every lazy-loaded card
+
+    stats = {}
+    with span("item_extraction"):
+        items, restaurant, city = catalog_crawler.crawl(
+            url, root, lambda page_url: mystore_page(driver, page_url), emit=publish, stats=stats,
+        )
+    if loads:
+        stats.update(mechanism="lazy_load", pages=1 + loads)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    if crawl is not None:
+        crawl.update(stats, fetched_by="browser")
+
+    return items, restaurant, city, [], []  # No coupons/discounts currently extracted for MyStore
+
+
+# -------------------- Fast Path --------------------
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+
+fast_path = FastPathClient(timeout=float(os.getenv("FAST_PATH_TIMEOUT", "10")))
+
+
+# -------------------- Browser Retries --------------------
+BROWSER_RETRIES = int(os.getenv("BROWSER_RETRIES", "1"))
+
+
+def browser_scrape(platform, url, resources, crawl=None):
+    """Scrape in a pooled browser; a crashed or hung tab is discarded and only this scrape is retried.
+
+    Selenium's TimeoutException leaves as a plain TimeoutError, so the API
+    process can handle it without importing Selenium.
+    """
+    scraper = {
+        "swiggy": scrape_swiggy,
+        "zomato": scrape_zomato,
+        "mystore": lambda url, resources: scrape_mystore(url, resources, crawl),
+    }[platform]
+    for attempt in range(BROWSER_RETRIES + 1):
+        try:
+            return scraper(url, resources)
+        except WebDriverException as e:
+            if attempt == BROWSER_RETRIES or not is_tab_failure(e):
+                if isinstance(e, TimeoutException):
+                    raise TimeoutError(e.msg or "Timed out waiting for the page.") from e
+                raise
+            print(f"Browser tab failed on {url} ({e.msg}); retrying on a fresh tab.")
+            streams.restart()
+            archive.discard()
+
+
+# -------------------- Worker Hooks --------------------
+# Browsers each worker starts in the background as it comes up (capped at DRIVER_POOL_SIZE).
+DRIVER_WARM_MIN = int(os.getenv("DRIVER_WARM_MIN", "1"))
+
+warmup_stats = {"target": min(DRIVER_WARM_MIN, driver_pool.size), "done": False, "seconds": None, "error": None}
+
+
+def warm():
+    """Start DRIVER_WARM_MIN pooled browsers so the first browser scrape doesn't pay for the launch."""
+    started = time.perf_counter()
+    try:
+        driver_pool.warm(warmup_stats["target"])
+    except Exception as e:
+        warmup_stats["error"] = repr(e)
+        raise
+    finally:
+        warmup_stats["done"] = True
+        warmup_stats["seconds"] = round(time.perf_counter() - started, 3)
+
+
+def stats():
+    return {
+        "driver_pool": driver_pool.stats(),
+        "browsers": tabbed_browsers.stats() if tabbed_browsers else None,
+        "fast_path": fast_path.stats(),
+        "resources": resource_stats.stats(),
+        "timeouts": page_timeouts.stats(),
+        "selectors": selector_registry.stats(),
+        "warmup": dict(warmup_stats),
+    }
+
+
+def close():
+    driver_pool.close()
+    if tabbed_browsers:
+        tabbed_browsers.close()
+    fast_path.close()
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+
+from lxml import etree
+
+RULES_DIR = os.getenv("SELECTOR_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_rules"))
+RULE_EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+class SelectorError(Exception):
+    """A rules file could not be loaded; the previous rules stay in use."""
+
+
+# -------------------- Chains --------------------
+class SelectorChain:
+    """One named selector: XPath alternatives tried in order until one matches.
+
+    Compiled once per load. Counts which alternative matched each lookup, and
+    misses where none did, so a selector that stops matching after a site
+    redeploy shows up in the stats.
+    """
+
+    def __init__(self, name, expressions):
+        if isinstance(expressions, str):
+            expressions = [expressions]
+        if not expressions:
+            raise SelectorError(f"Selector '{name}' has no expressions")
+        self.name = name
+        self.expressions = list(expressions)
+        try:
+            self.compiled = [etree.XPath(expression) for expression in self.expressions]
+        except etree.XPathSyntaxError as e:
+            raise SelectorError(f"Selector '{name}': {e}")
+        # One XPath for the browser (WebDriverWait, find_elements): any alternative matches.
+        self.xpath = self.expressions[0] if len(self.expressions) == 1 else " | ".join(
+            f"({expression})" for expression in self.expressions
+        )
+        self.hits = [0] * len(self.compiled)
+        self.browser_hits = 0
+        self.misses = 0
+
+    def __call__(self, node):
+        for index, xpath in enumerate(self.compiled):
+            result = xpath(node)
+            if result:
+                self.hits[index] += 1
+                return result
+        self.misses += 1
+        return []
+
+    @property
+    def locator(self):
+        """Selenium locator, e.g. ``EC.presence_of_element_located(chain.locator)``."""
+        return ("xpath", self.xpath)
+
+    def record(self, found):
+        """Count a lookup done in the browser with ``locator`` or ``xpath``."""
+        if found:
+            self.browser_hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self):
+        hits = sum(self.hits) + self.browser_hits
+        return {
+            "hits": hits,
+            "misses": self.misses,
+            "fallback_hits": sum(self.hits[1:]),
+            "hit_rate": round(hits / (hits + self.misses), 4) if hits + self.misses else None,
+            "expressions": [
+                {"xpath": expression, "hits": count} for expression, count in zip(self.expressions, self.hits)
+            ],
+        }
+
+
+class SelectorSet:
+    """The selectors of one platform as loaded from one version of its rules file."""
+
+    def __init__(self, platform, rules, path=None, mtime=None):
+        self.platform = platform
+        self.version = rules.get("version")
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        selectors = rules.get("selectors")
+        if not isinstance(selectors, dict) or not selectors:
+            raise SelectorError(f"{path or platform}: 'selectors' must map names to XPath lists")
+        try:
+            self.chains = {name: SelectorChain(name, expressions) for name, expressions in selectors.items()}
+        except SelectorError as e:
+            raise SelectorError(f"{path or platform}: {e}")
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["chains"][name]
+        except KeyError:
+            raise AttributeError(f"No '{name}' selector for {self.__dict__.get('platform')}")
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "selectors": {name: chain.stats() for name, chain in self.chains.items()},
+        }
+
+
+# -------------------- Registry --------------------
+def read_rules(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            try:
+                rules = json.load(f)
+            except ValueError as e:
+                raise SelectorError(f"{path}: {e}")
+        else:
+            try:
+                import yaml
+            except ImportError:
+                raise SelectorError(f"{path}: YAML rules need PyYAML: pip install pyyaml")
+            try:
+                rules = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise SelectorError(f"{path}: {e}")
+    if not isinstance(rules, dict):
+        raise SelectorError(f"{path}: expected a mapping with 'version' and 'selectors'")
+    return rules
+
+
+class SelectorRegistry:
+    """Per-platform selector rules from ``<directory>/<platform>.json`` (or .yaml).
+
+    Files are re-checked at most every ``check_interval`` seconds when rules
+    are looked up, so edited rules reach running workers without a restart.
+    A file that fails to load (bad JSON, bad XPath, a dropped selector) is
+    reported in ``stats`` and the rules already loaded keep working.
+    """
+
+    def __init__(self, directory=RULES_DIR, check_interval=2.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._sets = {}
+        self._errors = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _files(self):
+        files = {}
+        for name in sorted(os.listdir(self.directory)):
+            platform, extension = os.path.splitext(name)
+            if extension in RULE_EXTENSIONS:
+                files.setdefault(platform, os.path.join(self.directory, name))
+        return files
+
+    def reload(self):
+        """Load new or changed rules files; returns the platforms that were (re)loaded."""
+        with self._lock:
+            self._checked = time.monotonic()
+            reloaded = []
+            for platform, path in self._files().items():
+                current = self._sets.get(platform)
+                try:
+                    mtime = os.path.getmtime(path)
+                    if current is not None and current.path == path and current.mtime == mtime:
+                        continue
+                    selector_set = SelectorSet(platform, read_rules(path), path, mtime)
+                    if current is not None:
+                        dropped = set(current.chains) - set(selector_set.chains)
+                        if dropped:
+                            raise SelectorError(f"{path}: missing selectors {', '.join(sorted(dropped))}")
+                except (OSError, SelectorError) as e:
+                    if self._errors.get(platform) != str(e):
+                        print(f"Keeping the loaded {platform} selectors: {e}")
+                    self._errors[platform] = str(e)
+                    continue
+                if current is not None:
+                    print(f"Reloaded {platform} selectors (version {selector_set.version}).")
+                self._sets[platform] = selector_set
+                self._errors.pop(platform, None)
+                reloaded.append(platform)
+            return reloaded
+
+    def get(self, platform):
+        """Current selectors of ``platform``; fetch once per page, not per element."""
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.reload()
+        try:
+            return self._sets[platform]
+        except KeyError:
+            raise SelectorError(
+                self._errors.get(platform) or f"No selector rules for {platform} in {self.directory}"
+            )
+
+    def stats(self):
+        with self._lock:
+            sets = dict(self._sets)
+            errors = dict(self._errors)
+        return {
+            platform: {**selector_set.stats(), "error": errors.get(platform)}
+            for platform, selector_set in sets.items()
+        }
+
+
+registry = SelectorRegistry(check_interval=float(os.getenv("SELECTOR_RELOAD_INTERVAL", "2")))
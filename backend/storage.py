@@ -0,0 +1,566 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager, nullcontext
+
+from analytics import ROLLUP_SCHEMA, Analytics, menu_rows, rebuild_rollups, update_rollups
+from prices import TYPED_FIELDS, normalize_items, parse_offer
+
+ITEM_FIELDS = {"name": "name", "item name": "name", "mrp": "mrp", "price": "mrp", "discounted price": "discounted_price"}
+NO_OFFERS = {"no discounts", "no coupons", ""}
+
+
+# -------------------- CSV --------------------
+def write_csv(data, platform, restaurant, city, discounts, coupons):
+    city = city.replace(" ", "_").strip()
+    restaurant = restaurant.replace(" ", "_").strip()
+    platform = platform.lower().strip()
+
+    folder_path = os.path.join("data", city, restaurant)
+    os.makedirs(folder_path, exist_ok=True)
+
+    # ---------------- Write item data ----------------
+    items_filename = f"{restaurant}_{city}_{platform}_items.csv"
+    items_path = os.path.join(folder_path, items_filename)
+
+    with open(items_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+
+        if data:
+            headers = list(data[0].keys())
+            writer.writerow(headers)
+            for item in data:
+                writer.writerow([item.get(h, "N/A") for h in headers])
+        else:
+            writer.writerow(["No items found."])
+
+    # ---------------- Write discounts/coupons if Swiggy ----------------
+    offers_path = None
+    if platform == "swiggy":
+        offers_filename = f"{restaurant}_{city}_{platform}_offers.csv"
+        offers_path = os.path.join(folder_path, offers_filename)
+
+        with open(offers_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["Discounts"])
+            if discounts:
+                for discount in discounts:
+                    writer.writerow([discount])
+            else:
+                writer.writerow(["No Discounts"])
+
+            writer.writerow([])  # Blank line between sections
+            writer.writerow(["Coupons"])
+            if coupons:
+                for coupon in coupons:
+                    writer.writerow([coupon])
+            else:
+                writer.writerow(["No Coupons"])
+
+    return items_path, offers_path
+
+
+class CsvStorage:
+    """The original per-restaurant CSV layout, rewritten on every scrape."""
+
+    stage = "write_csv"
+
+    def save_scrape(self, platform, restaurant, city, items, discounts, coupons, scraped_at=None):
+        items_path, offers_path = write_csv(items, platform, restaurant, city, discounts, coupons)
+        return {"items_csv": items_path, "offers_csv": offers_path}
+
+
+# -------------------- SQLite --------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS restaurants (
+    id INTEGER PRIMARY KEY,
+    platform TEXT NOT NULL,
+    city TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (platform, city, name)
+);
+CREATE TABLE IF NOT EXISTS scrapes (
+    id INTEGER PRIMARY KEY,
+    restaurant_id INTEGER NOT NULL REFERENCES restaurants (id),
+    city TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    restaurant TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    item_count INTEGER NOT NULL,
+    menu_hash TEXT,
+    offers_hash TEXT,
+    added INTEGER,
+    changed INTEGER,
+    removed INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_scrapes_lookup ON scrapes (city, platform, restaurant, scraped_at);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    restaurant_id INTEGER NOT NULL REFERENCES restaurants (id),
+    name TEXT NOT NULL,
+    UNIQUE (restaurant_id, name)
+);
+CREATE TABLE IF NOT EXISTS price_snapshots (
+    scrape_id INTEGER NOT NULL REFERENCES scrapes (id),
+    item_id INTEGER NOT NULL REFERENCES items (id),
+    scraped_at REAL NOT NULL,
+    mrp TEXT,
+    discounted_price TEXT,
+    extra TEXT,
+    change_type TEXT,
+    mrp_paise INTEGER,
+    price_paise INTEGER,
+    discount_pct REAL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_item ON price_snapshots (item_id, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_scrape ON price_snapshots (scrape_id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_time ON price_snapshots (scraped_at);
+-- Content-hash index of each item's last known state, for O(n) diffs.
+CREATE TABLE IF NOT EXISTS item_state (
+    item_id INTEGER PRIMARY KEY REFERENCES items (id),
+    restaurant_id INTEGER NOT NULL REFERENCES restaurants (id),
+    content_hash TEXT,
+    present INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_item_state_restaurant ON item_state (restaurant_id);
+CREATE TABLE IF NOT EXISTS offers (
+    scrape_id INTEGER NOT NULL REFERENCES scrapes (id),
+    restaurant_id INTEGER NOT NULL REFERENCES restaurants (id),
+    scraped_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL,
+    rule TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_offers_restaurant ON offers (restaurant_id, scraped_at);
+"""
+
+
+def add_missing_columns(conn, table, columns):
+    """Bring databases created by older versions up to the current schema."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, column_type in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
+def content_hash(value):
+    return hashlib.blake2b(json.dumps(value, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def typed_value(value):
+    """Typed price columns read back from CSV arrive as strings ("" for None)."""
+    if isinstance(value, str):
+        try:
+            return float(value) if "." in value else int(value)
+        except ValueError:
+            return None
+    return value
+
+
+def split_item(item):
+    """Map a scraped row onto (name, mrp, discounted_price, extra-json, typed prices)."""
+    row = {"name": "N/A", "mrp": None, "discounted_price": None}
+    extra = {}
+    for key, value in item.items():
+        if key in TYPED_FIELDS:
+            continue
+        field = ITEM_FIELDS.get(key.strip().lower())
+        if field:
+            row[field] = value
+        else:
+            extra[key] = value
+    typed = tuple(typed_value(item.get(field)) for field in TYPED_FIELDS)
+    return row["name"], row["mrp"], row["discounted_price"], json.dumps(extra) if extra else None, typed
+
+
+class SQLiteStorage:
+    """Normalized scrape history in a single SQLite database (WAL mode)."""
+
+    stage = "sqlite_save"
+
+    def __init__(self, path):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            add_missing_columns(conn, "scrapes", {
+                "menu_hash": "TEXT", "offers_hash": "TEXT", "added": "INTEGER", "changed": "INTEGER", "removed": "INTEGER",
+            })
+            add_missing_columns(conn, "price_snapshots", {
+                "change_type": "TEXT", "mrp_paise": "INTEGER", "price_paise": "INTEGER", "discount_pct": "REAL",
+            })
+            add_missing_columns(conn, "offers", {"rule": "TEXT"})
+            conn.executescript(ROLLUP_SCHEMA)
+            if conn.execute("SELECT 1 FROM menu_items LIMIT 1").fetchone() is None and conn.execute(
+                "SELECT 1 FROM item_state WHERE present = 1 LIMIT 1"
+            ).fetchone() is not None:
+                conn.execute("BEGIN IMMEDIATE")
+                print(f"Built analytics rollups for {rebuild_rollups(conn)} restaurants.")
+                conn.execute("COMMIT")
+        self.analytics = Analytics(self._connect)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _restaurant_id(conn, platform, city, restaurant):
+        conn.execute(
+            "INSERT OR IGNORE INTO restaurants (platform, city, name) VALUES (?, ?, ?)",
+            (platform, city, restaurant),
+        )
+        return conn.execute(
+            "SELECT id FROM restaurants WHERE platform = ? AND city = ? AND name = ?",
+            (platform, city, restaurant),
+        ).fetchone()[0]
+
+    @staticmethod
+    def _item_ids(conn, restaurant_id, names):
+        conn.executemany(
+            "INSERT OR IGNORE INTO items (restaurant_id, name) VALUES (?, ?)",
+            [(restaurant_id, name) for name in set(names)],
+        )
+        rows = conn.execute("SELECT id, name FROM items WHERE restaurant_id = ?", (restaurant_id,)).fetchall()
+        return {name: item_id for item_id, name in rows}
+
+    def _save(self, conn, platform, restaurant, city, items, discounts, coupons, scraped_at):
+        """Persist only what changed since the restaurant's last scrape.
+
+        Items are keyed by name; every row sharing a name is hashed together
+        so duplicate names (sizes, variants) don't flip-flop between scrapes.
+        """
+        platform = platform.lower().strip()
+        restaurant_id = self._restaurant_id(conn, platform, city, restaurant)
+        normalize_items([item for item in items if "price_paise" not in item])
+
+        variants = {}
+        for item in items:
+            name, *prices = split_item(item)
+            variants.setdefault(name, []).append(prices)
+        # Typed prices derive from the raw strings, so they stay out of the hash.
+        hashes = {name: content_hash([row[:3] for row in rows]) for name, rows in variants.items()}
+        menu_hash = content_hash(sorted(hashes.values()))
+        offers_hash = content_hash([discounts, coupons])
+
+        previous = conn.execute(
+            "SELECT menu_hash, offers_hash FROM scrapes WHERE restaurant_id = ? ORDER BY scraped_at DESC, id DESC LIMIT 1",
+            (restaurant_id,),
+        ).fetchone()
+        menu_changed = previous is None or previous["menu_hash"] != menu_hash
+        offers_changed = previous is None or previous["offers_hash"] != offers_hash
+
+        added, changed, removed = [], [], []
+        if menu_changed:
+            item_ids = self._item_ids(conn, restaurant_id, variants)
+            state = {
+                row["item_id"]: (row["content_hash"], row["present"])
+                for row in conn.execute(
+                    "SELECT item_id, content_hash, present FROM item_state WHERE restaurant_id = ?", (restaurant_id,)
+                )
+            }
+            current_ids = set()
+            for name, digest in hashes.items():
+                item_id = item_ids[name]
+                current_ids.add(item_id)
+                old_hash, present = state.get(item_id, (None, 0))
+                if not present:
+                    added.append((item_id, name))
+                elif old_hash != digest:
+                    changed.append((item_id, name))
+            removed = [item_id for item_id, (_, present) in state.items() if present and item_id not in current_ids]
+
+        scrape_id = conn.execute(
+            "INSERT INTO scrapes (restaurant_id, city, platform, restaurant, scraped_at, item_count, "
+            "menu_hash, offers_hash, added, changed, removed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (restaurant_id, city, platform, restaurant, scraped_at, len(items),
+             menu_hash, offers_hash, len(added), len(changed), len(removed)),
+        ).lastrowid
+
+        snapshots = [
+            (scrape_id, item_id, scraped_at, mrp, discounted, extra, kind, *typed)
+            for kind, entries in (("added", added), ("changed", changed))
+            for item_id, name in entries
+            for mrp, discounted, extra, typed in variants[name]
+        ] + [(scrape_id, item_id, scraped_at, None, None, None, "removed", None, None, None) for item_id in removed]
+        conn.executemany(
+            "INSERT INTO price_snapshots (scrape_id, item_id, scraped_at, mrp, discounted_price, extra, change_type, "
+            "mrp_paise, price_paise, discount_pct) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            snapshots,
+        )
+        conn.executemany(
+            "INSERT INTO item_state (item_id, restaurant_id, content_hash, present, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(item_id) DO UPDATE SET content_hash = excluded.content_hash, "
+            "present = excluded.present, updated_at = excluded.updated_at",
+            [(item_id, restaurant_id, hashes[name], 1, scraped_at) for item_id, name in added + changed]
+            + [(item_id, restaurant_id, None, 0, scraped_at) for item_id in removed],
+        )
+        if menu_changed:
+            update_rollups(conn, restaurant_id, platform, city, restaurant, menu_rows(item_ids, variants), scraped_at)
+
+        if offers_changed:
+            conn.executemany(
+                "INSERT INTO offers (scrape_id, restaurant_id, scraped_at, kind, text, rule) VALUES (?, ?, ?, ?, ?, ?)",
+                [(scrape_id, restaurant_id, scraped_at, kind, text, json.dumps(parse_offer(text)))
+                 for kind, texts in (("discount", discounts), ("coupon", coupons)) for text in texts],
+            )
+        return scrape_id, {"added": len(added), "changed": len(changed), "removed": len(removed)}
+
+    def save_scrape(self, platform, restaurant, city, items, discounts, coupons, scraped_at=None):
+        with self.transaction() as conn:
+            scrape_id, changes = self._save(
+                conn, platform, restaurant, city, items, discounts, coupons, scraped_at or time.time()
+            )
+        return {"scrape_id": scrape_id, "changes": changes}
+
+    def changes(self, since=0.0, cursor=0, limit=500, platform=None, city=None, restaurant=None):
+        """Item changes recorded after ``since`` (epoch seconds), oldest first.
+
+        ``cursor`` is the last ``change_id`` already seen; pass back
+        ``next_cursor`` to continue.
+        """
+        filters, params = ["p.scraped_at > ?", "p.rowid > ?"], [since, cursor]
+        for column, value in (("r.platform", platform), ("r.city", city), ("r.name", restaurant)):
+            if value:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""SELECT p.rowid AS change_id, p.scraped_at, p.change_type, r.platform, r.city,
+                           r.name AS restaurant, i.name, p.mrp, p.discounted_price, p.extra,
+                           p.mrp_paise, p.price_paise, p.discount_pct,
+                           (SELECT prev.price_paise FROM price_snapshots prev
+                             WHERE prev.item_id = p.item_id AND prev.scrape_id < p.scrape_id
+                             ORDER BY prev.rowid DESC LIMIT 1) AS previous_price_paise,
+                           (SELECT prev.mrp FROM price_snapshots prev
+                             WHERE prev.item_id = p.item_id AND prev.scrape_id < p.scrape_id
+                             ORDER BY prev.rowid DESC LIMIT 1) AS previous_mrp,
+                           (SELECT prev.discounted_price FROM price_snapshots prev
+                             WHERE prev.item_id = p.item_id AND prev.scrape_id < p.scrape_id
+                             ORDER BY prev.rowid DESC LIMIT 1) AS previous_discounted_price
+                    FROM price_snapshots p
+                    JOIN items i ON i.id = p.item_id
+                    JOIN restaurants r ON r.id = i.restaurant_id
+                    WHERE {" AND ".join(filters)}
+                    ORDER BY p.rowid
+                    LIMIT ?""",
+                params + [limit],
+            ).fetchall()
+        changes = []
+        for row in rows:
+            change = dict(row)
+            change["extra"] = json.loads(change["extra"]) if change["extra"] else None
+            changes.append(change)
+        return {
+            "changes": changes,
+            "next_cursor": changes[-1]["change_id"] if changes else cursor,
+            "has_more": len(changes) == limit,
+        }
+
+    def restaurants(self, city=None):
+        query, params = "SELECT id, platform, city, name FROM restaurants", []
+        if city:
+            query += " WHERE city = ?"
+            params.append(city)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY id", params)]
+
+    def current_menu(self, restaurant_id):
+        """Items currently on a restaurant's menu, at their latest recorded prices."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT i.name, p.mrp, p.discounted_price, p.price_paise
+                   FROM item_state s
+                   JOIN items i ON i.id = s.item_id
+                   JOIN price_snapshots p ON p.item_id = s.item_id
+                   WHERE s.restaurant_id = ? AND s.present = 1
+                     AND p.change_type != 'removed'
+                     AND p.scrape_id = (SELECT MAX(latest.scrape_id) FROM price_snapshots latest
+                                        WHERE latest.item_id = s.item_id)
+                   ORDER BY p.rowid""",
+                (restaurant_id,),
+            ).fetchall()
+        return [
+            {"name": row["name"], "MRP": row["mrp"], "Discounted Price": row["discounted_price"], "price_paise": row["price_paise"]}
+            for row in rows
+        ]
+
+    # ---------------- Import / Export ----------------
+    def import_csv_tree(self, root, batch_size=50):
+        """Load a data/<city>/<restaurant>/*.csv tree; returns the number of scrapes imported."""
+        scrapes = list(iter_csv_tree(root))
+        for start in range(0, len(scrapes), batch_size):
+            with self.transaction() as conn:
+                for scrape in scrapes[start:start + batch_size]:
+                    self._save(conn, **scrape)
+        return len(scrapes)
+
+    def export_parquet(self, out_dir):
+        """Write one Parquet file per table (needs pandas and pyarrow)."""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise RuntimeError("Parquet export needs pandas and pyarrow: pip install pandas pyarrow")
+
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        with self._connect() as conn:
+            for table in ("restaurants", "scrapes", "items", "price_snapshots", "offers"):
+                path = os.path.join(out_dir, f"{table}.parquet")
+                pd.read_sql_query(f"SELECT * FROM {table}", conn).to_parquet(path, index=False)
+                paths.append(path)
+        return paths
+
+
+class MultiStorage:
+    """Writes every scrape to several backends and merges their references."""
+
+    def __init__(self, backends, timer=None):
+        self.backends = backends
+        # timer(stage) -> context manager timing one backend's write.
+        self.timer = timer
+
+    def save_scrape(self, *args, **kwargs):
+        refs = {}
+        for backend in self.backends:
+            with self.timer(backend.stage) if self.timer else nullcontext():
+                refs.update(backend.save_scrape(*args, **kwargs))
+        return refs
+
+
+# -------------------- Legacy CSV Import --------------------
+# Offers were joined with ", "; a comma between digits is a thousands separator ("Flat ₹1,000 Off").
+OFFER_SEPARATOR = re.compile(r"(?<!\d),|,(?!\d)")
+
+
+def offer_list(text):
+    return [part.strip() for part in OFFER_SEPARATOR.split(text) if part.strip().lower() not in NO_OFFERS]
+
+
+def read_items(rows):
+    if not rows or rows[0] == ["No items found."]:
+        return []
+    header = rows[0]
+    return [dict(zip(header, row)) for row in rows[1:] if row]
+
+
+def read_offers(rows):
+    """Two-section layout: "Discounts" rows, a blank line, then "Coupons" rows."""
+    sections = {"discounts": [], "coupons": []}
+    current = None
+    for row in rows:
+        cell = row[0].strip() if row else ""
+        if cell.lower() in sections:
+            current = cell.lower()
+        elif current and cell.lower() not in NO_OFFERS:
+            sections[current].append(cell)
+    return sections["discounts"], sections["coupons"]
+
+
+def iter_csv_tree(root):
+    """Yield save_scrape() kwargs for every scrape stored under ``root``."""
+    for city in sorted(os.listdir(root)):
+        city_dir = os.path.join(root, city)
+        if not os.path.isdir(city_dir):
+            continue
+        for restaurant in sorted(os.listdir(city_dir)):
+            restaurant_dir = os.path.join(city_dir, restaurant)
+            if not os.path.isdir(restaurant_dir):
+                continue
+
+            scrapes, offer_times = {}, {}
+            prefix = f"{restaurant}_{city}_"
+            for filename in sorted(os.listdir(restaurant_dir)):
+                if not (filename.startswith(prefix) and filename.endswith(".csv")):
+                    continue
+                kind = filename[len(prefix):-len(".csv")]
+                platform, _, suffix = kind.partition("_")
+                path = os.path.join(restaurant_dir, filename)
+                with open(path, newline="", encoding="utf-8") as f:
+                    rows = list(csv.reader(f))
+
+                mtime = os.path.getmtime(path)
+                scrape = scrapes.setdefault(platform, {
+                    "platform": platform,
+                    "restaurant": restaurant.replace("_", " "),
+                    "city": city.replace("_", " "),
+                    "items": [],
+                    "discounts": [],
+                    "coupons": [],
+                    "scraped_at": mtime,
+                })
+                scrape["scraped_at"] = max(scrape["scraped_at"], mtime)
+
+                offers = None
+                if suffix == "offers":
+                    offers = read_offers(rows)
+                elif rows and rows[0][:1] == ["Platform"]:
+                    # Combined layout: Platform,Discounts,Coupons / values / item header / items
+                    if len(rows) > 1 and len(rows[1]) >= 3:
+                        offers = offer_list(rows[1][1]), offer_list(rows[1][2])
+                    if not scrape["items"]:
+                        scrape["items"] = read_items(rows[2:])
+                else:
+                    # _items.csv (or a bare item list) always wins over the combined copy.
+                    scrape["items"] = read_items(rows)
+
+                # Both offer files can exist; keep the newer one, or the non-empty one on a tie.
+                if offers is not None:
+                    newest = offer_times.get(platform, float("-inf"))
+                    if mtime > newest or (mtime == newest and any(offers)):
+                        scrape["discounts"], scrape["coupons"] = offers
+                        offer_times[platform] = mtime
+            yield from scrapes.values()
+
+
+# -------------------- CLI --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Scrape history storage tools")
+    parser.add_argument("--db", default=os.getenv("STORAGE_DB_PATH", os.path.join("data", "scrapes.db")))
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_cmd = commands.add_parser("import", help="import a data/<city>/<restaurant>/*.csv tree")
+    import_cmd.add_argument("root", nargs="?", default="data")
+    export_cmd = commands.add_parser("export-parquet", help="write every table as Parquet")
+    export_cmd.add_argument("out_dir")
+    commands.add_parser("rebuild-rollups", help="recompute the analytics rollups from the stored history")
+    args = parser.parse_args()
+
+    storage = SQLiteStorage(args.db)
+    if args.command == "import":
+        print(f"Imported {storage.import_csv_tree(args.root)} scrapes from {args.root} into {args.db}")
+    elif args.command == "rebuild-rollups":
+        with storage.transaction() as conn:
+            print(f"Rebuilt analytics rollups for {rebuild_rollups(conn)} restaurants in {args.db}")
+    else:
+        for path in storage.export_parquet(args.out_dir):
+            print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+# -------------------- Spool --------------------
+class Spool:
+    """NDJSON records of one streaming scrape: the worker appends, the API tails.
+
+    Records are ``{"type": "item", "item": {...}}`` while items are extracted,
+    then trailing ``offers`` and ``metadata`` records. A ``retry`` record
+    means the rows sent so far are void (the scrape restarted on a fresh tab,
+    or the job was requeued after its worker was killed).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.items = 0
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # A requeued job reopens its spool; a tailing client may already hold part of it.
+        resumed = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "a", encoding="utf-8")
+        if resumed:
+            self.retry()
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def item(self, item):
+        self.items += 1
+        self.write({"type": "item", "item": item})
+
+    def retry(self):
+        self.items = 0
+        self.write({"type": "retry"})
+
+    def close(self):
+        self._file.close()
+
+
+def spool_path(directory, job_id):
+    return os.path.join(directory, f"{job_id}.ndjson")
+
+
+def current():
+    return getattr(_local, "spool", None)
+
+
+@contextmanager
+def spooling(path):
+    """Make a new Spool current for this thread while the block runs."""
+    previous, _local.spool = current(), Spool(path)
+    try:
+        yield _local.spool
+    finally:
+        _local.spool.close()
+        _local.spool = previous
+
+
+def emit(items):
+    """Pass ``items`` through, copying each one to the current spool (if any) as it goes by."""
+    spool = current()
+    for item in items:
+        if spool is not None:
+            spool.item(item)
+        yield item
+
+
+def write(record):
+    """Append a record to the current spool; a no-op outside ``spooling``."""
+    spool = current()
+    if spool is not None:
+        spool.write(record)
+
+
+def restart():
+    """Void the rows spooled so far; call before retrying a scrape from scratch."""
+    spool = current()
+    if spool is not None and spool.items:
+        spool.retry()
+
+
+# -------------------- Tailing --------------------
+def tail(path, finished, poll_interval=0.2, chunk_size=64 * 1024):
+    """Yield runs of complete NDJSON lines from ``path`` as the worker writes them.
+
+    ``finished()`` returns the job once it is done or failed (else None);
+    everything the worker wrote before finishing is yielded before this stops.
+    Reads at most ``chunk_size`` at a time, so memory does not grow with the
+    menu. Returns that job.
+    """
+    handle, pending = None, ""
+    while True:
+        job = finished()
+        if handle is None and os.path.exists(path):
+            handle = open(path, encoding="utf-8")
+        while handle is not None:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            complete, newline, pending = (pending + chunk).rpartition("\n")
+            if newline:
+                yield complete + newline
+        if job is not None:
+            if handle is not None:
+                handle.close()
+            return job
+        time.sleep(poll_interval)
+
+
+def prune(directory, max_age):
+    """Delete spools older than ``max_age`` seconds."""
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
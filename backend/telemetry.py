@@ -0,0 +1,119 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+# Scrapes run in worker processes, so metrics go through prometheus_client's
+# multiprocess mode. The directory must be set before prometheus_client is
+# imported anywhere, and spawned workers inherit it from the environment.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join("data", "metrics"))
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "scrape_stage_seconds", "Time spent in one stage of a scrape.", ["platform", "stage"], buckets=STAGE_BUCKETS,
+)
+SCRAPE_SECONDS = Histogram(
+    "scrape_duration_seconds", "End-to-end scrape time.", ["platform", "outcome"], buckets=STAGE_BUCKETS,
+)
+SCRAPES = Counter(
+    "scrape_requests", "Scrapes by platform, source and outcome (success, failure, timeout, rejected).",
+    ["platform", "source", "outcome"],
+)
+
+# Set by the API process's worker supervisor and Chrome watchdog.
+WORKER_RESTARTS = Counter(
+    "scrape_worker_restarts", "Worker replacements by reason (recycled, crashed, timeout, memory).", ["reason"],
+)
+CHROME_PROCESSES = Gauge(
+    "chrome_processes", "Chromium and chromedriver processes by state (owned, orphaned, zombies).", ["state"],
+    multiprocess_mode="livesum",
+)
+CHROME_RSS = Gauge(
+    "chrome_rss_bytes", "RSS of Chromium and chromedriver processes by state (owned, orphaned).", ["state"],
+    multiprocess_mode="livesum",
+)
+CHROME_REAPED = Counter("chrome_reaped", "Orphaned browser trees killed and zombies reaped.", ["kind"])
+OFFER_CARDS = Counter("offer_cards", "Swiggy offer cards read, by status (ok, timeout, error).", ["status"])
+
+_local = threading.local()
+
+
+# -------------------- Traces --------------------
+class Trace:
+    """Ordered timing spans of one scrape; every span is also exported to Prometheus."""
+
+    def __init__(self, platform):
+        self.platform = platform
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def record(self, stage, duration, offset=None, **details):
+        STAGE_SECONDS.labels(self.platform, stage).observe(duration)
+        if offset is None:
+            offset = time.perf_counter() - self.started - duration
+        self.spans.append({"stage": stage, "start": round(offset, 4), "duration": round(duration, 4), **details})
+
+    def to_dict(self):
+        return {"platform": self.platform, "total": round(time.perf_counter() - self.started, 4), "spans": self.spans}
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def trace(platform):
+    """Make a new Trace current for this thread while the block runs."""
+    previous, _local.trace = current(), Trace(platform)
+    try:
+        yield _local.trace
+    finally:
+        _local.trace = previous
+
+
+@contextmanager
+def span(stage):
+    """Time a stage of the current thread's scrape (a no-op outside ``trace``)."""
+    active = current()
+    if active is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        active.record(stage, time.perf_counter() - started, started - active.started)
+
+
+def record(stage, duration, **details):
+    """Add an already measured stage (e.g. a pool's queue wait) that ended just now to the current trace."""
+    active = current()
+    if active is not None:
+        active.record(stage, duration, **details)
+
+
+def finish(platform, source, outcome, duration):
+    SCRAPES.labels(platform, source, outcome).inc()
+    SCRAPE_SECONDS.labels(platform, outcome).observe(duration)
+
+
+# -------------------- Export --------------------
+def reset():
+    """Drop samples left by earlier runs; call once in the API process before workers start."""
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def render():
+    """(body, content type) of every process's metrics merged."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,105 @@
+import os
+import threading
+from collections import deque
+
+from selenium.common.exceptions import TimeoutException
+
+
+# -------------------- Timeouts --------------------
+# Seconds. Override any entry with TIMEOUT_<PLATFORM>_<NAME>, e.g. TIMEOUT_ZOMATO_PAGE=30.
+PLATFORM_TIMEOUTS = {
+    "swiggy": {"page": 10, "modal_open": 5, "modal_close": 3, "dom_stable": 2, "dom_quiet": 0.15},
+    "zomato": {"page": 100},
+    "mystore": {"page": 5, "scroll": 60, "scroll_round": 5, "scroll_quiet": 0.75},
+}
+
+
+def platform_timeout(platform, name):
+    override = os.getenv(f"TIMEOUT_{platform.upper()}_{name.upper()}")
+    if override:
+        return float(override)
+    return PLATFORM_TIMEOUTS[platform][name]
+
+
+class AdaptiveTimeouts:
+    """Page-ready timeouts that follow each platform's recent p95 latency.
+
+    Until ``min_samples`` page loads have been seen the static ``page`` timeout
+    applies; after that it is ``multiplier`` x p95, kept between ``floor`` and
+    the static value (which stays the ceiling).
+    """
+
+    def __init__(self, multiplier=3.0, floor=3.0, min_samples=5, sample_size=100):
+        self.multiplier = multiplier
+        self.floor = floor
+        self.min_samples = min_samples
+        self.sample_size = sample_size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def observe(self, platform, seconds):
+        if seconds is None:
+            return
+        with self._lock:
+            self._samples.setdefault(platform, deque(maxlen=self.sample_size)).append(seconds)
+
+    def p95(self, platform):
+        with self._lock:
+            samples = sorted(self._samples.get(platform, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+    def page(self, platform):
+        ceiling = platform_timeout(platform, "page")
+        p95 = self.p95(platform)
+        if p95 is None:
+            return ceiling
+        return min(ceiling, max(self.floor, p95 * self.multiplier))
+
+    def stats(self):
+        with self._lock:
+            platforms = {platform: len(samples) for platform, samples in self._samples.items()}
+        stats = {}
+        for platform, count in platforms.items():
+            p95 = self.p95(platform)
+            stats[platform] = {
+                "samples": count,
+                "p95_page_ready": round(p95, 3) if p95 is not None else None,
+                "page_timeout": round(self.page(platform), 2),
+                "ceiling": platform_timeout(platform, "page"),
+            }
+        return stats
+
+
+# -------------------- Conditions --------------------
+# Resolves once the subtree has seen no mutation for `quiet` ms, or after `limit` ms.
+DOM_STABLE_SCRIPT = """
+const [root, quiet, limit, done] = arguments;
+const started = performance.now();
+let timer = null;
+let cap = null;
+const finish = (stable) => {
+    observer.disconnect();
+    clearTimeout(timer);
+    clearTimeout(cap);
+    done({stable: stable, waited: performance.now() - started});
+};
+const observer = new MutationObserver(() => {
+    clearTimeout(timer);
+    timer = setTimeout(() => finish(true), quiet);
+});
+observer.observe(root || document.body, {childList: true, subtree: true, attributes: true, characterData: true});
+timer = setTimeout(() => finish(true), quiet);
+cap = setTimeout(() => finish(false), limit);
+"""
+
+
+def wait_for_dom_stable(driver, timeout, quiet=0.15, root=None):
+    """Block until the DOM (or ``root``) stops mutating; returns True if it settled."""
+    driver.set_script_timeout(timeout + 5)
+    try:
+        result = driver.execute_async_script(DOM_STABLE_SCRIPT, root, int(quiet * 1000), int(timeout * 1000))
+    except TimeoutException:
+        return False
+    return bool(result and result.get("stable"))
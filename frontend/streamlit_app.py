@@ -1,9 +1,94 @@
+import json
+import time
+
 import streamlit as st
 import requests
 import pandas as pd
 
 # --------- API Configuration ----------
 API_BASE_URL = "http://backend:8000/scrape"
+JOBS_URL = "http://backend:8000/jobs"
+BATCH_URL = "http://backend:8000/scrape/batch"
+ANALYTICS_URL = "http://backend:8000/analytics"
+POLL_INTERVAL = 2  # seconds
+POLL_TIMEOUT = 600  # seconds
+RENDER_INTERVAL = 0.5  # seconds between table refreshes while rows stream in
+
+
+def wait_for_job(job_id):
+    deadline = time.time() + POLL_TIMEOUT
+    while time.time() < deadline:
+        job = requests.get(f"{JOBS_URL}/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"Job {job_id} did not finish within {POLL_TIMEOUT} seconds.")
+
+
+def render_summary(data):
+    st.success(f"Scraping successful for {data['restaurant']} in {data['city']} ({data['platform'].capitalize()})")
+    st.write(f"Total Items Found: {data['item_count']}")
+    if data.get("cached"):
+        st.info(f"Served from cache ({data['age']:.0f}s old). Tick 'Force refresh' to re-scrape.")
+
+
+def render_links(data):
+    # Download links (if hosted or saved to a public bucket)
+    if data.get("items_csv"):
+        st.markdown(f"📄 [Download Items CSV]({API_BASE_URL}/{data['items_csv']})", unsafe_allow_html=True)
+    if data.get("offers_csv"):
+        st.markdown(f"🎁 [Download Offers CSV]({API_BASE_URL}/{data['offers_csv']})", unsafe_allow_html=True)
+
+
+def render_result(data):
+    render_summary(data)
+
+    # Display data
+    df = pd.DataFrame(data["data"])
+    st.dataframe(df)
+
+    render_links(data)
+
+
+def stream_scrape(url, force_refresh):
+    """Show menu rows while the backend is still scraping (POST /scrape?stream=true)."""
+    response = requests.post(
+        API_BASE_URL, params={"stream": "true"}, json={"url": url, "force_refresh": force_refresh},
+        stream=True, timeout=(10, POLL_TIMEOUT),
+    )
+    response.raise_for_status()
+
+    status = st.empty()
+    table = st.empty()
+    rows, last_render = [], 0.0
+    status.info("Waiting for the first items...")
+    for line in response.iter_lines():
+        if not line:
+            continue
+        record = json.loads(line)
+        kind = record["type"]
+        if kind == "item":
+            rows.append(record["item"])
+            if time.time() - last_render >= RENDER_INTERVAL:
+                status.info(f"Scraping... {len(rows)} items so far")
+                table.dataframe(pd.DataFrame(rows))
+                last_render = time.time()
+        elif kind == "retry":
+            rows = []  # the backend restarted the scrape on a fresh browser tab
+            table.empty()
+        elif kind == "offers":
+            if record["discounts"] or record["coupons"]:
+                with st.expander("Offers"):
+                    for text in record["discounts"] + record["coupons"]:
+                        st.write(f"- {text}")
+        elif kind == "error":
+            status.empty()
+            st.error(f"Scraping failed: {record['status_code']} - {record['error']}")
+        elif kind == "metadata":
+            status.empty()
+            table.dataframe(pd.DataFrame(rows))
+            render_summary(record)
+            render_links(record)
 
 
 # --------- Streamlit UI ----------
@@ -13,6 +98,8 @@ st.title("🍽️ Restaurant Platform Scraper")
 st.markdown("Enter a restaurant URL from **Swiggy**, **Zomato**, or **MyStore** to scrape data.")
 
 url_input = st.text_input("Restaurant URL")
+force_refresh = st.checkbox("Force refresh (ignore cached results)")
+stream_rows = st.checkbox("Show items as they are scraped", value=True)
 
 if st.button("Scrape Data"):
     if not url_input:
@@ -20,24 +107,128 @@ if st.button("Scrape Data"):
     else:
         with st.spinner("Scraping in progress..."):
             try:
-                response = requests.post(API_BASE_URL, json={"url": url_input})
-                response.raise_for_status()
-                data = response.json()
-
-                st.success(f"Scraping successful for {data['restaurant']} in {data['city']} ({data['platform'].capitalize()})")
-                st.write(f"Total Items Found: {data['item_count']}")
-
-                # Display data
-                df = pd.DataFrame(data["data"])
-                st.dataframe(df)
-
-                # Download links (if hosted or saved to a public bucket)
-                if data.get("items_csv"):
-                    st.markdown(f"📄 [Download Items CSV]({API_BASE_URL}/{data['items_csv']})", unsafe_allow_html=True)
-                if data.get("offers_csv"):
-                    st.markdown(f"🎁 [Download Offers CSV]({API_BASE_URL}/{data['offers_csv']})", unsafe_allow_html=True)
+                if stream_rows:
+                    stream_scrape(url_input, force_refresh)
+                else:
+                    response = requests.post(API_BASE_URL, json={"url": url_input, "force_refresh": force_refresh})
+                    response.raise_for_status()
+                    job = wait_for_job(response.json()["job_id"])
+                    if job["status"] == "failed":
+                        st.error(f"Scraping failed: {job['status_code']} - {job['error']}")
+                    else:
+                        render_result(job["result"])
 
             except requests.exceptions.HTTPError as http_err:
-                st.error(f"HTTP error: {response.status_code} - {response.json().get('detail')}")
+                st.error(f"HTTP error: {http_err.response.status_code} - {http_err.response.json().get('detail')}")
             except Exception as e:
                 st.error(f"Unexpected error: {str(e)}")
+
+
+# --------- Batch Scrape ----------
+st.header("📋 Batch Scrape")
+st.markdown("Paste one URL per line, or upload a CSV with a `url` column.")
+
+batch_text = st.text_area("Restaurant URLs")
+batch_file = st.file_uploader("URL CSV", type="csv")
+
+if st.button("Scrape Batch"):
+    if not batch_text.strip() and batch_file is None:
+        st.error("Please enter URLs or upload a CSV.")
+    else:
+        try:
+            if batch_file is not None:
+                response = requests.post(BATCH_URL, files={"file": (batch_file.name, batch_file.getvalue())}, stream=True)
+            else:
+                response = requests.post(BATCH_URL, json={"urls": batch_text.splitlines()}, stream=True)
+            response.raise_for_status()
+
+            lines = response.iter_lines()
+            header = json.loads(next(lines))
+            progress = st.progress(0.0, text=f"0 / {header['total']} URLs done")
+            table = st.empty()
+
+            rows = []
+            for line in lines:
+                if not line:
+                    continue
+                record = json.loads(line)
+                result = record.get("result") or {}
+                rows.append({
+                    "url": record["url"],
+                    "status": record["status"],
+                    "restaurant": result.get("restaurant"),
+                    "city": result.get("city"),
+                    "items": result.get("item_count"),
+                    "error": record.get("error"),
+                })
+                progress.progress(len(rows) / header["total"], text=f"{len(rows)} / {header['total']} URLs done")
+                table.dataframe(pd.DataFrame(rows))
+
+        except requests.exceptions.HTTPError:
+            st.error(f"HTTP error: {response.status_code} - {response.json().get('detail')}")
+        except Exception as e:
+            st.error(f"Unexpected error: {str(e)}")
+
+
+# --------- Price Analytics ----------
+def rupees(paise):
+    return None if paise is None else paise / 100
+
+
+st.header("📈 Price Analytics")
+cities_tab, discounts_tab, items_tab = st.tabs(["Cities", "Top discounts", "Items"])
+
+with cities_tab:
+    dish = st.text_input("Only dishes matching (optional)", key="city_dish")
+    if st.button("Load city prices"):
+        params = {"limit": 1000}
+        if dish:
+            params["q"] = dish
+        response = requests.get(f"{ANALYTICS_URL}/cities", params=params)
+        if response.ok and response.json()["results"]:
+            table = pd.DataFrame(response.json()["results"])
+            for column in ("median_price_paise", "avg_price_paise", "p25_price_paise", "p75_price_paise"):
+                table[column.replace("_paise", "")] = table[column].map(rupees)
+            st.dataframe(table[["city", "platform", "restaurants", "items", "median_price", "avg_price",
+                                "p25_price", "p75_price", "avg_discount_pct", "discounted_share"]])
+        elif response.ok:
+            st.info("No matching dishes.")
+        else:
+            st.error(f"HTTP error: {response.status_code} - {response.json().get('detail')}")
+
+with discounts_tab:
+    rank_by = st.radio("Rank by", ["avg", "max"], horizontal=True)
+    discount_city = st.text_input("City (optional)", key="discount_city")
+    if st.button("Load top discounts"):
+        params = {"by": rank_by, "limit": 50}
+        if discount_city:
+            params["city"] = discount_city
+        response = requests.get(f"{ANALYTICS_URL}/discounts", params=params)
+        if response.ok:
+            st.dataframe(pd.DataFrame(response.json()["results"]))
+        else:
+            st.error(f"HTTP error: {response.status_code} - {response.json().get('detail')}")
+
+with items_tab:
+    item_query = st.text_input("Dish name contains", key="item_query")
+    item_city = st.text_input("City (optional)", key="item_city")
+    if st.button("Search items"):
+        params = {"q": item_query, "limit": 200}
+        if item_city:
+            params["city"] = item_city
+        response = requests.get(f"{ANALYTICS_URL}/items", params=params)
+        if response.ok:
+            st.session_state["analytics_items"] = response.json()["results"]
+        else:
+            st.error(f"HTTP error: {response.status_code} - {response.json().get('detail')}")
+    items = st.session_state.get("analytics_items")
+    if items:
+        st.dataframe(pd.DataFrame(items))
+        item_id = st.selectbox("Price history for", [item["item_id"] for item in items],
+                               format_func=lambda i: next(f"{x['name']} — {x['restaurant']}" for x in items if x["item_id"] == i))
+        response = requests.get(f"{ANALYTICS_URL}/items/{item_id}/history", params={"limit": 1000})
+        if response.ok and response.json()["results"]:
+            points = pd.DataFrame(response.json()["results"])
+            points["scraped_at"] = pd.to_datetime(points["scraped_at"], unit="s")
+            points["price"] = points["price_paise"] / 100
+            st.line_chart(points.set_index("scraped_at")["price"])